@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-request CrewAI construction against the pooled crew templates.
+
+Compares building the specialist agent, design task and crew for every
+request (the old ``process_sql_query`` path) with leasing a prebuilt
+template from ``crew_pool`` and resetting it on return. Reports time per
+request, allocated memory and garbage collector runs.
+
+Crews are not kicked off, so no LLM is needed; only the construction and
+reset overhead is measured.
+
+Usage:
+    python benchmarks/bench_crew_pool.py [iterations] [model]
+"""
+
+import gc
+import statistics
+import sys
+import time
+import tracemalloc
+
+from crewai import Crew
+
+from sql_bigbrother.pipelines.sql_processing.prompts.agents import SQLAgents
+from sql_bigbrother.pipelines.sql_processing.prompts.crews import CrewPool
+from sql_bigbrother.pipelines.sql_processing.prompts.tasks import SQLTasks
+
+REQUIREMENT = "Top 10 products by revenue in 2024"
+SCHEMA = "CREATE TABLE products (id INT PRIMARY KEY, name VARCHAR(255), price DECIMAL(10, 2));"
+
+
+def build_per_request(model):
+    agents = SQLAgents()
+    tasks = SQLTasks()
+    specialist = agents.sql_specialist_agent(model)
+    design_task = tasks.sql_design_task(specialist, REQUIREMENT, SCHEMA)
+    return Crew(agents=[specialist], tasks=[design_task], verbose=True)
+
+
+def lease_from_pool(pool, model):
+    with pool.lease("specialist", model) as crew:
+        return crew
+
+
+def measure(func, iterations):
+    gc.collect()
+    collections_before = sum(stat["collections"] for stat in gc.get_stats())
+    tracemalloc.start()
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    collections = sum(stat["collections"] for stat in gc.get_stats()) - collections_before
+    return timings, peak, collections
+
+
+def report(label, timings, peak, collections):
+    print(f"{label:<12} mean={statistics.mean(timings):8.3f} ms  p50={statistics.median(timings):8.3f} ms  "
+          f"peak alloc={peak / 1024:8.1f} KiB  gc runs={collections}")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    model = sys.argv[2] if len(sys.argv) > 2 else "qwen2.5:7b"
+
+    pool = CrewPool(max_idle=1)
+    pool.prewarm("specialist", model)
+
+    built = measure(lambda: build_per_request(model), iterations)
+    pooled = measure(lambda: lease_from_pool(pool, model), iterations)
+
+    print(f"{iterations} requests, model {model}")
+    report("per-request", *built)
+    report("pooled", *pooled)
+    print(f"Speed-up: {statistics.mean(built[0]) / max(statistics.mean(pooled[0]), 1e-6):.0f}x  "
+          f"(pool built {pool.built}, reused {pool.reused})")
+
+
+if __name__ == "__main__":
+    main()
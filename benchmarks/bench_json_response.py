@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON response encoding of large query results.
+
+Compares FastAPI's default path (``jsonable_encoder`` followed by
+``JSONResponse``) with ``FastJSONResponse`` on a synthetic result with
+100k rows of typical MySQL column types (int, str, Decimal, datetime, date,
+timedelta, bytes, None).
+
+Usage:
+    python benchmarks/bench_json_response.py [rows] [repeats]
+"""
+
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from sql_bigbrother.core.api.responses import FastJSONResponse, orjson
+from sql_bigbrother.pipelines.sql_processing.services.utils import custom_serializer
+
+COLUMNS = ["id", "name", "price", "created_at", "ship_date", "duration", "sku", "note"]
+
+
+def build_result(n_rows):
+    base = datetime(2025, 1, 1, 12, 30)
+    rows = [
+        [
+            i,
+            f"product-{i}",
+            Decimal(i) / Decimal(7),
+            base + timedelta(minutes=i),
+            date(2025, 1, 1) + timedelta(days=i % 365),
+            timedelta(seconds=i % 86400),
+            f"SKU{i:08d}".encode("utf-8"),
+            None if i % 3 else "ok",
+        ]
+        for i in range(n_rows)
+    ]
+    return {"query": "```sql\nSELECT ...\n```", "explain": "", "columns": COLUMNS, "rows": rows, "executed": True}
+
+
+def default_path(content):
+    # custom_serializer is needed for timedelta/bytes, which jsonable_encoder would otherwise reject or mangle
+    encoded = jsonable_encoder(content, custom_encoder={timedelta: custom_serializer, bytes: custom_serializer})
+    return JSONResponse(encoded).body
+
+
+def fast_path(content):
+    return FastJSONResponse(content).body
+
+
+def measure(func, content, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        body = func(content)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings, len(body)
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    content = build_result(n_rows)
+
+    print(f"{n_rows} rows x {len(COLUMNS)} columns, {repeats} repeats, encoder: {'orjson' if orjson else 'json'}")
+    results = {}
+    for label, func in (("jsonable_encoder + JSONResponse", default_path), ("FastJSONResponse", fast_path)):
+        timings, size = measure(func, content, repeats)
+        results[label] = statistics.mean(timings)
+        print(f"{label:<32} mean={statistics.mean(timings):9.1f} ms  "
+              f"min={min(timings):9.1f} ms  body={size / 1024 / 1024:.1f} MiB")
+
+    baseline, fast = results.values()
+    print(f"Speed-up: {baseline / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
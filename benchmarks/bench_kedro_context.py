@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-request Kedro overhead of the API.
+
+Compares the old request path, which opened a fresh ``KedroSession`` (and
+loaded its context) on every call, against the warm path where the context
+and the node dispatch table are built once and reused.
+
+Only the framework overhead is measured; the node functions themselves
+(CrewAI, Ollama, MySQL) are not invoked.
+
+Usage:
+    python benchmarks/bench_kedro_context.py [iterations]
+"""
+
+import statistics
+import sys
+import time
+
+from kedro.framework.session import KedroSession
+
+from sql_bigbrother.core.api.main import KedroSessionManager, project_path
+
+NODE_NAME = "process_sql_query_node"
+
+
+def cold_request():
+    """Overhead paid per request before the warm context existed."""
+    with KedroSession.create(project_path=project_path) as session:
+        session.load_context()
+
+
+def warm_request():
+    """Overhead paid per request with the shared context."""
+    KedroSessionManager.resolve(NODE_NAME)
+
+
+def measure(func, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(label, timings):
+    print(f"{label:<6} mean={statistics.mean(timings):9.3f} ms  "
+          f"p50={statistics.median(timings):9.3f} ms  "
+          f"max={max(timings):9.3f} ms")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    started = time.perf_counter()
+    KedroSessionManager.warm_up()
+    print(f"One-off warm-up: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    cold = measure(cold_request, iterations)
+    warm = measure(warm_request, iterations)
+
+    print(f"Per-request overhead over {iterations} iterations:")
+    report("before", cold)
+    report("after", warm)
+    print(f"Speed-up: {statistics.mean(cold) / max(statistics.mean(warm), 1e-6):.0f}x")
+
+    KedroSessionManager.close()
+
+
+if __name__ == "__main__":
+    main()
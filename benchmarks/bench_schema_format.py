@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Measure how many prompt tokens each schema verbosity level costs.
+
+Renders every bundled sample schema (or the given files) at each level of
+``schema_format.VERBOSITY_LEVELS`` and reports characters, estimated
+tokens and, for each model given, the exact token count from that model's
+tokenizer through Ollama. The last column is the shrink against raw DDL.
+
+Usage:
+    python benchmarks/bench_schema_format.py [--models qwen2.5:7b,llama3:8b] [schema.sql ...]
+"""
+
+import sys
+from pathlib import Path
+
+from sql_bigbrother.pipelines.sql_processing.services.schema_format import VERBOSITY_LEVELS, format_schema
+from sql_bigbrother.pipelines.sql_processing.services.tokens import estimate_tokens, token_counter
+
+SAMPLE_DIR = Path(__file__).resolve().parent.parent / "src" / "sql_bigbrother" / "core" / "api" / "sql"
+
+
+def main():
+    args = sys.argv[1:]
+    models = []
+    if args[:1] == ["--models"]:
+        models = [name for name in args[1].split(",") if name]
+        args = args[2:]
+    paths = [Path(arg) for arg in args] or sorted(SAMPLE_DIR.glob("*.sql"))
+
+    header = f"{'schema':<16} {'level':<10} {'chars':>7} {'estimate':>9}" + "".join(f" {model:>14}" for model in models)
+    print(header + f" {'vs ddl':>7}")
+    for path in paths:
+        schema = path.read_text(encoding="utf-8")
+        counts = {}
+        for verbosity in VERBOSITY_LEVELS:
+            rendered = format_schema(schema, verbosity)
+            counts[verbosity] = [len(rendered), estimate_tokens(rendered)] + [token_counter.measure(rendered, model) for model in models]
+        for verbosity, row in counts.items():
+            # Compare on the most precise count available
+            shrink = counts["ddl"][-1] / max(row[-1], 1)
+            print(f"{path.stem:<16} {verbosity:<10} {row[0]:>7} {row[1]:>9}" + "".join(f" {count:>14}" for count in row[2:])
+                  + f" {shrink:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark SQL generation through CrewAI against the direct Ollama engine.
+
+Sends the same questions against the same schema through the pooled
+one-agent specialist crew (``SQL_ENGINE=crewai``) and through a single
+``/api/generate`` call with the tight system prompt (``SQL_ENGINE=ollama``),
+and reports latency and prompt/completion token counts for each.
+
+Requires a running Ollama server with the model pulled.
+
+Usage:
+    python benchmarks/bench_sql_engine.py [model] [repeats] [schema.sql]
+"""
+
+import statistics
+import sys
+import time
+from pathlib import Path
+from textwrap import dedent
+
+from sql_bigbrother.pipelines.sql_processing.prompts.configs import DESIGN_TASK_DESCRIPTION, SQL_SYSTEM_PROMPT
+from sql_bigbrother.pipelines.sql_processing.prompts.crews import crew_pool
+from sql_bigbrother.pipelines.sql_processing.services.ollama import ollama_client
+from sql_bigbrother.pipelines.sql_processing.services.utils import filterSchema_v2
+
+DEFAULT_SCHEMA = Path(__file__).resolve().parent.parent / "src" / "sql_bigbrother" / "core" / "api" / "sql" / "shop.sql"
+QUESTIONS = [
+    "Top 10 products by stock",
+    "How many customers have an address?",
+    "Average product price per category",
+]
+
+
+def run_crewai(model, question, schema):
+    with crew_pool.lease("specialist", model) as template:
+        output = template.kickoff(requirement=question, schema=schema)
+    usage = output.token_usage
+    return usage.prompt_tokens, usage.completion_tokens
+
+
+def run_direct(model, question, schema):
+    prompt = dedent(DESIGN_TASK_DESCRIPTION(schema, question))
+    response = ollama_client.generate(model, prompt, system=SQL_SYSTEM_PROMPT)
+    return response.get("prompt_eval_count", 0), response.get("eval_count", 0)
+
+
+def measure(func, model, schema, repeats):
+    timings, prompt_tokens, completion_tokens = [], [], []
+    for _ in range(repeats):
+        for question in QUESTIONS:
+            started = time.perf_counter()
+            prompt, completion = func(model, question, schema)
+            timings.append(time.perf_counter() - started)
+            prompt_tokens.append(prompt)
+            completion_tokens.append(completion)
+    return timings, prompt_tokens, completion_tokens
+
+
+def report(label, timings, prompt_tokens, completion_tokens):
+    print(f"{label:<8} mean={statistics.mean(timings):6.2f} s  p50={statistics.median(timings):6.2f} s  "
+          f"prompt tokens={statistics.mean(prompt_tokens):7.0f}  completion tokens={statistics.mean(completion_tokens):6.0f}")
+
+
+def main():
+    model = sys.argv[1] if len(sys.argv) > 1 else "qwen2.5:7b"
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    schema = filterSchema_v2(Path(sys.argv[3] if len(sys.argv) > 3 else DEFAULT_SCHEMA).read_text(encoding="utf-8"))
+
+    # Load the model once so neither engine pays the cold start
+    run_direct(model, QUESTIONS[0], schema)
+
+    print(f"{len(QUESTIONS)} questions x {repeats} repeats, model {model}")
+    crew = measure(run_crewai, model, schema, repeats)
+    direct = measure(run_direct, model, schema, repeats)
+    report("crewai", *crew)
+    report("ollama", *direct)
+    print(f"Latency: {statistics.mean(crew[0]) / statistics.mean(direct[0]):.1f}x faster, "
+          f"prompt tokens: {statistics.mean(crew[1]) / max(statistics.mean(direct[1]), 1):.1f}x fewer")
+
+
+if __name__ == "__main__":
+    main()
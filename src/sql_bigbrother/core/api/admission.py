@@ -0,0 +1,112 @@
+"""Admission control and load shedding for LLM-bound endpoints."""
+
+import asyncio
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(HTTPException):
+    """Raised when a request is shed; rendered with a ``Retry-After`` header."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(status_code=status_code, detail=detail, headers={"Retry-After": str(retry_after)})
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bound the number of in-flight and queued requests for one kind of work.
+
+    Up to ``max_in_flight`` requests run at once and up to ``max_queue`` more
+    wait for a slot. A request arriving at a full queue is rejected with 429;
+    a request that waits longer than ``queue_timeout`` seconds is rejected
+    with 503. Both carry a ``Retry-After`` estimate based on recent service
+    times, so clients back off instead of all timing out together.
+    """
+
+    def __init__(self, name: str, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self._total_queue_wait = 0.0
+        self._max_queue_wait = 0.0
+        self._avg_service_time = 5.0
+
+    def retry_after(self) -> int:
+        """Estimate, in seconds, when a slot is likely to be free."""
+        backlog = (self.queued + 1) / self.max_in_flight
+        return max(1, math.ceil(backlog * self._avg_service_time))
+
+    async def acquire(self) -> float:
+        """Wait for a slot, or raise ``AdmissionRejected``.
+
+        Returns:
+            The admission time, to pass to ``release``
+        """
+        if self._slots.locked() and self.queued >= self.max_queue:
+            self.rejected_queue_full += 1
+            logger.warning(f"Admission '{self.name}': queue full ({self.queued} waiting), rejecting request")
+            raise AdmissionRejected(429, f"Too many {self.name} requests in progress, retry later", self.retry_after())
+
+        queued_at = time.perf_counter()
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected_timeout += 1
+            logger.warning(f"Admission '{self.name}': queued longer than {self.queue_timeout}s, rejecting request")
+            raise AdmissionRejected(503, f"Timed out waiting for a {self.name} slot, retry later", self.retry_after())
+        finally:
+            self.queued -= 1
+
+        wait = time.perf_counter() - queued_at
+        self._total_queue_wait += wait
+        self._max_queue_wait = max(self._max_queue_wait, wait)
+        self.admitted += 1
+        self.in_flight += 1
+        return time.perf_counter()
+
+    def release(self, admitted_at: float) -> None:
+        """Free the slot taken by ``acquire``."""
+        self.in_flight -= 1
+        self._slots.release()
+        # Exponentially weighted service time for Retry-After estimates
+        self._avg_service_time = 0.8 * self._avg_service_time + 0.2 * (time.perf_counter() - admitted_at)
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the ``async with`` block."""
+        admitted_at = await self.acquire()
+        try:
+            yield
+        finally:
+            self.release(admitted_at)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return admission, queueing and rejection metrics."""
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "queue_timeout_s": self.queue_timeout,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "avg_queue_wait_ms": round(self._total_queue_wait / self.admitted * 1000, 2) if self.admitted else 0.0,
+            "max_queue_wait_ms": round(self._max_queue_wait * 1000, 2),
+            "avg_service_s": round(self._avg_service_time, 2)
+        }
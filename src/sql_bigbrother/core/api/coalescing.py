@@ -0,0 +1,75 @@
+"""Single-flight coalescing of identical in-flight requests."""
+
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sql_bigbrother.pipelines.sql_processing.services.utils import normalize_question, schema_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+def chat_request_key(question: str, schema: str, model: str, chat_history: Optional[List[Dict[str, str]]] = None) -> str:
+    """Build the coalescing key for a chat request.
+
+    The key combines the normalized question, the schema fingerprint and the
+    model. The conversation context is part of the prompt as well, so it is
+    included too; first questions in new sessions (the common case for
+    recommended questions) all share an empty context.
+    """
+    context = hashlib.sha256(json.dumps(chat_history or [], sort_keys=True).encode("utf-8")).hexdigest()
+    return "|".join([normalize_question(question), schema_fingerprint(schema), model or "", context])
+
+
+class SingleFlight:
+    """Run at most one call per key at a time and share its result.
+
+    The first caller for a key starts the work as an independent task;
+    concurrent callers with the same key await that task instead of starting
+    their own. The shared task is shielded, so a caller that disconnects does
+    not cancel the work for the others. Results are shared, not copied:
+    callers must not mutate them.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Await the in-flight call for ``key``, starting ``func()`` if there is none.
+
+        Args:
+            key: Identity of the request
+            func: Coroutine function producing the result
+
+        Returns:
+            The (shared) result of the call
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+            logger.info(f"Coalescing duplicate in-flight request ({self.coalesced} so far)")
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return coalescing counters."""
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced
+        }
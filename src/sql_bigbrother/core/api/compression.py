@@ -0,0 +1,98 @@
+"""Negotiated gzip/brotli compression of large JSON responses."""
+
+import gzip
+from typing import Optional
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional dependency, see the "fast" extra
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json",)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick ``br`` or ``gzip`` from an ``Accept-Encoding`` header.
+
+    The highest quality value wins; brotli is preferred on ties when it is
+    installed. Returns None when the client accepts neither.
+    """
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    best, best_q = None, 0.0
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                continue
+        candidates = supported if name == "*" else (name,)
+        for candidate in candidates:
+            if candidate in supported and q > 0 and (q > best_q or (q == best_q and candidate == "br")):
+                best, best_q = candidate, q
+    return best
+
+
+class CompressionMiddleware:
+    """Compress complete JSON responses of at least ``minimum_size`` bytes.
+
+    Only single-message bodies are compressed, so streaming responses (SSE
+    events, row streams) pass through untouched and are not buffered.
+    Compression runs in a worker thread, so other requests keep being served.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            initial, start = start, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=initial["headers"])
+            if (message.get("more_body", False) or len(body) < self.minimum_size or "content-encoding" in headers
+                    or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)):
+                await send(initial)
+                await send(message)
+                return
+
+            body = await anyio.to_thread.run_sync(self.compress, body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(initial)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        """Compress ``body`` with the negotiated encoding."""
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
@@ -0,0 +1,192 @@
+"""Bounded worker pools that keep blocking pipeline work off the event loop."""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Concurrency limits (overridable through the environment)
+LLM_POOL_SIZE = int(os.getenv('API_LLM_WORKERS', '4'))
+DB_POOL_SIZE = int(os.getenv('API_DB_WORKERS', '8'))
+
+
+class WorkerPool:
+    """A named thread pool with a fixed concurrency limit and queue metrics.
+
+    Work submitted through ``run`` is executed on a dedicated
+    ``ThreadPoolExecutor`` so that synchronous CrewAI, Ollama and database
+    calls never block the uvicorn event loop. The executor size is the
+    concurrency limit; anything beyond it waits in the executor queue.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=f"{name}-worker"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_run = 0.0
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``func(*args, **kwargs)`` on the pool and await its result.
+
+        Args:
+            func: Blocking callable to execute
+            *args: Positional arguments for the callable
+            **kwargs: Keyword arguments for the callable
+
+        Returns:
+            Whatever the callable returns; exceptions are re-raised in the caller
+        """
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self._execute, func, submitted_at, args, kwargs)
+        return await loop.run_in_executor(self._executor, call)
+
+    def submit(self, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queue ``func(*args, **kwargs)`` on the pool without waiting for it.
+
+        For work that must happen even if the request that started it is
+        cancelled, such as recording a streamed answer after the client left.
+        """
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+        future = self._executor.submit(self._execute, func, submitted_at, args, kwargs)
+        future.add_done_callback(self._log_failure)
+        return future
+
+    @staticmethod
+    def _log_failure(future: Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Background work failed: {future.exception()}")
+
+    async def stream(self, func: Callable[..., Iterator[Any]], *args, **kwargs) -> AsyncIterator[Any]:
+        """Drive the generator ``func(*args, **kwargs)`` on the pool and yield its items.
+
+        Items are handed to the event loop as soon as the worker produces
+        them. If the consumer stops early (e.g. the client disconnected) the
+        worker closes the generator at its next item.
+
+        Args:
+            func: Generator function to run on a worker thread
+            *args: Positional arguments for the generator function
+            **kwargs: Keyword arguments for the generator function
+
+        Yields:
+            Items produced by the generator, in order
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        finished = object()
+
+        def produce():
+            generator = None
+            try:
+                generator = func(*args, **kwargs)
+                for item in generator:
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, (finished, e))
+                return
+            finally:
+                # Plain iterators have nothing to close
+                if hasattr(generator, "close"):
+                    generator.close()
+            loop.call_soon_threadsafe(queue.put_nowait, (finished, None))
+
+        task = asyncio.ensure_future(self.run(produce))
+        try:
+            while True:
+                item, error = await queue.get()
+                if error is not None:
+                    raise error
+                if item is finished:
+                    break
+                yield item
+            await task
+        finally:
+            stop.set()
+
+    def _execute(self, func: Callable[..., Any], submitted_at: float, args: tuple, kwargs: dict) -> Any:
+        started_at = time.perf_counter()
+        wait = started_at - submitted_at
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+
+        failed = False
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - started_at
+            with self._lock:
+                self._running -= 1
+                self._total_run += elapsed
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of queue depth, utilisation and wait times."""
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "avg_wait_ms": round(self._total_wait / finished * 1000, 2) if finished else 0.0,
+                "max_wait_ms": round(self._max_wait * 1000, 2),
+                "avg_run_ms": round(self._total_run / finished * 1000, 2) if finished else 0.0,
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop accepting new work and release the worker threads."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+# LLM-bound work (CrewAI crews, Ollama generations) and DB-bound work
+# (discovery, schema extraction, query execution) get separate pools so a
+# slow generation never starves a catalog lookup and vice versa.
+llm_pool = WorkerPool("llm", LLM_POOL_SIZE)
+db_pool = WorkerPool("db", DB_POOL_SIZE)
+
+
+def execution_stats() -> Dict[str, Any]:
+    """Return metrics for every worker pool."""
+    return {pool.name: pool.stats() for pool in (llm_pool, db_pool)}
+
+
+def shutdown_pools() -> None:
+    """Shut down every worker pool."""
+    for pool in (llm_pool, db_pool):
+        pool.shutdown()
@@ -0,0 +1,251 @@
+"""Background jobs for long-running schema extraction and analysis."""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from sql_bigbrother.core.api.processes import INSTANCE_ID, owner_alive
+from sql_bigbrother.pipelines.sql_processing.services.utils import custom_serializer
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once its cancellation has been requested."""
+
+
+class JobStore:
+    """Job records in a local SQLite file, shared by every worker process.
+
+    Records (including results) survive restarts. A queued or running job
+    whose owning process has died is reported as failed, so a client polling
+    across a restart gets a definite answer and can resubmit. The owner is
+    recorded as its PID and ``INSTANCE_ID``, so a new process that reuses
+    the PID does not keep old jobs alive.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                progress REAL NOT NULL,
+                result TEXT,
+                error TEXT,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                owner INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at);
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "instance" not in columns:
+            # Job files written before owners carried an instance id
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN instance TEXT")
+
+    def create(self, kind: str, params: Dict[str, Any]) -> str:
+        """Record a new queued job and return its id."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE updated_at < ? AND status NOT IN ('queued', 'running')",
+                               (now - self.ttl_seconds,))
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, kind, params, status, stage, progress, owner, instance, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'queued', 'queued', 0, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(params), os.getpid(), INSTANCE_ID, now, now)
+            )
+        return job_id
+
+    def update(self, job_id: str, **fields) -> None:
+        """Update ``status``, ``stage``, ``progress``, ``result`` or ``error`` of a job."""
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"], default=custom_serializer)
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE job_id = ?",
+                (*fields.values(), time.time(), job_id)
+            )
+
+    def request_cancel(self, job_id: str) -> None:
+        """Flag a job for cancellation; its owner picks the flag up at the next checkpoint."""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE job_id = ?", (time.time(), job_id))
+
+    def cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the job record, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, kind, params, status, stage, progress, result, error, cancel_requested, owner, created_at, updated_at, instance "
+                "FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = self._record(row[:12])
+        if job["status"] in ACTIVE_STATUSES and not owner_alive(row[9], row[12]):
+            self.update(job_id, status="failed", error="Interrupted by a server restart")
+            job.update(status="failed", error="Interrupted by a server restart")
+        return job
+
+    def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Return the most recent jobs, without their results."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id, kind, params, status, stage, progress, NULL, error, cancel_requested, owner, created_at, updated_at "
+                "FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._record(row) for row in rows]
+
+    def fail_orphans(self) -> int:
+        """Mark queued/running jobs whose owning process has died as failed."""
+        with self._lock:
+            rows = self._conn.execute("SELECT job_id, owner, instance FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        orphans = [job_id for job_id, owner, instance in rows if not owner_alive(owner, instance)]
+        for job_id in orphans:
+            self.update(job_id, status="failed", error="Interrupted by a server restart")
+        return len(orphans)
+
+    @staticmethod
+    def _record(row) -> Dict[str, Any]:
+        job_id, kind, params, status, stage, progress, result, error, cancel_requested, _, created_at, updated_at = row
+        return {
+            "job_id": job_id,
+            "kind": kind,
+            "params": json.loads(params),
+            "status": status,
+            "stage": stage,
+            "progress": progress,
+            "result": json.loads(result) if result else None,
+            "error": error,
+            "cancel_requested": bool(cancel_requested),
+            "created_at": created_at,
+            "updated_at": updated_at
+        }
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class JobContext:
+    """Handle passed to a running job for progress reporting and cancellation checks."""
+
+    def __init__(self, store: JobStore, job_id: str):
+        self.store = store
+        self.job_id = job_id
+
+    def progress(self, progress: float, stage: str) -> None:
+        """Report progress (0.0-1.0) and the current stage; raises ``JobCancelled`` if cancelled."""
+        self.check_cancelled()
+        self.store.update(self.job_id, progress=progress, stage=stage)
+
+    def check_cancelled(self) -> None:
+        if self.store.cancel_requested(self.job_id):
+            raise JobCancelled()
+
+
+class JobManager:
+    """Run jobs in the background with at most ``max_workers`` at a time.
+
+    Job functions are coroutines taking a ``JobContext``; their blocking
+    steps are expected to run on the worker pools. A server holds at most
+    ``max_queued`` unfinished jobs; beyond that submissions get 429.
+    """
+
+    def __init__(self, store: JobStore, max_workers: int = 2, max_queued: int = 32):
+        self.store = store
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max_queued
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._closing = False
+
+    def submit(self, kind: str, params: Dict[str, Any], func: Callable[[JobContext], Awaitable[Any]]) -> str:
+        """Queue a job and return its id immediately."""
+        if len(self._tasks) >= self.max_queued:
+            raise HTTPException(status_code=429, detail="Too many jobs in progress, retry later", headers={"Retry-After": "30"})
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        job_id = self.store.create(kind, params)
+        task = asyncio.ensure_future(self._run(job_id, func))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+        logger.info(f"Queued {kind} job {job_id}")
+        return job_id
+
+    async def _run(self, job_id: str, func: Callable[[JobContext], Awaitable[Any]]) -> None:
+        context = JobContext(self.store, job_id)
+        try:
+            async with self._slots:
+                context.check_cancelled()
+                self.store.update(job_id, status="running", stage="started")
+                result = await func(context)
+            self.store.update(job_id, status="succeeded", stage="done", progress=1.0, result=result)
+            logger.info(f"Job {job_id} succeeded")
+        except (JobCancelled, asyncio.CancelledError):
+            if self._closing:
+                self.store.update(job_id, status="failed", error="Interrupted by a server shutdown")
+            else:
+                self.store.update(job_id, status="cancelled", stage="cancelled")
+                logger.info(f"Job {job_id} cancelled")
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            self.store.update(job_id, status="failed", error=detail)
+            logger.error(f"Job {job_id} failed: {detail}")
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Request cancellation of a job; returns the job record or None if unknown.
+
+        A job queued or running in this process stops at once (blocking work
+        already handed to a pool thread finishes, but its result is dropped);
+        a job owned by another worker stops at its next progress checkpoint.
+        """
+        job = self.store.get(job_id)
+        if job is None or job["status"] not in ACTIVE_STATUSES:
+            return job
+        self.store.request_cancel(job_id)
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+        return self.store.get(job_id)
+
+    async def shutdown(self) -> None:
+        """Stop the jobs of this process, recording them as interrupted."""
+        self._closing = True
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"max_workers": self.max_workers, "max_queued": self.max_queued, "active": len(self._tasks)}
@@ -2,13 +2,37 @@
 
 from fastapi import FastAPI, Form, HTTPException, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from kedro.framework.session import KedroSession
 from kedro.framework.project import configure_project
+import asyncio
 import logging
+import os
+import threading
+import time
 from pathlib import Path
 import json
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from datetime import datetime
+from sql_bigbrother.core.api.execution import LLM_POOL_SIZE, llm_pool, db_pool, execution_stats, shutdown_pools
+from sql_bigbrother.core.api.startup import StartupStage, StartupState
+from sql_bigbrother.core.api.session_store import SessionStore, create_session_store
+from sql_bigbrother.core.api.shared_state import SharedState, StartupLeader, default_session_backend, supervisor_id
+from sql_bigbrother.core.api.result_store import ResultPager, ResultStore, ResultWriter, create_result_store, encode_cursor, decode_cursor
+from sql_bigbrother.core.api.responses import FastJSONResponse, dumps_json
+from sql_bigbrother.core.api.coalescing import SingleFlight, chat_request_key
+from sql_bigbrother.core.api.admission import AdmissionController
+from sql_bigbrother.core.api.compression import CompressionMiddleware
+from sql_bigbrother.core.api.jobs import JobContext, JobManager, JobStore
+from sql_bigbrother.pipelines.sql_processing.services.schema_cache import schema_cache
+from sql_bigbrother.pipelines.sql_processing.services.sql_cache import sql_cache
+from sql_bigbrother.pipelines.sql_processing.services.schema_linking import schema_linker
+from sql_bigbrother.pipelines.sql_processing.services.tokens import token_counter
+from sql_bigbrother.pipelines.sql_processing.services.token_budget import token_budget
+from sql_bigbrother.pipelines.sql_processing.services.cascade import sql_cascade
+from sql_bigbrother.pipelines.sql_processing.services.artifacts import artifact_store
+from sql_bigbrother.pipelines.sql_processing.services.model_registry import model_registry
+from sql_bigbrother.pipelines.sql_processing.services.model_lifecycle import model_lifecycle
 
 # Configure Kedro project
 project_path = Path(__file__).parent.parent.parent.parent.parent
@@ -16,12 +40,69 @@ configure_project("sql_bigbrother")
 
 logger = logging.getLogger(__name__)
 
+# Local directory for persistent API state (session store, caches)
+state_dir = Path(os.getenv('API_STATE_DIR', str(project_path / "data" / "state")))
+
 # Global state for discovered databases
 discovered_databases: Optional[Dict[str, Any]] = None
 initial_chat_state: Optional[Dict[str, Any]] = None
-chat_sessions: Dict[str, Dict[str, Any]] = {}  # Store chat sessions by session_id
+# Store chat sessions by session_id (bounded, with TTL/LRU eviction)
+chat_sessions: SessionStore = create_session_store(
+    os.getenv('SESSION_STORE', default_session_backend()),
+    path=str(state_dir / "chat_sessions.db"),
+    max_sessions=int(os.getenv('SESSION_MAX_SESSIONS', '1000')),
+    ttl_seconds=float(os.getenv('SESSION_TTL_SECONDS', str(24 * 3600))),
+    max_session_bytes=int(os.getenv('SESSION_MAX_BYTES', str(2 * 1024 * 1024))),
+    max_total_bytes=int(os.getenv('SESSION_MAX_TOTAL_BYTES', str(256 * 1024 * 1024)))
+)
+# Full query results behind a result_id; responses only carry the first page
+RESULT_PAGE_SIZE = int(os.getenv('RESULT_PAGE_SIZE', '100'))
+# Rows kept of one query result; responses report "truncated" when a query returned more
+RESULT_ROW_LIMIT = int(os.getenv('RESULT_ROW_LIMIT', '10000'))
+result_store: ResultStore = create_result_store(
+    os.getenv('RESULT_STORE', default_session_backend()),
+    path=str(state_dir / "results.db"),
+    ttl_seconds=float(os.getenv('RESULT_TTL_SECONDS', '3600')),
+    max_rows=int(os.getenv('RESULT_MAX_ROWS', '200000'))
+)
+
+chat_single_flight = SingleFlight()
 
-app = FastAPI(title="SQL BigBrother API", version="1.0.0")
+# Load shedding for LLM-bound work: excess requests get 429/503 with Retry-After
+sql_admission = AdmissionController(
+    "sql",
+    max_in_flight=int(os.getenv('SQL_MAX_IN_FLIGHT', str(LLM_POOL_SIZE))),
+    max_queue=int(os.getenv('SQL_MAX_QUEUE', '32')),
+    queue_timeout=float(os.getenv('SQL_QUEUE_TIMEOUT', '30'))
+)
+schema_admission = AdmissionController(
+    "schema",
+    max_in_flight=int(os.getenv('SCHEMA_MAX_IN_FLIGHT', '2')),
+    max_queue=int(os.getenv('SCHEMA_MAX_QUEUE', '8')),
+    queue_timeout=float(os.getenv('SCHEMA_QUEUE_TIMEOUT', '60'))
+)
+# Upper bound for the per-batch generation concurrency of /ask-chat/batch
+BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', str(LLM_POOL_SIZE)))
+
+# Background jobs for schema extraction/analysis that outlive a single HTTP request
+job_manager = JobManager(
+    JobStore(str(state_dir / "jobs.db"), ttl_seconds=float(os.getenv('JOB_TTL_SECONDS', str(7 * 24 * 3600)))),
+    max_workers=int(os.getenv('JOB_MAX_WORKERS', '2')),
+    max_queued=int(os.getenv('JOB_MAX_QUEUED', '32'))
+)
+
+startup_state = StartupState(on_change=lambda: publish_state())
+_startup_task: Optional[asyncio.Task] = None
+_sync_task: Optional[asyncio.Task] = None
+_publish_task: Optional[asyncio.Task] = None
+_pending_publish: Optional[Dict[str, Any]] = None
+
+# Cross-worker state: one elected worker runs startup, every worker mirrors its results
+SHARED_STATE_POLL_SECONDS = float(os.getenv('SHARED_STATE_POLL_SECONDS', '1.0'))
+shared_state = SharedState(str(state_dir / "shared_state.db"))
+startup_leader = StartupLeader(str(state_dir / "startup.lock"))
+
+app = FastAPI(title="SQL BigBrother API", version="1.0.0", default_response_class=FastJSONResponse)
 
 # CORS configuration
 origins = [
@@ -41,63 +122,214 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# gzip/brotli for large JSON bodies, negotiated from Accept-Encoding
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv('COMPRESSION_MIN_BYTES', '1024')))
 
 
 class KedroSessionManager:
-    """Manage Kedro sessions for API endpoints."""
-    
+    """Manage a long-lived Kedro context for API endpoints.
+
+    The Kedro session and context are created once (at startup) and reused by
+    every request. Node names are resolved up front into a dispatch table, so a
+    request only pays for a dictionary lookup instead of a fresh
+    ``KedroSession.create`` and config load.
+    """
+
+    _session: Optional[KedroSession] = None
+    _context = None
+    _dispatch: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def warm_up(cls):
+        """Create the shared Kedro session, context and node dispatch table.
+
+        Safe to call repeatedly; only the first call does any work.
+
+        Returns:
+            The loaded Kedro context
+        """
+        if cls._context is not None:
+            return cls._context
+
+        with cls._lock:
+            if cls._context is None:
+                started = time.perf_counter()
+                session = KedroSession.create(project_path=project_path)
+                context = session.load_context()
+                cls._dispatch = cls._build_dispatch()
+                cls._session = session
+                cls._context = context
+                logger.info(f"Kedro context warmed up in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return cls._context
+
     @staticmethod
-    def run_pipeline_node(node_name: str, inputs: Dict[str, Any] = None) -> Dict[str, Any]:
+    def _build_dispatch() -> Dict[str, Callable[[Dict[str, Any]], Any]]:
+        """Resolve the named nodes to callables taking the API inputs dict."""
+        from sql_bigbrother.pipelines.sql_processing import nodes
+
+        return {
+            "discover_local_databases_node": lambda inputs: nodes.discover_local_databases(
+                inputs.get("database_config")
+            ),
+            "initialize_schema_processing_node": lambda inputs: nodes.initialize_schema_processing(
+                inputs.get("schema_content")
+            ),
+            "process_sql_query_node": lambda inputs: nodes.process_sql_query(
+                requirement=inputs.get("requirement"),
+                schema=inputs.get("schema"),
+                model=inputs.get("model"),
+                is_explain=inputs.get("is_explain", False),
+                chat_history=inputs.get("chat_history", []),
+                execute_query=inputs.get("execute_query", False),
+                pager=inputs.get("pager")
+            ),
+            "auto_create_schema_node": lambda inputs: nodes.auto_create_schema(
+                discovered_databases=inputs.get("discovered_databases"),
+                db_index=inputs.get("db_index", 0)
+            ),
+        }
+
+    @classmethod
+    def resolve(cls, node_name: str) -> Callable[[Dict[str, Any]], Any]:
+        """Look up the callable registered for ``node_name``."""
+        cls.warm_up()
+        handler = cls._dispatch.get(node_name)
+        if handler is None:
+            raise ValueError(f"Unknown node: {node_name}")
+        return handler
+
+    @classmethod
+    def run_pipeline_node(cls, node_name: str, inputs: Dict[str, Any] = None) -> Dict[str, Any]:
         """Run a specific Kedro node with given inputs."""
         if inputs is None:
             inputs = {}
-            
-        with KedroSession.create(project_path=project_path) as session:
-            try:
-                # Run the pipeline
-                if node_name == "discover_local_databases_node":
-                    from sql_bigbrother.pipelines.sql_processing.nodes import discover_local_databases
-                    result = discover_local_databases(inputs.get("database_config"))
-                elif node_name == "initialize_schema_processing_node":
-                    from sql_bigbrother.pipelines.sql_processing.nodes import initialize_schema_processing
-                    result = initialize_schema_processing(inputs.get("schema_content"))
-                elif node_name == "process_sql_query_node":
-                    from sql_bigbrother.pipelines.sql_processing.nodes import process_sql_query
-                    result = process_sql_query(
-                        requirement=inputs.get("requirement"),
-                        schema=inputs.get("schema"), 
-                        model=inputs.get("model"),
-                        is_explain=inputs.get("is_explain", False),
-                        chat_history=inputs.get("chat_history", []),
-                        execute_query=inputs.get("execute_query", False)
-                    )
-                elif node_name == "auto_create_schema_node":
-                    from sql_bigbrother.pipelines.sql_processing.nodes import auto_create_schema
-                    result = auto_create_schema(
-                        discovered_databases=inputs.get("discovered_databases"),
-                        db_index=inputs.get("db_index", 0)
-                    )
-                else:
-                    raise ValueError(f"Unknown node: {node_name}")
-                    
-                return result
-                
-            except Exception as e:
-                logger.error(f"Error running Kedro node {node_name}: {str(e)}")
-                raise HTTPException(status_code=500, detail=str(e))
+
+        try:
+            return cls.resolve(node_name)(inputs)
+        except Exception as e:
+            logger.error(f"Error running Kedro node {node_name}: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @classmethod
+    def close(cls) -> None:
+        """Close the shared Kedro session."""
+        with cls._lock:
+            if cls._session is not None:
+                cls._session.close()
+            cls._session = None
+            cls._context = None
+            cls._dispatch = {}
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Run database discovery on startup and auto-initialize chat."""
+    """Start database discovery and chat auto-initialization in the background.
+
+    Uvicorn starts accepting traffic immediately; progress is tracked in
+    ``startup_state`` and reported by ``/chat/init`` and ``/databases``.
+    """
+    global _startup_task, _sync_task
+    model_registry.start()
+    # Load the default model(s) now rather than on the first question
+    if model_lifecycle is not None:
+        model_lifecycle.start(model_registry.installed_default, model_registry.models)
+    orphaned = job_manager.store.fail_orphans()
+    if orphaned:
+        logger.warning(f"Marked {orphaned} job(s) interrupted by the last shutdown as failed")
+    if startup_leader.try_acquire():
+        # State left by an earlier run of the server must not be mirrored as current,
+        # but a worker restarted after the leader died picks up where it stopped
+        _, resumed = await db_pool.run(shared_state.begin_run, supervisor_id())
+        if resumed:
+            values, _ = await db_pool.run(shared_state.read_since, 0.0)
+            apply_shared_state(values)
+        if startup_state.ready:
+            logger.info("Startup already completed by the previous leader")
+        else:
+            _startup_task = asyncio.create_task(run_startup_stages())
+    else:
+        logger.info("Another worker is running startup; mirroring its shared state")
+        await db_pool.run(KedroSessionManager.warm_up)
+    _sync_task = asyncio.create_task(sync_shared_state())
+
+
+def publish_state() -> None:
+    """Share discovery results, chat state and startup progress with the other workers.
+
+    Called on the event loop; the write runs on ``db_pool``. Changes made while
+    a write is in flight are coalesced, so the latest state is always written last.
+    """
+    global _pending_publish, _publish_task
+    _pending_publish = {
+        "discovered_databases": discovered_databases,
+        "initial_chat_state": initial_chat_state,
+        "startup_state": startup_state.snapshot(),
+        "startup_schema": startup_state.schema_content
+    }
+    if _publish_task is None or _publish_task.done():
+        _publish_task = asyncio.get_running_loop().create_task(_write_published_state())
+
+
+async def _write_published_state() -> None:
+    global _pending_publish
+    while _pending_publish is not None:
+        values, _pending_publish = _pending_publish, None
+        try:
+            await db_pool.run(shared_state.publish, values)
+        except Exception as e:
+            logger.warning(f"Could not publish shared state: {str(e)}")
+
+
+def apply_shared_state(values: Dict[str, Any]) -> None:
+    """Mirror values published by another worker."""
+    global discovered_databases, initial_chat_state
+    if "discovered_databases" in values:
+        discovered_databases = values["discovered_databases"]
+    if "initial_chat_state" in values:
+        initial_chat_state = values["initial_chat_state"]
+    if values.get("startup_state"):
+        startup_state.load_snapshot(values["startup_state"], values.get("startup_schema"))
+
+
+async def sync_shared_state():
+    """Mirror state published by other workers; take over startup if its leader died."""
+    global _startup_task
+    last_update = 0.0
+    while True:
+        await asyncio.sleep(SHARED_STATE_POLL_SECONDS)
+        try:
+            values, last_update = await db_pool.run(shared_state.read_since, last_update)
+        except Exception as e:
+            logger.warning(f"Could not read shared state: {str(e)}")
+            continue
+        apply_shared_state(values)
+
+        if not startup_state.ready and _startup_task is None and startup_leader.try_acquire():
+            logger.info("Startup leader went away; resuming startup")
+            _startup_task = asyncio.create_task(run_startup_stages())
+
+
+async def run_startup_stages():
+    """Discover databases, extract a schema and generate the introduction.
+
+    Discovery and extraction are skipped when a previous leader already
+    published their results, so a replacement leader resumes where it stopped.
+    """
     global discovered_databases, initial_chat_state
     try:
-        logger.info("Starting database discovery...")
-        discovered_databases = KedroSessionManager.run_pipeline_node(
-            "discover_local_databases_node",
-            {}
-        )
-        logger.info(f"Database discovery completed: {discovered_databases.get('summary')}")
+        await db_pool.run(KedroSessionManager.warm_up)
+        if discovered_databases is None:
+            startup_state.advance(StartupStage.DISCOVERING, "Discovering local databases")
+            logger.info("Starting database discovery...")
+            discovered_databases = await db_pool.run(
+                KedroSessionManager.run_pipeline_node,
+                "discover_local_databases_node",
+                {}
+            )
+            logger.info(f"Database discovery completed: {discovered_databases.get('summary')}")
+        else:
+            logger.info("Resuming startup with the databases discovered by the previous leader")
         
         # Auto-initialize chat with first discovered database
         # Prioritize: MySQL > PostgreSQL > SQLite
@@ -120,31 +352,35 @@ async def startup_event():
         if target_db:
             logger.info("Auto-initializing chat with discovered database...")
             try:
-                from sql_bigbrother.pipelines.sql_processing.nodes import extract_schema_from_database, initialize_schema_processing, generate_introduction
+                from sql_bigbrother.pipelines.sql_processing.nodes import extract_schema_from_database, initialize_schema_with_introduction
                 
                 first_db, db_type = target_db
-                
-                # Extract schema based on database type
-                if db_type == "mysql":
-                    # For MySQL, use default connection to ecommerce_db
-                    connection_params = {
-                        "host": "localhost",
-                        "user": "root",
-                        "password": "",
-                        "database": "ecommerce_db"
-                    }
-                elif db_type == "sqlite":
-                    connection_params = {"path": first_db.get("path")}
-                else:
-                    connection_params = {}
-                
-                schema_content = extract_schema_from_database(db_type, connection_params)
+                schema_content = startup_state.schema_content
+                if not schema_content:
+                    startup_state.advance(StartupStage.EXTRACTING, f"Extracting schema from {db_type} database")
+
+                    # Extract schema based on database type
+                    if db_type == "mysql":
+                        # For MySQL, use default connection to ecommerce_db
+                        connection_params = {
+                            "host": "localhost",
+                            "user": "root",
+                            "password": "",
+                            "database": "ecommerce_db"
+                        }
+                    elif db_type == "sqlite":
+                        connection_params = {"path": first_db.get("path")}
+                    else:
+                        connection_params = {}
+
+                    schema_content = await db_pool.run(extract_schema_from_database, db_type, connection_params)
+                    # Chat requests can use the schema from here on
+                    startup_state.schema_content = schema_content
                 
                 # Process schema
-                schema_result = initialize_schema_processing(schema_content)
-                
-                # Generate introduction
-                initial_chat_state = generate_introduction(schema_result, discovered_databases)
+                startup_state.advance(StartupStage.SUMMARIZING, "Generating title, recommendations and introduction")
+                # The introduction starts as soon as the title is ready, alongside the recommendations
+                initial_chat_state = await llm_pool.run(initialize_schema_with_introduction, schema_content, discovered_databases)
                 
                 logger.info(f"Chat auto-initialized with {db_type} database")
             except Exception as e:
@@ -154,6 +390,8 @@ async def startup_event():
                     "introduction": "Welcome! I've discovered several databases on your system. You can upload a schema or ask me to analyze a discovered database.",
                     "discovered_databases": discovered_databases
                 }
+                if startup_state.schema_content:
+                    initial_chat_state["sql_content"] = startup_state.schema_content
         else:
             logger.info("No SQLite databases found for auto-initialization")
             initial_chat_state = {
@@ -161,6 +399,8 @@ async def startup_event():
                 "introduction": f"Welcome! I've discovered {len(databases)} database(s) on your system. Upload a schema file to get started, or provide connection details for PostgreSQL/MySQL databases.",
                 "discovered_databases": discovered_databases
             }
+
+        startup_state.advance(StartupStage.READY, "Ready")
             
     except Exception as e:
         logger.error(f"Database discovery failed: {str(e)}")
@@ -174,6 +414,14 @@ async def startup_event():
             "introduction": "Welcome! Please upload a SQL schema file to get started.",
             "error": str(e)
         }
+        startup_state.fail(str(e))
+
+
+def default_schema() -> str:
+    """Return the auto-loaded schema, available as soon as startup extracted it."""
+    if initial_chat_state and initial_chat_state.get('sql_content'):
+        return initial_chat_state['sql_content']
+    return startup_state.schema_content or ""
 
 
 @app.get('/')
@@ -182,7 +430,8 @@ async def root() -> Dict[str, str]:
     return {
         "data": 'SQL BigBrother FastAPI with Kedro',
         "databases_discovered": len(discovered_databases.get("databases", [])) if discovered_databases else 0,
-        "chat_initialized": initial_chat_state is not None
+        "chat_initialized": initial_chat_state is not None,
+        "startup_stage": startup_state.stage.value
     }
 
 
@@ -190,21 +439,43 @@ async def root() -> Dict[str, str]:
 async def get_initial_chat_state() -> Dict[str, Any]:
     """Get the initial chat state with auto-generated introduction.
     
+    While startup is still running, a placeholder state with the current
+    stage and progress is returned instead (including the schema once it has
+    been extracted), so clients can poll until ``ready`` is true.
+
     Returns:
         Dictionary containing the introduction, schema, and discovered databases
     """
     if initial_chat_state is None:
-        raise HTTPException(status_code=503, detail="Chat initialization not yet completed")
+        return {
+            "title": "SQL BigBrother",
+            "introduction": f"Getting things ready: {startup_state.message}...",
+            "sql_content": startup_state.schema_content or "",
+            "recommends": [],
+            "discovered_databases": discovered_databases,
+            "ready": False,
+            "startup": startup_state.snapshot()
+        }
     
-    return initial_chat_state
+    return FastJSONResponse({**initial_chat_state, "ready": True, "startup": startup_state.snapshot()})
+
+
+@app.get('/models')
+async def get_models() -> Dict[str, Any]:
+    """Get the cached list of installed Ollama models, the default model and each model's load state."""
+    return model_registry.stats()
 
 
 @app.get('/databases')
 async def get_discovered_databases() -> Dict[str, Any]:
-    """Get list of discovered local databases."""
+    """Get list of discovered local databases, or startup progress while discovery runs."""
     if discovered_databases is None:
-        raise HTTPException(status_code=503, detail="Database discovery not yet completed")
-    return discovered_databases
+        return {
+            "databases": [],
+            "summary": "Discovery in progress",
+            "startup": startup_state.snapshot()
+        }
+    return FastJSONResponse(discovered_databases)
 
 
 @app.post('/databases/rediscover')
@@ -213,136 +484,302 @@ async def rediscover_databases() -> Dict[str, Any]:
     global discovered_databases
     try:
         logger.info("Manual database rediscovery triggered...")
-        discovered_databases = KedroSessionManager.run_pipeline_node(
+        discovered_databases = await db_pool.run(
+            KedroSessionManager.run_pipeline_node,
             "discover_local_databases_node",
             {}
         )
+        publish_state()
         return discovered_databases
     except Exception as e:
         logger.error(f"Database rediscovery failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def prepare_chat_session(question: str, schema: str, session_id: Optional[str]) -> Tuple[str, str, List[Dict[str, str]]]:
+    """Create or update the chat session and record the incoming question.
+    
+    Args:
+        question: The user's question
+        schema: Schema sent with the request (may be empty)
+        session_id: Existing session ID, or None to start a new session
+        
+    Returns:
+        Tuple of (session_id, effective schema, chat history for context excluding the current question)
+    """
+    # Generate session_id if not provided
+    if not session_id:
+        import uuid
+        session_id = str(uuid.uuid4())
+        logger.info(f"Generated new session_id: {session_id}")
+    
+    # Initialize session if doesn't exist
+    session = chat_sessions.get(session_id)
+    if session is None:
+        # If no schema provided, fall back to the auto-loaded schema (if startup extracted one)
+        if not schema and default_schema():
+            schema = default_schema()
+            logger.info(f"Using initial chat state schema ({len(schema)} chars)")
+        
+        chat_sessions.create(session_id, schema)
+        logger.info(f"Created new chat session: {session_id}")
+    else:
+        # If schema is empty but session has schema, use session's schema
+        if not schema and session.get("schema"):
+            schema = session["schema"]
+            logger.info(f"Using session schema ({len(schema)} chars)")
+        # Update session schema if a new one is provided
+        elif schema and len(schema) > len(session.get("schema", "")):
+            chat_sessions.set_schema(session_id, schema)
+            logger.info(f"Updated session schema ({len(schema)} chars)")
+    
+    # Add question to history
+    chat_sessions.append(session_id, {
+        "type": "question",
+        "content": question,
+        "timestamp": datetime.now().isoformat()
+    })
+    
+    # Build chat history for context (convert to simpler format)
+    chat_history = []
+    for item in chat_sessions.get(session_id)["history"][-10:]:  # Last 5 exchanges (10 messages)
+        if item["type"] == "question":
+            chat_history.append({"role": "user", "content": item["content"]})
+        elif item["type"] == "response":
+            # Extract the explanation or query as assistant response
+            content = item["content"]
+            if isinstance(content, dict):
+                response_text = content.get("explain", "") or content.get("query", "")
+            else:
+                response_text = str(content)
+            chat_history.append({"role": "assistant", "content": response_text})
+    
+    # Warn if schema is empty
+    if not schema or len(schema.strip()) == 0:
+        logger.warning("Schema is empty for query processing - query quality may be poor")
+    
+    return session_id, schema, chat_history[:-1]  # Exclude current question
+
+
+def record_chat_response(session_id: str, result: Dict[str, Any]) -> int:
+    """Append a response to the session history and return the new history length.
+    
+    The store keeps a compacted copy (row preview and digest), so ``result``
+    itself is left untouched for the response.
+    """
+    try:
+        return chat_sessions.append(session_id, {
+            "type": "response",
+            "content": result,
+            "timestamp": datetime.now().isoformat()
+        })
+    except KeyError:
+        logger.warning(f"Chat session {session_id} was evicted before its response was recorded")
+        return 0
+
+
+def result_pager(page_size: int) -> ResultPager:
+    """Page executed query rows into the result store, keeping ``page_size`` rows inline."""
+    return ResultPager(result_store, page_size, RESULT_ROW_LIMIT)
+
+
 @app.post('/ask-chat')
 async def ask_chat(
     question: str = Form(...), 
     schema: str = Form(""), 
     model: str = Form("qwen2.5:7b"),
-    session_id: str = Form(None)
+    session_id: str = Form(None),
+    page_size: int = Form(None)
 ) -> Dict[str, Any]:
     """Process SQL query using Kedro pipeline with session management."""
     try:
         logger.info(f"Received request - question: {question[:50]}..., schema length: {len(schema)}, model: {model}, session_id: {session_id}")
         
-        # Generate session_id if not provided
-        if not session_id:
-            import uuid
-            session_id = str(uuid.uuid4())
-            logger.info(f"Generated new session_id: {session_id}")
-        
-        # Initialize session if doesn't exist
-        if session_id not in chat_sessions:
-            # If no schema provided and we have initial_chat_state, use that schema
-            if not schema and initial_chat_state and initial_chat_state.get('sql_content'):
-                schema = initial_chat_state.get('sql_content')
-                logger.info(f"Using initial chat state schema ({len(schema)} chars)")
-            
-            chat_sessions[session_id] = {
+        # Shed load before the question enters the session history, which must not keep
+        # questions never answered. Coalesced duplicates hold their slot while they wait
+        admitted_at = await sql_admission.acquire()
+        try:
+            session_id, schema, chat_history = await db_pool.run(prepare_chat_session, question, schema, session_id)
+
+            # Always execute queries by default
+            should_execute = True
+
+            inputs = {
+                "requirement": question,
                 "schema": schema,
-                "history": [],
-                "created_at": datetime.now().isoformat()
+                "model": model,
+                "is_explain": False,
+                "chat_history": chat_history,
+                "execute_query": should_execute
             }
-            logger.info(f"Created new chat session: {session_id}")
-        else:
-            # If schema is empty but session has schema, use session's schema
-            if not schema and chat_sessions[session_id].get("schema"):
-                schema = chat_sessions[session_id]["schema"]
-                logger.info(f"Using session schema ({len(schema)} chars)")
-            # Update session schema if a new one is provided
-            elif schema and len(schema) > len(chat_sessions[session_id].get("schema", "")):
-                chat_sessions[session_id]["schema"] = schema
-                logger.info(f"Updated session schema ({len(schema)} chars)")
-        
-        # Add question to history
-        chat_sessions[session_id]["history"].append({
-            "type": "question",
-            "content": question,
-            "timestamp": datetime.now().isoformat()
-        })
-        
-        # Build chat history for context (convert to simpler format)
-        chat_history = []
-        for item in chat_sessions[session_id]["history"][-10:]:  # Last 5 exchanges (10 messages)
-            if item["type"] == "question":
-                chat_history.append({"role": "user", "content": item["content"]})
-            elif item["type"] == "response":
-                # Extract the explanation or query as assistant response
-                content = item["content"]
-                if isinstance(content, dict):
-                    response_text = content.get("explain", "") or content.get("query", "")
-                else:
-                    response_text = str(content)
-                chat_history.append({"role": "assistant", "content": response_text})
-        
-        # Always execute queries by default
-        should_execute = True
-        
-        # Warn if schema is empty
-        if not schema or len(schema.strip()) == 0:
-            logger.warning("Schema is empty for query processing - query quality may be poor")
-        
-        inputs = {
-            "requirement": question,
-            "schema": schema,
-            "model": model,
-            "is_explain": False,
-            "chat_history": chat_history[:-1],  # Exclude current question
-            "execute_query": should_execute
-        }
-        
-        result = KedroSessionManager.run_pipeline_node("process_sql_query_node", inputs)
+
+            page_size = page_size or RESULT_PAGE_SIZE
+            # Rows go to the result store as they are fetched; the response carries the first page
+            inputs["pager"] = result_pager(page_size)
+
+            async def answer() -> Dict[str, Any]:
+                result = await llm_pool.run(KedroSessionManager.run_pipeline_node, "process_sql_query_node", inputs)
+                return {"total_rows": len(result.get("rows") or []), **result}
+
+            # Identical concurrent questions share one generation and execution
+            key = f"{chat_request_key(question, schema, model, chat_history)}|{page_size}"
+            result = {**await chat_single_flight.run(key, answer)}
+        finally:
+            sql_admission.release(admitted_at)
         
         # Add result to history
-        chat_sessions[session_id]["history"].append({
-            "type": "response",
-            "content": result,
-            "timestamp": datetime.now().isoformat()
-        })
+        history_length = await db_pool.run(record_chat_response, session_id, result)
         
         # Include session info and discovered databases in the response
         result["session_id"] = session_id
-        result["history_length"] = len(chat_sessions[session_id]["history"])
+        result["history_length"] = history_length
         if discovered_databases:
             result["available_databases"] = discovered_databases.get("databases", [])
         
-        return result
+        return FastJSONResponse(result)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in ask_chat: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get('/chat/{session_id}/history')
-async def get_chat_history(session_id: str) -> Dict[str, Any]:
-    """Get chat history for a specific session.
+def _sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {dumps_json(data).decode('utf-8')}\n\n"
+
+
+@app.post('/ask-chat/stream')
+async def ask_chat_stream(
+    question: str = Form(...), 
+    schema: str = Form(""), 
+    model: str = Form("qwen2.5:7b"),
+    session_id: str = Form(None),
+    chunk_size: int = Form(500)
+) -> StreamingResponse:
+    """Stream a SQL answer as Server-Sent Events.
+    
+    Events are emitted in this order: ``session``, ``token`` (one per LLM
+    token), ``sql`` (the extracted query), ``columns``, ``rows`` (chunks of
+    ``chunk_size`` rows as they are fetched), optionally ``error``, and
+    finally ``done``.
+    """
+    from sql_bigbrother.pipelines.sql_processing.nodes import remember_streamed_sql, stream_sql_generation, stream_query_rows
+    
+    logger.info(f"Received streaming request - question: {question[:50]}..., schema length: {len(schema)}, model: {model}, session_id: {session_id}")
+    # Shed load before the stream starts, while a 429/503 can still be returned, and before
+    # the question enters the session history, which must not keep questions never answered
+    admitted_at = await sql_admission.acquire()
+    try:
+        session_id, schema, chat_history = await db_pool.run(prepare_chat_session, question, schema, session_id)
+    except BaseException:
+        sql_admission.release(admitted_at)
+        raise
+    
+    async def event_stream():
+        result = {'query': '', 'explain': '', 'rows': [], 'columns': [], 'executed': False}
+        # The client gets every row; the server keeps the first page and stores the rest
+        writer: Optional[ResultWriter] = None
+        yield _sse("session", {"session_id": session_id})
+        try:
+            sql = ""
+            async for event in llm_pool.stream(stream_sql_generation, question, schema, model, chat_history):
+                if event["event"] == "sql":
+                    sql = event["data"].pop("sql")
+                    result.update(event["data"])
+                yield _sse(event["event"], event["data"])
+            
+            async for event in db_pool.stream(stream_query_rows, schema, sql, chunk_size, RESULT_ROW_LIMIT):
+                name, data = event["event"], event["data"]
+                if name == "columns":
+                    writer = result_pager(RESULT_PAGE_SIZE).writer(data)
+                elif name == "rows" and writer is not None:
+                    await db_pool.run(writer.add, data)
+                elif name == "error":
+                    result["error"] = data["error"]
+                elif name == "done":
+                    result["executed"] = data["executed"]
+                    if writer is not None:
+                        writer.truncated = writer.truncated or data.get("truncated", False)
+                        result.update(writer.finish())
+                        data = {**data, "row_limit": RESULT_ROW_LIMIT}
+                        if "result_id" in result:
+                            data["result_id"] = result["result_id"]
+                yield _sse(name, data)
+            
+            if result["executed"]:
+                await db_pool.run(remember_streamed_sql, question, schema, model, chat_history, sql, result)
+        except Exception as e:
+            logger.error(f"Error in ask_chat_stream: {str(e)}")
+            result["error"] = str(e)
+            yield _sse("error", {"error": str(e)})
+            yield _sse("done", {"executed": False})
+        finally:
+            sql_admission.release(admitted_at)
+            # Not awaited: a client that disconnected cancels the stream, and the answer is still recorded
+            db_pool.submit(record_chat_response, session_id, result)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get('/results/{result_id}/rows')
+async def get_result_rows(result_id: str, cursor: str = "", limit: int = RESULT_PAGE_SIZE) -> Dict[str, Any]:
+    """Get a page of rows from a stored query result.
     
     Args:
-        session_id: The chat session ID
+        result_id: Handle returned with the query result
+        cursor: ``next_cursor`` from the previous page (empty for the first page)
+        limit: Maximum number of rows to return
         
     Returns:
-        Dictionary containing chat history
+        Dictionary with ``columns``, ``rows``, ``next_cursor`` (None on the last page) and ``total_rows``
     """
-    global chat_sessions
+    if limit < 1 or limit > 10000:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 10000")
+    try:
+        page = await db_pool.run(result_store.paginate, result_id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page is None:
+        raise HTTPException(status_code=404, detail="Result not found or expired")
+    return FastJSONResponse(page)
+
+
+async def history_since(session_id: str, since: Optional[str]) -> Dict[str, Any]:
+    """Return the history entries after the ``since`` cursor.
     
-    if session_id not in chat_sessions:
+    Returns:
+        Dictionary with ``history``, ``message_count``, ``created_at`` and the
+        ``cursor`` to pass as ``since`` next time
+    """
+    try:
+        last_seq = decode_cursor(since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    found = await db_pool.run(chat_sessions.history_since, session_id, last_seq)
+    if found is None:
         raise HTTPException(status_code=404, detail="Session not found")
+    found["cursor"] = encode_cursor(found.pop("last_seq"))
+    return found
+
+
+@app.get('/chat/{session_id}/history')
+async def get_chat_history(session_id: str, since: Optional[str] = None) -> Dict[str, Any]:
+    """Get chat history for a specific session.
     
-    return {
-        "session_id": session_id,
-        "history": chat_sessions[session_id]["history"],
-        "created_at": chat_sessions[session_id]["created_at"],
-        "message_count": len(chat_sessions[session_id]["history"])
-    }
+    Args:
+        session_id: The chat session ID
+        since: Cursor from a previous response; only newer entries are returned
+        
+    Returns:
+        Dictionary containing chat history and the cursor for the next call
+    """
+    return FastJSONResponse({"session_id": session_id, **await history_since(session_id, since)})
 
 
 @app.delete('/chat/{session_id}')
@@ -355,15 +792,100 @@ async def clear_chat_session(session_id: str) -> Dict[str, str]:
     Returns:
         Success message
     """
-    global chat_sessions
-    
-    if session_id in chat_sessions:
-        del chat_sessions[session_id]
+    await db_pool.run(chat_sessions.delete, session_id)
     
     return {"message": f"Session {session_id} cleared successfully"}
 
 
 
+@app.post('/ask-chat/batch')
+async def ask_chat_batch(
+    questions: List[str] = Form(...),
+    schema: str = Form(""),
+    model: str = Form("qwen2.5:7b"),
+    concurrency: int = Form(2),
+    execute_query: bool = Form(True),
+    page_size: int = Form(None)
+) -> StreamingResponse:
+    """Answer a list of questions against one schema, streaming results as Server-Sent Events.
+    
+    The schema is prepared once for the whole batch (schema filtering,
+    agents, database setup and a connection pool), then up to
+    ``concurrency`` questions are generated and executed at a time, each
+    taking its own ``sql_admission`` slot. Events:
+    ``batch`` (question count), one ``result`` per question in completion
+    order (carrying its ``index`` in the request), and ``done``.
+    """
+    from sql_bigbrother.pipelines.sql_processing.nodes import prepare_sql_batch, process_sql_batch_question, close_sql_batch
+    
+    questions = [question for question in questions if question.strip()]
+    if not questions:
+        raise HTTPException(status_code=400, detail="No questions provided")
+    schema = schema or default_schema()
+    concurrency = max(1, min(concurrency, BATCH_MAX_CONCURRENCY))
+    page_size = page_size or RESULT_PAGE_SIZE
+    logger.info(f"Received batch request - {len(questions)} questions, schema length: {len(schema)}, model: {model}, concurrency: {concurrency}")
+    
+    # Every question is admitted like a single /ask-chat request. The first slot is taken
+    # up front so an overloaded server rejects the batch before it starts streaming
+    reserved = [await sql_admission.acquire()]
+    
+    async def answer(batch: Dict[str, Any], index: int, question: str, slots: asyncio.Semaphore) -> Dict[str, Any]:
+        async with slots:
+            try:
+                admitted_at = reserved.pop() if reserved else await sql_admission.acquire()
+                try:
+                    result = await llm_pool.run(process_sql_batch_question, batch, question)
+                    result = {"total_rows": len(result.get("rows") or []), **result}
+                finally:
+                    sql_admission.release(admitted_at)
+            except Exception as e:
+                logger.error(f"Error in ask_chat_batch question {index}: {str(e)}")
+                result = {'query': '', 'explain': '', 'rows': [], 'columns': [], 'error': str(e), 'executed': False}
+        return {"index": index, "question": question, **result}
+    
+    async def event_stream():
+        batch = None
+        pending = []
+        started = time.perf_counter()
+        failed = 0
+        try:
+            yield _sse("batch", {"questions": len(questions), "concurrency": concurrency})
+            batch = await db_pool.run(prepare_sql_batch, schema, model, execute_query, concurrency, result_pager(page_size))
+            slots = asyncio.Semaphore(concurrency)
+            pending = [asyncio.ensure_future(answer(batch, i, q, slots)) for i, q in enumerate(questions)]
+            for next_done in asyncio.as_completed(pending):
+                result = await next_done
+                failed += 1 if result.get("error") else 0
+                yield _sse("result", result)
+            yield _sse("done", {
+                "questions": len(questions),
+                "failed": failed,
+                "elapsed_s": round(time.perf_counter() - started, 2)
+            })
+        except Exception as e:
+            logger.error(f"Error in ask_chat_batch: {str(e)}")
+            yield _sse("error", {"error": str(e)})
+            yield _sse("done", {"questions": len(questions), "failed": len(questions)})
+        finally:
+            # A client that disconnects stops questions that have not started yet
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            if batch is not None:
+                await db_pool.run(close_sql_batch, batch)
+            # The up-front slot is still held when no question got to use it
+            for admitted_at in reserved:
+                sql_admission.release(admitted_at)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post('/init-chat')
 async def initialize_chat(file: UploadFile = File(...)) -> Dict[str, Any]:
     """Initialize chat by processing SQL schema file using Kedro pipeline."""
@@ -375,7 +897,8 @@ async def initialize_chat(file: UploadFile = File(...)) -> Dict[str, Any]:
         schema_content = contents.decode('utf-8')
         
         inputs = {"schema_content": schema_content}
-        result = KedroSessionManager.run_pipeline_node("initialize_schema_processing_node", inputs)
+        async with schema_admission.admit():
+            result = await llm_pool.run(KedroSessionManager.run_pipeline_node, "initialize_schema_processing_node", inputs)
         
         # Include discovered databases in the response
         if discovered_databases:
@@ -385,8 +908,10 @@ async def initialize_chat(file: UploadFile = File(...)) -> Dict[str, Any]:
                 "summary": discovered_databases.get("summary", "")
             }
         
-        return result
+        return FastJSONResponse(result)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in initialize_chat: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -418,9 +943,10 @@ async def auto_create_schema_endpoint(db_index: int = Form(0)) -> Dict[str, Any]
             "db_index": db_index
         }
         
-        result = KedroSessionManager.run_pipeline_node("auto_create_schema_node", inputs)
+        async with schema_admission.admit():
+            result = await llm_pool.run(KedroSessionManager.run_pipeline_node, "auto_create_schema_node", inputs)
         
-        return result
+        return FastJSONResponse(result)
         
     except HTTPException:
         raise
@@ -429,6 +955,32 @@ async def auto_create_schema_endpoint(db_index: int = Form(0)) -> Dict[str, Any]
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def build_connection_params(db_type: str, host: str, port: Optional[int], database: str,
+                            username: Optional[str], password: Optional[str], path: Optional[str]) -> Dict[str, Any]:
+    """Build the connection parameters for ``extract_schema_from_database``."""
+    if db_type == "sqlite":
+        if not path:
+            raise HTTPException(status_code=400, detail="SQLite requires 'path' parameter")
+        return {"path": path}
+    elif db_type == "postgresql":
+        return {
+            "host": host,
+            "port": port or 5432,
+            "database": database,
+            "user": username,
+            "password": password
+        }
+    elif db_type == "mysql":
+        return {
+            "host": host,
+            "port": port or 3306,
+            "database": database,
+            "user": username,
+            "password": password
+        }
+    raise HTTPException(status_code=400, detail=f"Unsupported database type: {db_type}")
+
+
 @app.post('/extract-schema')
 async def extract_schema_endpoint(
     db_type: str = Form(...),
@@ -453,41 +1005,18 @@ async def extract_schema_endpoint(
     try:
         from sql_bigbrother.pipelines.sql_processing.nodes import extract_schema_from_database, initialize_schema_processing
         
-        # Prepare connection parameters
-        connection_params = {}
-        
-        if db_type == "sqlite":
-            if not path:
-                raise HTTPException(status_code=400, detail="SQLite requires 'path' parameter")
-            connection_params = {"path": path}
-        elif db_type == "postgresql":
-            connection_params = {
-                "host": host,
-                "port": port or 5432,
-                "database": database,
-                "user": username,
-                "password": password
-            }
-        elif db_type == "mysql":
-            connection_params = {
-                "host": host,
-                "port": port or 3306,
-                "database": database,
-                "user": username,
-                "password": password
-            }
-        else:
-            raise HTTPException(status_code=400, detail=f"Unsupported database type: {db_type}")
+        connection_params = build_connection_params(db_type, host, port, database, username, password, path)
         
         # Extract schema
-        schema_content = extract_schema_from_database(db_type, connection_params)
+        schema_content = await db_pool.run(extract_schema_from_database, db_type, connection_params)
         
         # Process the schema
-        result = initialize_schema_processing(schema_content)
+        async with schema_admission.admit():
+            result = await llm_pool.run(initialize_schema_processing, schema_content)
         result["auto_generated"] = True
         result["database_type"] = db_type
         
-        return result
+        return FastJSONResponse(result)
         
     except HTTPException:
         raise
@@ -496,39 +1025,183 @@ async def extract_schema_endpoint(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post('/schema/tokens')
+async def schema_tokens_endpoint(
+    schema: str = Form(...),
+    models: str = Form(None),
+    exact: bool = Form(False)
+) -> Dict[str, Any]:
+    """Report a schema's prompt size at every verbosity level, in characters and tokens per model.
+    
+    Args:
+        schema: SQL schema content
+        models: Comma-separated model names (default: the default model)
+        exact: Count with each model's tokenizer through Ollama instead of the calibrated estimate
+    """
+    try:
+        from sql_bigbrother.pipelines.sql_processing.nodes import schema_token_report
+        
+        model_names = [name.strip() for name in (models or "").split(",") if name.strip()] or [model_registry.default_model()]
+        return await llm_pool.run(schema_token_report, schema, model_names, exact)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in schema_tokens: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post('/jobs/extract-schema', status_code=202)
+async def submit_extract_schema_job(
+    db_type: str = Form(...),
+    host: str = Form("localhost"),
+    port: int = Form(None),
+    database: str = Form(...),
+    username: str = Form(None),
+    password: str = Form(None),
+    path: str = Form(None)
+) -> Dict[str, Any]:
+    """Start schema extraction and analysis in the background and return a job id.
+    
+    Takes the same parameters as ``/extract-schema``; poll ``/jobs/{job_id}``
+    for progress and the result.
+    """
+    from sql_bigbrother.pipelines.sql_processing.nodes import extract_schema_from_database, initialize_schema_processing
+    
+    connection_params = build_connection_params(db_type, host, port, database, username, password, path)
+    
+    async def run(job: JobContext) -> Dict[str, Any]:
+        job.progress(0.1, "extracting")
+        schema_content = await db_pool.run(extract_schema_from_database, db_type, connection_params)
+        job.progress(0.5, "analyzing")
+        result = await llm_pool.run(initialize_schema_processing, schema_content)
+        result["auto_generated"] = True
+        result["database_type"] = db_type
+        return result
+    
+    # The password is only needed by the running job, never persisted
+    params = {key: value for key, value in connection_params.items() if key != "password"}
+    job_id = job_manager.submit("extract-schema", {"db_type": db_type, **params}, run)
+    return {"job_id": job_id, "status": "queued"}
+
+
+@app.post('/jobs/auto-schema', status_code=202)
+async def submit_auto_schema_job(db_index: int = Form(0)) -> Dict[str, Any]:
+    """Start ``/auto-schema`` for a discovered database in the background and return a job id."""
+    if discovered_databases is None:
+        raise HTTPException(status_code=503, detail="Database discovery not yet completed")
+    if not 0 <= db_index < len(discovered_databases.get("databases", [])):
+        raise HTTPException(status_code=400, detail="Invalid database index")
+    
+    inputs = {"discovered_databases": discovered_databases, "db_index": db_index}
+    
+    async def run(job: JobContext) -> Dict[str, Any]:
+        job.progress(0.1, "extracting and analyzing")
+        return await llm_pool.run(KedroSessionManager.run_pipeline_node, "auto_create_schema_node", inputs)
+    
+    job_id = job_manager.submit("auto-schema", {"db_index": db_index}, run)
+    return {"job_id": job_id, "status": "queued"}
+
+
+@app.get('/jobs')
+async def list_jobs(limit: int = 50) -> Dict[str, Any]:
+    """List recent jobs without their results."""
+    return {"jobs": job_manager.store.list(limit), **job_manager.stats()}
+
+
+@app.get('/jobs/{job_id}')
+async def get_job(job_id: str) -> Dict[str, Any]:
+    """Get the status, progress and (once finished) the result of a job."""
+    job = job_manager.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return FastJSONResponse(job)
+
+
+@app.delete('/jobs/{job_id}')
+async def cancel_job(job_id: str) -> Dict[str, Any]:
+    """Cancel a queued or running job."""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return FastJSONResponse(job)
+
+
 @app.get('/sessions')
 async def get_sessions() -> Dict[str, Any]:
     """Get all active chat sessions."""
-    sessions_summary = {}
-    for session_id, session_data in chat_sessions.items():
-        sessions_summary[session_id] = {
-            "created_at": session_data.get("created_at"),
-            "message_count": len(session_data.get("history", [])),
-            "has_schema": bool(session_data.get("schema"))
-        }
-    return {"sessions": sessions_summary, "total": len(sessions_summary)}
+    sessions_summary = await db_pool.run(chat_sessions.summaries)
+    return {"sessions": sessions_summary, "total": len(sessions_summary), "store": await db_pool.run(chat_sessions.stats)}
 
 
 @app.get('/sessions/{session_id}')
-async def get_session(session_id: str) -> Dict[str, Any]:
-    """Get specific chat session details."""
-    if session_id not in chat_sessions:
+async def get_session(session_id: str, since: Optional[str] = None) -> Dict[str, Any]:
+    """Get specific chat session details.
+    
+    With a ``since`` cursor only the newer history entries are returned and
+    the schema, which the client already has, is left out.
+    """
+    found = await history_since(session_id, since)
+    if since:
+        return FastJSONResponse(found)
+    session = await db_pool.run(chat_sessions.get, session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    return chat_sessions[session_id]
+    return FastJSONResponse({"schema": session["schema"], **found})
 
 
 @app.delete('/sessions/{session_id}')
 async def delete_session(session_id: str) -> Dict[str, str]:
     """Delete a chat session."""
-    if session_id not in chat_sessions:
+    if not await db_pool.run(chat_sessions.delete, session_id):
         raise HTTPException(status_code=404, detail="Session not found")
-    del chat_sessions[session_id]
     return {"message": f"Session {session_id} deleted successfully"}
 
 
     return {"status": "healthy", "service": "SQL BigBrother"}
 
 
+@app.get('/metrics/execution')
+async def get_execution_metrics() -> Dict[str, Any]:
+    """Get queue depth, concurrency and wait-time metrics for the worker pools."""
+    return {
+        **execution_stats(),
+        "coalescing": chat_single_flight.stats(),
+        "admission": {"sql": sql_admission.stats(), "schema": schema_admission.stats()},
+        "schema_cache": schema_cache.stats() if schema_cache else None,
+        "sql_cache": sql_cache.stats() if sql_cache else None,
+        "schema_linking": schema_linker.stats() if schema_linker else None,
+        "tokens": token_counter.stats(),
+        "token_budget": token_budget.stats(),
+        "cascade": sql_cascade.stats() if sql_cascade else None,
+        "artifacts": artifact_store.stats() if artifact_store else None
+    }
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release worker pool threads and the Kedro session on shutdown."""
+    for task in (_startup_task, _sync_task):
+        if task is not None and not task.done():
+            task.cancel()
+    await job_manager.shutdown()
+    model_registry.stop()
+    if model_lifecycle is not None:
+        model_lifecycle.stop()
+    if _publish_task is not None:
+        # Let the last state write finish before its connection is closed
+        await asyncio.gather(_publish_task, return_exceptions=True)
+    startup_leader.release()
+    shared_state.close()
+    shutdown_pools()
+    if artifact_store is not None:
+        artifact_store.close()
+    KedroSessionManager.close()
+    for store in (chat_sessions, result_store, job_manager.store):
+        if hasattr(store, "close"):
+            store.close()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("sql_bigbrother.core.api.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,42 @@
+"""Identify server processes across PID reuse, for state shared between processes."""
+
+import os
+import uuid
+from typing import Optional
+
+
+def process_alive(pid: int) -> bool:
+    """Whether a process with this PID exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def process_started(pid: int) -> Optional[str]:
+    """Return when ``pid`` started (clock ticks since boot), or None where /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/stat") as handle:
+            stat = handle.read()
+    except OSError:
+        return None
+    # The command name (field 2) may contain spaces; start time is field 22
+    return stat.rsplit(")", 1)[1].split()[19]
+
+
+# Identifies this server process. PIDs alone do not: in a container the server
+# is PID 1 again after every restart
+INSTANCE_ID = process_started(os.getpid()) or uuid.uuid4().hex
+
+
+def owner_alive(pid: int, instance: Optional[str]) -> bool:
+    """Whether the process recorded as ``pid``/``instance`` is still running: same PID and same instance."""
+    if pid == os.getpid():
+        return instance == INSTANCE_ID
+    if not process_alive(pid):
+        return False
+    started = process_started(pid)
+    return started is None or started == instance
@@ -0,0 +1,61 @@
+"""Fast JSON response encoding with native handling of database value types."""
+
+import json
+import math
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from sql_bigbrother.pipelines.sql_processing.services.utils import custom_serializer
+
+try:
+    import orjson
+except ImportError:  # optional dependency, see the "fast" extra
+    orjson = None
+
+
+def _finite(value: Any) -> Any:
+    """Replace NaN and infinity with None, as orjson does."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def dumps_json(content: Any) -> bytes:
+    """Serialize ``content`` to UTF-8 JSON bytes.
+
+    Uses orjson when it is installed and the standard library otherwise, or
+    when orjson rejects the content (it only encodes integers of up to 64
+    bits, and BIGINT UNSIGNED columns go beyond that). Both encode NaN and
+    infinity as ``null``.
+    ``Decimal``, ``datetime``, ``date``, ``time``, ``timedelta`` and ``bytes``
+    values are handled by ``custom_serializer``, so query rows can be
+    returned without converting every value up front.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, default=custom_serializer, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(
+        _finite(content),
+        default=lambda value: _finite(custom_serializer(value)),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` rendered with ``dumps_json``.
+
+    Returning an instance directly from an endpoint also skips FastAPI's
+    ``jsonable_encoder`` pass over the content.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
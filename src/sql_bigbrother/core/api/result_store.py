@@ -0,0 +1,330 @@
+"""Query result handles for cursor-based pagination of result rows."""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(offset: int) -> str:
+    """Encode a row offset as an opaque cursor string."""
+    return format(offset, "x")
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    """Decode a cursor produced by ``encode_cursor``; empty means the first row."""
+    if not cursor:
+        return 0
+    try:
+        offset = int(cursor, 16)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if offset < 0:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return offset
+
+
+class ResultStore(ABC):
+    """Interface for storing full query results behind a ``result_id``.
+
+    Results expire ``ttl_seconds`` after they were stored or last paged; when
+    more than ``max_rows`` rows are held in total, the least recently used
+    results are dropped.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_rows: int = 200_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self._lock = threading.RLock()
+
+    @abstractmethod
+    def create(self, columns: List[str]) -> str:
+        """Start an empty result and return its ``result_id``."""
+
+    @abstractmethod
+    def append(self, result_id: str, rows: List[Any]) -> None:
+        """Add rows to the end of a result started with ``create``."""
+
+    def put(self, columns: List[str], rows: List[Any]) -> str:
+        """Store a result and return its ``result_id``."""
+        result_id = self.create(columns)
+        self.append(result_id, rows)
+        return result_id
+
+    @abstractmethod
+    def page(self, result_id: str, offset: int, limit: int) -> Optional[Dict[str, Any]]:
+        """Return ``columns``, ``rows`` and ``total_rows`` for a slice, or None if unknown."""
+
+    def paginate(self, result_id: str, cursor: Optional[str], limit: int) -> Optional[Dict[str, Any]]:
+        """Return one page of a stored result with its next cursor.
+
+        Args:
+            result_id: Handle returned by ``put``
+            cursor: Cursor from the previous page (empty for the first page)
+            limit: Maximum number of rows in the page
+
+        Returns:
+            Page dictionary, or None if the result is unknown or expired
+        """
+        offset = decode_cursor(cursor)
+        page = self.page(result_id, offset, limit)
+        if page is None:
+            return None
+        end = offset + len(page["rows"])
+        return {
+            "result_id": result_id,
+            "columns": page["columns"],
+            "rows": page["rows"],
+            "cursor": encode_cursor(offset),
+            "next_cursor": encode_cursor(end) if end < page["total_rows"] else None,
+            "total_rows": page["total_rows"]
+        }
+
+
+class MemoryResultStore(ResultStore):
+    """In-process result store in LRU order."""
+
+    def __init__(self, **limits):
+        super().__init__(**limits)
+        self._results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._total_rows = 0
+
+    def _evict(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        # LRU order is also last access order, so the expired results come first
+        while self._results and next(iter(self._results.values()))["last_accessed"] < cutoff:
+            _, result = self._results.popitem(last=False)
+            self._total_rows -= len(result["rows"])
+        while len(self._results) > 1 and self._total_rows > self.max_rows:
+            _, result = self._results.popitem(last=False)
+            self._total_rows -= len(result["rows"])
+
+    def create(self, columns: List[str]) -> str:
+        result_id = uuid.uuid4().hex
+        with self._lock:
+            self._results[result_id] = {"columns": columns, "rows": [], "last_accessed": time.time()}
+        return result_id
+
+    def append(self, result_id: str, rows: List[Any]) -> None:
+        with self._lock:
+            result = self._results.get(result_id)
+            if result is None:
+                return
+            result["rows"].extend(rows)
+            result["last_accessed"] = time.time()
+            self._results.move_to_end(result_id)
+            self._total_rows += len(rows)
+            self._evict()
+
+    def page(self, result_id: str, offset: int, limit: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._evict()
+            result = self._results.get(result_id)
+            if result is None:
+                return None
+            self._results.move_to_end(result_id)
+            result["last_accessed"] = time.time()
+            return {
+                "columns": result["columns"],
+                "rows": result["rows"][offset:offset + limit],
+                "total_rows": len(result["rows"])
+            }
+
+
+class SQLiteResultStore(ResultStore):
+    """Disk-backed result store shared by every worker process.
+
+    Rows are stored one per record so a page is a single indexed range scan.
+    """
+
+    def __init__(self, path: str, **limits):
+        super().__init__(**limits)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS results (
+                result_id TEXT PRIMARY KEY,
+                columns TEXT NOT NULL,
+                total_rows INTEGER NOT NULL,
+                last_accessed REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS result_rows (
+                result_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                row TEXT NOT NULL,
+                PRIMARY KEY (result_id, position)
+            ) WITHOUT ROWID;
+        """)
+
+    def _remove(self, result_id: str) -> None:
+        self._conn.execute("DELETE FROM result_rows WHERE result_id = ?", (result_id,))
+        self._conn.execute("DELETE FROM results WHERE result_id = ?", (result_id,))
+
+    def _evict(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        for (result_id,) in self._conn.execute("SELECT result_id FROM results WHERE last_accessed < ?", (cutoff,)).fetchall():
+            self._remove(result_id)
+        while True:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(total_rows), 0) FROM results").fetchone()
+            if count <= 1 or total <= self.max_rows:
+                break
+            (oldest,) = self._conn.execute("SELECT result_id FROM results ORDER BY last_accessed LIMIT 1").fetchone()
+            self._remove(oldest)
+
+    def create(self, columns: List[str]) -> str:
+        result_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO results (result_id, columns, total_rows, last_accessed) VALUES (?, ?, 0, ?)",
+                (result_id, json.dumps(columns), time.time())
+            )
+        return result_id
+
+    def append(self, result_id: str, rows: List[Any]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                meta = self._conn.execute("SELECT total_rows FROM results WHERE result_id = ?", (result_id,)).fetchone()
+                if meta is None:
+                    self._conn.execute("ROLLBACK")
+                    return
+                self._conn.executemany(
+                    "INSERT INTO result_rows (result_id, position, row) VALUES (?, ?, ?)",
+                    ((result_id, meta[0] + i, json.dumps(row, default=str)) for i, row in enumerate(rows))
+                )
+                self._conn.execute(
+                    "UPDATE results SET total_rows = ?, last_accessed = ? WHERE result_id = ?",
+                    (meta[0] + len(rows), time.time(), result_id)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._evict()
+
+    def page(self, result_id: str, offset: int, limit: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            meta = self._conn.execute(
+                "SELECT columns, total_rows, last_accessed FROM results WHERE result_id = ?", (result_id,)
+            ).fetchone()
+            if meta is None or meta[2] < time.time() - self.ttl_seconds:
+                return None
+            self._conn.execute("UPDATE results SET last_accessed = ? WHERE result_id = ?", (time.time(), result_id))
+            rows = [json.loads(row) for (row,) in self._conn.execute(
+                "SELECT row FROM result_rows WHERE result_id = ? AND position >= ? ORDER BY position LIMIT ?",
+                (result_id, offset, limit)
+            )]
+            return {"columns": json.loads(meta[0]), "rows": rows, "total_rows": meta[1]}
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class ResultWriter:
+    """Collects one query result chunk by chunk, holding at most its first page in memory.
+
+    The first ``page_size`` rows stay inline. Once the result has more, they
+    and every later row go to ``store`` behind a ``result_id``. Rows beyond
+    ``max_rows`` are dropped and the result is marked ``truncated``.
+    """
+
+    def __init__(self, store: ResultStore, columns: List[str], page_size: int, max_rows: int):
+        self.store = store
+        self.columns = columns
+        self.page_size = page_size
+        self.max_rows = max_rows
+        self.first_page: List[Any] = []
+        self.total_rows = 0
+        self.truncated = False
+        self.result_id: Optional[str] = None
+
+    def add(self, rows: List[Any]) -> None:
+        """Add the next chunk of rows."""
+        if self.total_rows + len(rows) > self.max_rows:
+            rows = rows[:self.max_rows - self.total_rows]
+            self.truncated = True
+        if not rows:
+            return
+        self.total_rows += len(rows)
+        if self.result_id is not None:
+            self.store.append(self.result_id, rows)
+            return
+        self.first_page.extend(rows)
+        if len(self.first_page) > self.page_size:
+            self.result_id = self.store.create(self.columns)
+            self.store.append(self.result_id, self.first_page)
+            del self.first_page[self.page_size:]
+
+    def finish(self) -> Dict[str, Any]:
+        """Return ``columns``, the first page of ``rows``, ``total_rows``, ``truncated`` and
+        ``row_limit``, plus ``result_id`` and ``next_cursor`` when there is more than one page."""
+        result = {
+            "columns": self.columns,
+            "rows": self.first_page,
+            "total_rows": self.total_rows,
+            "truncated": self.truncated,
+            "row_limit": self.max_rows
+        }
+        if self.result_id is not None:
+            result["result_id"] = self.result_id
+            result["next_cursor"] = encode_cursor(self.page_size)
+        return result
+
+
+class ResultPager:
+    """Pages query results into a result store as they are fetched.
+
+    ``collect`` reads the chunks of ``DatabaseManager.execute_stream`` (called
+    with ``max_rows``) through a ``ResultWriter``, so the server never holds
+    more than a page and a chunk of a result in memory.
+    """
+
+    def __init__(self, store: ResultStore, page_size: int = 100, max_rows: int = 10_000, chunk_size: int = 500):
+        self.store = store
+        self.page_size = page_size
+        self.max_rows = max_rows
+        self.chunk_size = chunk_size
+
+    def writer(self, columns: List[str]) -> ResultWriter:
+        """Start collecting a result with ``columns``."""
+        return ResultWriter(self.store, columns, self.page_size, self.max_rows)
+
+    def collect(self, chunks: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Collect ``{"columns"}``, ``{"rows"}`` and ``{"truncated"}`` chunks into a paged result.
+
+        Returns:
+            ``ResultWriter.finish`` of the collected result
+        """
+        writer = self.writer([])
+        for chunk in chunks:
+            if "columns" in chunk:
+                writer.columns = chunk["columns"]
+            elif "rows" in chunk:
+                writer.add(chunk["rows"])
+            elif chunk.get("truncated"):
+                writer.truncated = True
+        return writer.finish()
+
+
+def create_result_store(backend: str = "memory", path: Optional[str] = None, **limits) -> ResultStore:
+    """Build a result store for the configured backend (``memory`` or ``sqlite``)."""
+    if backend == "memory":
+        return MemoryResultStore(**limits)
+    if backend == "sqlite":
+        if not path:
+            raise ValueError("The sqlite result store requires a path")
+        return SQLiteResultStore(path, **limits)
+    raise ValueError(f"Unknown result store backend: {backend}")
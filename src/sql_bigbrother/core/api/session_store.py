@@ -0,0 +1,525 @@
+"""Bounded chat session stores with TTL/LRU eviction and memory budgets."""
+
+import bisect
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Result rows kept inline in a history entry; the rest is replaced by a digest
+HISTORY_PREVIEW_ROWS = 20
+# Keys that are response decoration rather than part of the answer
+HISTORY_DROPPED_KEYS = ("available_databases", "discovered_databases")
+
+
+def compact_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of a query result suitable for storing in session history.
+
+    The full rows are replaced by a short preview, the row count and a digest
+    of the rows, and response decoration such as ``available_databases`` is
+    dropped.
+
+    Args:
+        result: Result dictionary returned by the SQL processing node
+
+    Returns:
+        Compacted copy of the result
+    """
+    compact = {k: v for k, v in result.items() if k not in HISTORY_DROPPED_KEYS}
+    rows = result.get("rows")
+    if isinstance(rows, list) and len(rows) > HISTORY_PREVIEW_ROWS:
+        encoded = json.dumps(rows, default=str, sort_keys=True).encode("utf-8")
+        compact["rows"] = rows[:HISTORY_PREVIEW_ROWS]
+        compact["row_count"] = result.get("total_rows", len(rows))
+        compact["rows_truncated"] = True
+        compact["rows_digest"] = hashlib.sha256(encoded).hexdigest()
+    return compact
+
+
+def compact_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact the ``content`` of a response history entry."""
+    if entry.get("type") == "response" and isinstance(entry.get("content"), dict):
+        return {**entry, "content": compact_result(entry["content"])}
+    return entry
+
+
+def _entry_size(entry: Dict[str, Any]) -> int:
+    """Approximate in-memory footprint of a history entry, in bytes."""
+    return len(json.dumps(entry, default=str))
+
+
+class SessionStore(ABC):
+    """Interface for chat session storage.
+
+    Sessions are dictionaries with ``schema``, ``history`` and ``created_at``
+    keys. Stores evict sessions that have been idle for longer than
+    ``ttl_seconds`` and, when over ``max_sessions`` or ``max_total_bytes``, the
+    least recently used ones. A session over ``max_session_bytes`` drops its
+    oldest history entries first.
+    """
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 24 * 3600,
+                 max_session_bytes: int = 2 * 1024 * 1024, max_total_bytes: int = 256 * 1024 * 1024):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_session_bytes = max_session_bytes
+        self.max_total_bytes = max_total_bytes
+        self._lock = threading.RLock()
+        self.evictions = 0
+        # Idle sessions are swept at most this often rather than on every call
+        self.expire_interval = min(60.0, ttl_seconds / 10)
+        self._next_expiry = 0.0
+
+    def _expire_due(self) -> bool:
+        now = time.time()
+        if now < self._next_expiry:
+            return False
+        self._next_expiry = now + self.expire_interval
+        return True
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the session (refreshing its LRU position), or None."""
+
+    @abstractmethod
+    def create(self, session_id: str, schema: str) -> Dict[str, Any]:
+        """Create an empty session with the given schema."""
+
+    @abstractmethod
+    def history_since(self, session_id: str, since: int = 0) -> Optional[Dict[str, Any]]:
+        """Return the history entries appended after sequence number ``since``.
+
+        Sequence numbers only grow, so they stay valid as old entries are
+        trimmed. Returns None for an unknown session, otherwise a dictionary
+        with the new ``history`` entries, ``last_seq`` (the sequence number of
+        the last entry, or ``since``), ``message_count`` and ``created_at``.
+        """
+
+    @abstractmethod
+    def set_schema(self, session_id: str, schema: str) -> None:
+        """Replace the schema of an existing session."""
+
+    @abstractmethod
+    def append(self, session_id: str, entry: Dict[str, Any]) -> int:
+        """Append a (compacted) history entry and return the history length."""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """Delete a session; returns whether it existed."""
+
+    @abstractmethod
+    def summaries(self) -> Dict[str, Dict[str, Any]]:
+        """Return per-session metadata without the history bodies."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Return occupancy and eviction metrics."""
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+
+class MemorySessionStore(SessionStore):
+    """In-process session store backed by an ``OrderedDict`` in LRU order.
+
+    Every access moves a session to the end, so the idle sessions are always
+    at the front; byte totals are kept as running sums.
+    """
+
+    def __init__(self, **limits):
+        super().__init__(**limits)
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._meta: Dict[str, Dict[str, Any]] = {}
+        self._total_bytes = 0
+        self._seq = 0
+
+    def _expire(self) -> None:
+        if not self._expire_due():
+            return
+        cutoff = time.time() - self.ttl_seconds
+        while self._sessions:
+            oldest = next(iter(self._sessions))
+            if self._meta[oldest]["last_accessed"] >= cutoff:
+                break
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+        meta = self._meta.pop(session_id, None)
+        if meta:
+            self._total_bytes -= meta["bytes"]
+
+    def _enforce_limits(self, session_id: Optional[str] = None) -> None:
+        if session_id in self._sessions:
+            session, meta = self._sessions[session_id], self._meta[session_id]
+            while len(session["history"]) > 2 and meta["bytes"] > self.max_session_bytes:
+                session["history"].pop(0)
+                meta["entry_seqs"].pop(0)
+                size = meta["entry_sizes"].pop(0)
+                meta["bytes"] -= size
+                self._total_bytes -= size
+
+        while self._sessions and (len(self._sessions) > self.max_sessions or self._total_bytes > self.max_total_bytes):
+            oldest = next(iter(self._sessions))
+            if oldest == session_id and len(self._sessions) == 1:
+                break
+            logger.info(f"Evicting chat session {oldest} (LRU)")
+            self._remove(oldest)
+            self.evictions += 1
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is not None and self._meta[session_id]["last_accessed"] < time.time() - self.ttl_seconds:
+                # Idle past its TTL, but not swept yet
+                self._remove(session_id)
+                self.evictions += 1
+                session = None
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                self._meta[session_id]["last_accessed"] = time.time()
+            return session
+
+    def create(self, session_id: str, schema: str) -> Dict[str, Any]:
+        with self._lock:
+            self._remove(session_id)
+            session = {"schema": schema, "history": [], "created_at": datetime.now().isoformat()}
+            self._sessions[session_id] = session
+            self._meta[session_id] = {
+                "last_accessed": time.time(),
+                "size": len(schema or ""),
+                "bytes": len(schema or ""),
+                "entry_sizes": [],
+                "entry_seqs": []
+            }
+            self._total_bytes += len(schema or "")
+            self._enforce_limits(session_id)
+            return session
+
+    def history_since(self, session_id: str, since: int = 0) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            session = self.get(session_id)
+            if session is None:
+                return None
+            seqs = self._meta[session_id]["entry_seqs"]
+            return {
+                "history": session["history"][bisect.bisect_right(seqs, since):],
+                "last_seq": max(seqs[-1], since) if seqs else since,
+                "message_count": len(seqs),
+                "created_at": session["created_at"]
+            }
+
+    def set_schema(self, session_id: str, schema: str) -> None:
+        with self._lock:
+            session = self.get(session_id)
+            if session is None:
+                raise KeyError(session_id)
+            meta = self._meta[session_id]
+            self._total_bytes += len(schema) - meta["size"]
+            meta["bytes"] += len(schema) - meta["size"]
+            meta["size"] = len(schema)
+            session["schema"] = schema
+            self._enforce_limits(session_id)
+
+    def append(self, session_id: str, entry: Dict[str, Any]) -> int:
+        with self._lock:
+            session = self.get(session_id)
+            if session is None:
+                raise KeyError(session_id)
+            entry = compact_entry(entry)
+            size = _entry_size(entry)
+            session["history"].append(entry)
+            self._seq += 1
+            meta = self._meta[session_id]
+            meta["entry_seqs"].append(self._seq)
+            meta["entry_sizes"].append(size)
+            meta["bytes"] += size
+            self._total_bytes += size
+            self._enforce_limits(session_id)
+            return len(session["history"])
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            existed = session_id in self._sessions
+            self._remove(session_id)
+            return existed
+
+    def summaries(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            self._expire()
+            return {
+                session_id: {
+                    "created_at": session.get("created_at"),
+                    "message_count": len(session.get("history", [])),
+                    "has_schema": bool(session.get("schema"))
+                }
+                for session_id, session in self._sessions.items()
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "total_bytes": self._total_bytes,
+                "max_sessions": self.max_sessions,
+                "max_total_bytes": self.max_total_bytes,
+                "max_session_bytes": self.max_session_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "evictions": self.evictions
+            }
+
+
+class SQLiteSessionStore(SessionStore):
+    """Disk-backed session store in a local SQLite file.
+
+    Sessions survive restarts. ``get`` reassembles the session from its rows,
+    so callers must go through ``append``/``set_schema`` to modify it.
+    Triggers keep the entry count and bytes of every session, and the totals
+    of the store, up to date, so enforcing the limits never scans a table.
+    """
+
+    def __init__(self, path: str, **limits):
+        super().__init__(**limits)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                schema TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                last_accessed REAL NOT NULL,
+                entry_count INTEGER NOT NULL DEFAULT 0,
+                entry_bytes INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                entry TEXT NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS totals (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                sessions INTEGER NOT NULL,
+                bytes INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO totals (id, sessions, bytes) VALUES (0, 0, 0);
+            CREATE INDEX IF NOT EXISTS entries_session ON entries (session_id, id);
+            CREATE INDEX IF NOT EXISTS sessions_lru ON sessions (last_accessed);
+
+            CREATE TRIGGER IF NOT EXISTS entry_added AFTER INSERT ON entries BEGIN
+                UPDATE sessions SET entry_count = entry_count + 1, entry_bytes = entry_bytes + NEW.size
+                WHERE session_id = NEW.session_id;
+                UPDATE totals SET bytes = bytes + NEW.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS entry_removed AFTER DELETE ON entries BEGIN
+                UPDATE sessions SET entry_count = entry_count - 1, entry_bytes = entry_bytes - OLD.size
+                WHERE session_id = OLD.session_id;
+                UPDATE totals SET bytes = bytes - OLD.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS session_added AFTER INSERT ON sessions BEGIN
+                UPDATE totals SET sessions = sessions + 1, bytes = bytes + LENGTH(NEW.schema) WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS session_schema_changed AFTER UPDATE OF schema ON sessions BEGIN
+                UPDATE totals SET bytes = bytes + LENGTH(NEW.schema) - LENGTH(OLD.schema) WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS session_removed AFTER DELETE ON sessions BEGIN
+                UPDATE totals SET sessions = sessions - 1, bytes = bytes - LENGTH(OLD.schema) WHERE id = 0;
+            END;
+        """)
+
+    def _expire(self) -> None:
+        if not self._expire_due():
+            return
+        # An indexed range scan over the idle sessions only
+        expired = [row[0] for row in self._conn.execute(
+            "SELECT session_id FROM sessions WHERE last_accessed < ?", (time.time() - self.ttl_seconds,)
+        )]
+        for session_id in expired:
+            self._remove(session_id)
+            self.evictions += 1
+
+    def _remove(self, session_id: str) -> None:
+        self._conn.execute("DELETE FROM entries WHERE session_id = ?", (session_id,))
+        self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def _totals(self) -> Tuple[int, int]:
+        return self._conn.execute("SELECT sessions, bytes FROM totals WHERE id = 0").fetchone()
+
+    def _enforce_limits(self, session_id: Optional[str] = None) -> None:
+        if session_id is not None:
+            while True:
+                row = self._conn.execute(
+                    "SELECT LENGTH(schema) + entry_bytes, entry_count FROM sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                if row is None or row[0] <= self.max_session_bytes or row[1] <= 2:
+                    break
+                self._conn.execute(
+                    "DELETE FROM entries WHERE id = (SELECT MIN(id) FROM entries WHERE session_id = ?)", (session_id,)
+                )
+
+        while True:
+            count, total_bytes = self._totals()
+            if count == 0 or (count <= self.max_sessions and total_bytes <= self.max_total_bytes):
+                break
+            oldest = self._conn.execute(
+                "SELECT session_id FROM sessions ORDER BY last_accessed ASC LIMIT 1"
+            ).fetchone()[0]
+            if oldest == session_id and count == 1:
+                break
+            logger.info(f"Evicting chat session {oldest} (LRU)")
+            self._remove(oldest)
+            self.evictions += 1
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._expire()
+            row = self._conn.execute(
+                "SELECT schema, created_at FROM sessions WHERE session_id = ? AND last_accessed >= ?",
+                (session_id, time.time() - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE sessions SET last_accessed = ? WHERE session_id = ?", (time.time(), session_id)
+            )
+            history = [json.loads(entry) for (entry,) in self._conn.execute(
+                "SELECT entry FROM entries WHERE session_id = ? ORDER BY id", (session_id,)
+            )]
+            return {"schema": row[0], "history": history, "created_at": row[1]}
+
+    def history_since(self, session_id: str, since: int = 0) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._expire()
+            row = self._conn.execute(
+                "SELECT created_at, entry_count FROM sessions WHERE session_id = ? AND last_accessed >= ?",
+                (session_id, time.time() - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE sessions SET last_accessed = ? WHERE session_id = ?", (time.time(), session_id)
+            )
+            # Entry ids are AUTOINCREMENT, so they serve as sequence numbers
+            rows = self._conn.execute(
+                "SELECT id, entry FROM entries WHERE session_id = ? AND id > ? ORDER BY id", (session_id, since)
+            ).fetchall()
+            return {
+                "history": [json.loads(entry) for _, entry in rows],
+                "last_seq": rows[-1][0] if rows else since,
+                "message_count": row[1],
+                "created_at": row[0]
+            }
+
+    def create(self, session_id: str, schema: str) -> Dict[str, Any]:
+        with self._lock:
+            created_at = datetime.now().isoformat()
+            self._remove(session_id)
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, schema, created_at, last_accessed) VALUES (?, ?, ?, ?)",
+                (session_id, schema or "", created_at, time.time())
+            )
+            self._enforce_limits(session_id)
+            return {"schema": schema or "", "history": [], "created_at": created_at}
+
+    def set_schema(self, session_id: str, schema: str) -> None:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE sessions SET schema = ?, last_accessed = ? WHERE session_id = ? AND last_accessed >= ?",
+                (schema, time.time(), session_id, time.time() - self.ttl_seconds)
+            )
+            if cursor.rowcount == 0:
+                raise KeyError(session_id)
+            self._enforce_limits(session_id)
+
+    def append(self, session_id: str, entry: Dict[str, Any]) -> int:
+        with self._lock:
+            if self._conn.execute(
+                "SELECT 1 FROM sessions WHERE session_id = ? AND last_accessed >= ?", (session_id, time.time() - self.ttl_seconds)
+            ).fetchone() is None:
+                raise KeyError(session_id)
+            encoded = json.dumps(compact_entry(entry), default=str)
+            self._conn.execute(
+                "INSERT INTO entries (session_id, entry, size) VALUES (?, ?, ?)",
+                (session_id, encoded, len(encoded))
+            )
+            self._conn.execute(
+                "UPDATE sessions SET last_accessed = ? WHERE session_id = ?", (time.time(), session_id)
+            )
+            self._enforce_limits(session_id)
+            return self._conn.execute(
+                "SELECT entry_count FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            existed = self._conn.execute(
+                "SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone() is not None
+            self._remove(session_id)
+            return existed
+
+    def summaries(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            self._expire()
+            rows = self._conn.execute(
+                "SELECT session_id, created_at, LENGTH(schema) > 0, entry_count FROM sessions ORDER BY last_accessed"
+            ).fetchall()
+            return {
+                session_id: {"created_at": created_at, "message_count": count, "has_schema": bool(has_schema)}
+                for session_id, created_at, has_schema, count in rows
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sessions, total_bytes = self._totals()
+            return {
+                "backend": "sqlite",
+                "path": str(self.path),
+                "sessions": sessions,
+                "total_bytes": total_bytes,
+                "max_sessions": self.max_sessions,
+                "max_total_bytes": self.max_total_bytes,
+                "max_session_bytes": self.max_session_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "evictions": self.evictions
+            }
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def create_session_store(backend: str = "memory", path: Optional[str] = None, **limits) -> SessionStore:
+    """Build a session store for the configured backend.
+
+    Args:
+        backend: ``memory`` or ``sqlite``
+        path: SQLite file path (required for the ``sqlite`` backend)
+        **limits: Eviction limits passed to the store
+
+    Returns:
+        The session store
+    """
+    if backend == "memory":
+        return MemorySessionStore(**limits)
+    if backend == "sqlite":
+        if not path:
+            raise ValueError("The sqlite session store requires a path")
+        return SQLiteSessionStore(path, **limits)
+    raise ValueError(f"Unknown session store backend: {backend}")
@@ -0,0 +1,214 @@
+"""State shared between uvicorn worker processes, with single-writer startup election."""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from sql_bigbrother.core.api.processes import process_started
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, run as a single worker
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class SharedState:
+    """Key/value JSON state in a SQLite file readable by every worker process.
+
+    The startup leader calls ``begin_run`` once elected. A new server drops
+    the state of earlier runs and records a new random run id; a leader that
+    replaces a dead one under the same supervisor keeps the current run and
+    its published state. Each write records the run id and the PID of the
+    writer, so readers ignore anything not written in the current run and
+    skip their own writes.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS state (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                run_id TEXT NOT NULL,
+                writer INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS run (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                run_id TEXT NOT NULL,
+                supervisor TEXT,
+                started_at REAL NOT NULL
+            )
+        """)
+
+    def begin_run(self, supervisor: Optional[str] = None) -> Tuple[str, bool]:
+        """Resume the current run if ``supervisor`` started it, otherwise start a new one.
+
+        Args:
+            supervisor: Identity of the process supervising the workers (see
+                ``supervisor_id``), or None when there is none to resume under
+
+        Returns:
+            Tuple of (run id, whether the current run was resumed)
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT run_id, supervisor FROM run WHERE id = 0").fetchone()
+                if supervisor is not None and row is not None and row[1] == supervisor:
+                    self._conn.execute("COMMIT")
+                    logger.info(f"Resuming shared state run {row[0]}")
+                    return row[0], True
+                run_id = f"run-{uuid.uuid4().hex}"
+                self._conn.execute("DELETE FROM state")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO run (id, run_id, supervisor, started_at) VALUES (0, ?, ?, ?)",
+                    (run_id, supervisor, time.time())
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        logger.info(f"Started shared state run {run_id}")
+        return run_id, False
+
+    def run_id(self) -> Optional[str]:
+        """Return the id of the current run, or None before a leader has started one."""
+        with self._lock:
+            row = self._conn.execute("SELECT run_id FROM run WHERE id = 0").fetchone()
+        return row[0] if row else None
+
+    def publish(self, values: Dict[str, Any]) -> None:
+        """Atomically write several keys.
+
+        Args:
+            values: Mapping of key to JSON-serializable value
+        """
+        now = time.time()
+        rows = [(key, json.dumps(value, default=str), os.getpid(), now) for key, value in values.items()]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO state (key, value, run_id, writer, updated_at) "
+                    "VALUES (?, ?, COALESCE((SELECT run_id FROM run WHERE id = 0), ''), ?, ?)",
+                    rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def read_since(self, since: float) -> Tuple[Dict[str, Any], float]:
+        """Return keys written by other workers of this run after ``since``.
+
+        Args:
+            since: ``updated_at`` of the last change already applied
+
+        Returns:
+            Tuple of (changed values, newest ``updated_at`` seen)
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value, updated_at FROM state "
+                "WHERE run_id = (SELECT run_id FROM run WHERE id = 0) AND writer != ? AND updated_at > ?",
+                (os.getpid(), since)
+            ).fetchall()
+        values = {key: json.loads(value) for key, value, _ in rows}
+        newest = max([updated_at for _, _, updated_at in rows], default=since)
+        return values, newest
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class StartupLeader:
+    """Elect a single worker to run the startup work via an exclusive file lock.
+
+    The lock is held for the lifetime of the process, so if the leader dies
+    another worker can take over by calling ``try_acquire`` again.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._handle is not None
+
+    def try_acquire(self) -> bool:
+        """Try to become the leader without blocking.
+
+        Returns:
+            True if this process holds the startup lock
+        """
+        if self._handle is not None:
+            return True
+        if fcntl is None:
+            self._handle = True
+            return True
+
+        handle = open(self.path, "a+")
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+
+        handle.seek(0)
+        handle.truncate()
+        handle.write(str(os.getpid()))
+        handle.flush()
+        self._handle = handle
+        logger.info(f"Worker {os.getpid()} elected as startup leader")
+        return True
+
+    def release(self) -> None:
+        """Give up leadership."""
+        if self._handle is not None and self._handle is not True:
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+            self._handle.close()
+        self._handle = None
+
+
+def configured_workers() -> int:
+    """Number of worker processes configured for the server (``WEB_CONCURRENCY``, as read by uvicorn)."""
+    return int(os.getenv('WEB_CONCURRENCY', '1') or '1')
+
+
+def supervisor_id() -> Optional[str]:
+    """Identify the process supervising this worker, to tell a restarted worker from a new server.
+
+    Only multi-worker servers have a supervisor that outlives its workers; a
+    single worker (also under ``reload=True``) always starts a new run. The
+    supervisor's start time is part of the id, so a new supervisor that
+    reuses the PID (e.g. PID 1 in a restarted container) starts a new run.
+    """
+    if configured_workers() <= 1:
+        return None
+    parent = os.getppid()
+    started = process_started(parent)
+    return f"{parent}:{started}" if started is not None else None
+
+
+def default_session_backend() -> str:
+    """Sessions must live on disk when the server runs several workers."""
+    return "sqlite" if configured_workers() > 1 else "memory"
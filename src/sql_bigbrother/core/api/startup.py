@@ -0,0 +1,115 @@
+"""Startup stage tracking for the background initialization of the API."""
+
+import logging
+import time
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupStage(str, Enum):
+    """Stages of the background startup sequence, in order."""
+
+    PENDING = "pending"
+    DISCOVERING = "discovering"
+    EXTRACTING = "extracting"
+    SUMMARIZING = "summarizing"
+    READY = "ready"
+    FAILED = "failed"
+
+
+# Rough share of the startup work completed when a stage begins
+STAGE_PROGRESS = {
+    StartupStage.PENDING: 0.0,
+    StartupStage.DISCOVERING: 0.1,
+    StartupStage.EXTRACTING: 0.4,
+    StartupStage.SUMMARIZING: 0.6,
+    StartupStage.READY: 1.0,
+    StartupStage.FAILED: 1.0,
+}
+
+
+class StartupState:
+    """Readiness of the API while startup runs in the background.
+
+    The state is only mutated from the event loop, so no locking is needed.
+    ``schema_content`` is published as soon as extraction finishes so chat
+    requests can be served before the title/introduction crews complete.
+    ``on_change`` is called after every stage transition, e.g. to share the
+    state with other worker processes.
+    """
+
+    def __init__(self, on_change: Optional[Callable[[], None]] = None):
+        self.on_change = on_change
+        self.stage = StartupStage.PENDING
+        self.message = "Waiting for startup"
+        self.error: Optional[str] = None
+        self.schema_content: Optional[str] = None
+        self.started_at = datetime.now().isoformat()
+        self._stage_started = time.perf_counter()
+        self._stages: List[Dict[str, Any]] = []
+
+    @property
+    def ready(self) -> bool:
+        """Whether the startup sequence has finished (successfully or not)."""
+        return self.stage in (StartupStage.READY, StartupStage.FAILED)
+
+    @property
+    def schema_available(self) -> bool:
+        """Whether a schema has been extracted and can be used for chat."""
+        return bool(self.schema_content)
+
+    def advance(self, stage: StartupStage, message: str = "") -> None:
+        """Close the current stage and enter ``stage``.
+
+        Args:
+            stage: The stage being entered
+            message: Human readable description of what is happening
+        """
+        now = time.perf_counter()
+        if self.stage != StartupStage.PENDING:
+            self._stages.append({
+                "stage": self.stage.value,
+                "duration_ms": round((now - self._stage_started) * 1000, 1)
+            })
+        self.stage = stage
+        self.message = message or stage.value.capitalize()
+        self._stage_started = now
+        logger.info(f"Startup stage: {stage.value} - {self.message}")
+        if self.on_change is not None:
+            self.on_change()
+
+    def fail(self, error: str) -> None:
+        """Mark the startup sequence as failed."""
+        self.error = error
+        self.advance(StartupStage.FAILED, f"Startup failed: {error}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serializable view of the startup progress."""
+        return {
+            "stage": self.stage.value,
+            "ready": self.ready,
+            "progress": STAGE_PROGRESS[self.stage],
+            "message": self.message,
+            "schema_available": self.schema_available,
+            "error": self.error,
+            "started_at": self.started_at,
+            "completed_stages": list(self._stages),
+        }
+
+    def load_snapshot(self, snapshot: Dict[str, Any], schema_content: Optional[str] = None) -> None:
+        """Mirror the state published by the worker that runs startup.
+
+        Args:
+            snapshot: Output of ``snapshot`` from the leader
+            schema_content: Schema extracted by the leader, if any
+        """
+        self.stage = StartupStage(snapshot["stage"])
+        self.message = snapshot.get("message", "")
+        self.error = snapshot.get("error")
+        self.started_at = snapshot.get("started_at", self.started_at)
+        self._stages = list(snapshot.get("completed_stages", []))
+        if schema_content:
+            self.schema_content = schema_content
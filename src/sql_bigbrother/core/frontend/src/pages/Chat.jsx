@@ -21,11 +21,17 @@ export default function ChatPage() {
 
 	// Fetch initial chat state on mount
 	useEffect(() => {
+		let retryTimer = null;
 		const fetchInitialState = async () => {
 			try {
 				const response = await axios.get(`${configs["CREWAI_URL"]}/chat/init`);
 				if (response.data) {
 					setInitialIntroduction(response.data.introduction);
+					// Startup still running in the background: poll again until ready
+					if (response.data.ready === false) {
+						retryTimer = setTimeout(fetchInitialState, 2000);
+						if (!response.data.sql_content) return;
+					}
 					setFormData(prev => ({
 						...prev,
 						schema: response.data.sql_content || ""
@@ -40,6 +46,7 @@ export default function ChatPage() {
 		};
 
 		fetchInitialState();
+		return () => clearTimeout(retryTimer);
 	}, []);
 
 	const handleChangeForm = useCallback(
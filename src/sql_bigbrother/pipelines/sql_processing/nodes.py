@@ -1,71 +1,93 @@
 """Nodes for SQL processing pipeline."""
 
 import logging
-from typing import Dict, Any, List, TypedDict, Annotated
+import os
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple, TypedDict, Annotated
 import json
 import subprocess
 import platform
 import operator
+import uuid
 from datetime import datetime
+from textwrap import dedent
 from crewai import Agent, Task, Crew, Process
 from langgraph.graph import StateGraph, END
 from sql_bigbrother.pipelines.sql_processing.services.database import DatabaseManager
-from sql_bigbrother.pipelines.sql_processing.services.utils import filterSchema, filterSchema_v2, markdownSQL, extractMarkdown, process_data
+from sql_bigbrother.pipelines.sql_processing.services.utils import filterSchema, filterSchema_v2, markdownSQL, extractMarkdown, process_data, schema_fingerprint
+from sql_bigbrother.pipelines.sql_processing.services.schema_cache import schema_cache
+from sql_bigbrother.pipelines.sql_processing.services.schema_format import VERBOSITY_LEVELS, format_schema, parse_schema
+from sql_bigbrother.pipelines.sql_processing.services.schema_linking import schema_linker
+from sql_bigbrother.pipelines.sql_processing.services.tokens import token_counter
+from sql_bigbrother.pipelines.sql_processing.services.token_budget import token_budget
+from sql_bigbrother.pipelines.sql_processing.services.sql_cache import sql_cache
+from sql_bigbrother.pipelines.sql_processing.services.sql_validation import validate_sql
+from sql_bigbrother.pipelines.sql_processing.services.cascade import sql_cascade
+from sql_bigbrother.pipelines.sql_processing.services.artifacts import artifact_store
+from sql_bigbrother.pipelines.sql_processing.services.ollama import ollama_client
+from sql_bigbrother.pipelines.sql_processing.prompts.configs import DESIGN_TASK_DESCRIPTION, DESIGN_TASK_EXPECTED_OUTPUT, SPECIALIST_AGENT_BACKSTORY, SQL_SYSTEM_PROMPT, SQL_ENGINE
+from sql_bigbrother.pipelines.sql_processing.services.model_registry import model_registry
+from sql_bigbrother.pipelines.sql_processing.services.model_lifecycle import model_lifecycle
 from sql_bigbrother.pipelines.sql_processing.prompts.agents import SQLAgents
 from sql_bigbrother.pipelines.sql_processing.prompts.tasks import SQLTasks
+from sql_bigbrother.pipelines.sql_processing.prompts.crews import crew_pool
 
 logger = logging.getLogger(__name__)
 
+# Runs the schema onboarding generations that go alongside the calling thread
+# (recommendations, introduction); Ollama serves them in parallel with
+# OLLAMA_NUM_PARALLEL > 1
+schema_llm_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('SCHEMA_LLM_WORKERS', '4')),
+    thread_name_prefix="schema-llm"
+)
 
-def initialize_schema_processing(schema_content: str) -> Dict[str, Any]:
+
+def _settle(future: Future) -> None:
+    """Cancel ``future`` if it has not started yet, otherwise wait for it to finish."""
+    if not future.cancel():
+        wait([future])
+
+
+def initialize_schema_processing(schema_content: str, on_title: Optional[Callable[[str], Any]] = None) -> Dict[str, Any]:
     """Initialize chat by processing uploaded SQL schema.
     
+    The title and the recommendations are generated concurrently.
+    
     Args:
         schema_content: Raw SQL schema content
+        on_title: Called with the title as soon as it is known, before the
+            recommendations are finished
         
     Returns:
         Dictionary containing title, recommendations, and schema content
     """
     try:
-        agents = SQLAgents()
-        tasks = SQLTasks()
-        
-        filtered_schema = filterSchema_v2(schema_content)
-        
-        title_agent = agents.sql_title_agent()
-        title_task = tasks.sql_title_task(title_agent, filtered_schema)
-
-        recommended_agent = agents.sql_recommended_agent()
-        recommended_task = tasks.sql_recommended_task(recommended_agent, filtered_schema)
-        
-        crew = Crew(
-                agents=[title_agent, recommended_agent],
-                tasks=[title_task, recommended_task],
-                verbose=True,
-            )
-        crew.kickoff()
-        
-        title = title_task.output.raw
-        recommends_raw = recommended_task.output.raw
-        
-        # Extract JSON from markdown code block if present
+        # Known schemas (up to comments, whitespace and statement order) skip both LLM calls
+        fingerprint = schema_fingerprint(schema_content)
+        cached = schema_cache.get(fingerprint) if schema_cache else None
+        if cached is not None:
+            logger.info(f"Schema cache hit for {fingerprint[:12]}")
+            if on_title:
+                on_title(cached['title'])
+            return {**cached, 'sql_content': schema_content}
+        
+        filtered_schema = format_schema(schema_content)
+        
+        recommends_future = schema_llm_executor.submit(_generate_recommends, filtered_schema)
         try:
-            if recommends_raw.strip().startswith('```'):
-                # Find JSON content between code block markers
-                start_idx = recommends_raw.find('[')
-                end_idx = recommends_raw.rfind(']') + 1
-                if start_idx != -1 and end_idx != 0:
-                    recommends_json = recommends_raw[start_idx:end_idx]
-                else:
-                    recommends_json = recommends_raw
-            else:
-                recommends_json = recommends_raw
-                
-            recommends = json.loads(recommends_json)
-        except json.JSONDecodeError as e:
-            logger.warning(f"Failed to parse recommends as JSON: {e}, using raw output")
-            # Fallback to empty list if JSON parsing fails
-            recommends = []
+            with crew_pool.lease("title") as crew:
+                title = crew.run(schema=filtered_schema)[0]
+            if on_title:
+                on_title(title)
+            recommends = recommends_future.result()
+        finally:
+            # A failed title must not leave the recommendations running unobserved
+            _settle(recommends_future)
+        
+        # Unparseable recommendations are not cached so the next upload retries them
+        if schema_cache and recommends:
+            schema_cache.put(fingerprint, {'title': title, 'recommends': recommends})
         
         return {
             'title': title, 
@@ -77,7 +99,56 @@ def initialize_schema_processing(schema_content: str) -> Dict[str, Any]:
         raise
 
 
-def process_sql_query(requirement: str, schema: str, model: str, is_explain: bool = False, chat_history: List[Dict[str, str]] = None, execute_query: bool = False) -> Dict[str, Any]:
+def initialize_schema_with_introduction(schema_content: str, discovered_databases: Dict[str, Any]) -> Dict[str, Any]:
+    """Process a schema and write its introduction, starting the introduction once the title is ready.
+    
+    Args:
+        schema_content: Raw SQL schema content
+        discovered_databases: Discovered databases information
+        
+    Returns:
+        The ``generate_introduction`` result, including the recommendations
+    """
+    introduction = []
+    
+    def start_introduction(title: str) -> None:
+        schema_result = {'title': title, 'sql_content': schema_content}
+        introduction.append(schema_llm_executor.submit(generate_introduction, schema_result, discovered_databases))
+    
+    try:
+        schema_result = initialize_schema_processing(schema_content, on_title=start_introduction)
+        return {**schema_result, **introduction[0].result()}
+    finally:
+        for future in introduction:
+            _settle(future)
+
+
+def _generate_recommends(filtered_schema: str) -> List[Any]:
+    with crew_pool.lease("recommend") as crew:
+        recommends_raw = crew.run(schema=filtered_schema)[0]
+    
+    # Extract JSON from markdown code block if present
+    try:
+        if recommends_raw.strip().startswith('```'):
+            # Find JSON content between code block markers
+            start_idx = recommends_raw.find('[')
+            end_idx = recommends_raw.rfind(']') + 1
+            if start_idx != -1 and end_idx != 0:
+                recommends_json = recommends_raw[start_idx:end_idx]
+            else:
+                recommends_json = recommends_raw
+        else:
+            recommends_json = recommends_raw
+            
+        recommends = json.loads(recommends_json)
+    except json.JSONDecodeError as e:
+        logger.warning(f"Failed to parse recommends as JSON: {e}, using raw output")
+        # Fallback to empty list if JSON parsing fails
+        recommends = []
+    return recommends
+
+
+def process_sql_query(requirement: str, schema: str, model: str, is_explain: bool = False, chat_history: List[Dict[str, str]] = None, execute_query: bool = False, pager: Any = None) -> Dict[str, Any]:
     """Process SQL query request using AI agents with conversation context.
     
     Args:
@@ -87,98 +158,464 @@ def process_sql_query(requirement: str, schema: str, model: str, is_explain: boo
         is_explain: Whether to include explanation
         chat_history: Previous conversation messages for context
         execute_query: Whether to execute the query (False by default, only generates SQL)
+        pager: ``ResultPager`` that pages the rows into a result store as they are fetched;
+            without one, every row is fetched and returned
         
     Returns:
         Dictionary containing query, explanation, rows, and columns
     """
     try:
-        agents = SQLAgents()
-        tasks = SQLTasks()
         database = DatabaseManager("mysql")
         
-        filtered_schema = filterSchema_v2(schema)
-        
         # OPTIMIZATION: Removed coordinator agent to speed up response time
         # All requests now directly go to SQL generation
-        # Step 1: Build context from chat history
-        context = ""
-        if chat_history and len(chat_history) > 0:
-            context = "\n\nPrevious conversation:\n"
-            for msg in chat_history[-5:]:
-                role = msg.get("role", "user")
-                content = msg.get("content", "")[:200]
-                context += f"{role.upper()}: {content}\n"
-            context += "\nCurrent question:\n"
-        
-        contextualized_requirement = context + requirement if context else requirement
-        
         query_output = ""
         explain_output = ""
+        fingerprint = schema_fingerprint(schema)
+        cache_hit = None
+        cascade = None
+        setup_success = None
         
         if is_explain:
-            specialist = agents.sql_specialist_agent(model)
-            expert = agents.sql_expert_agent(model)
-            agent_list = [specialist, expert]
+            # Fit the linked schema and the chat history into the model's context
+            prompt = _plan_prompt(requirement, schema, fingerprint, model, chat_history, direct=False)
+            with crew_pool.lease("specialist+expert", model) as crew:
+                design_output, explain_output = crew.run(requirement=prompt['requirement'], schema=prompt['schema'])
+            query_output = extractMarkdown(design_output)
+            # Task outputs stay in memory; they only reach the disk when archiving is on
+            if artifact_store is not None:
+                request_id = uuid.uuid4().hex
+                artifact_store.append(request_id, "requirement", requirement)
+                artifact_store.append(request_id, "sql_design_task", design_output)
+                artifact_store.append(request_id, "sql_expert_task", explain_output)
+        else:
+            # Step 2: Reuse validated SQL for the same (or a similarly worded) question
+            cache_hit = _cached_sql(requirement, fingerprint, model, chat_history)
+            if cache_hit:
+                query_output = cache_hit["sql"]
+            else:
+                # The cascade can EXPLAIN drafts on the database the query will run on
+                if execute_query and sql_cascade is not None and sql_cascade.explain:
+                    setup_success = _setup_database(database, schema)
+                query_output, cascade = _generate_sql(requirement, schema, fingerprint, model, chat_history,
+                                                      database if setup_success else None)
+        
+        # Step 3: Execute the query ONLY if explicitly requested
+        if execute_query:
+            if setup_success is None:
+                setup_success = _setup_database(database, schema)
+            if setup_success:
+                result = _execute_sql(database, query_output, explain_output, pager)
+                return _remember_sql(requirement, fingerprint, model, chat_history, query_output, result, cache_hit, cascade)
+        
+        return _remember_sql(requirement, fingerprint, model, chat_history, query_output,
+                             _generated_only(query_output, explain_output), cache_hit, cascade)
+            
+    except Exception as e:
+        logger.error(f"SQL query processing error: {str(e)}")
+        raise
 
-            design_task = tasks.sql_design_task(specialist, contextualized_requirement, filtered_schema)  
-            analyze_task = tasks.sql_expert_task(expert, design_task)
-            task_list = [design_task, analyze_task]
 
-            crew = Crew(agents=agent_list, tasks=task_list, verbose=True, process=Process.sequential)       
-            crew.kickoff()
-            
-            query_output = extractMarkdown(design_task.output.raw) 
-            explain_output = analyze_task.output.raw
-        else:
-            specialist = agents.sql_specialist_agent(model)
-            design_task = tasks.sql_design_task(specialist, contextualized_requirement, filtered_schema)
+def _setup_database(database: DatabaseManager, schema: str) -> bool:
+    """Create the schema on the database, returning whether it can be queried."""
+    try:
+        return database.setup(schema)
+    except Exception as db_error:
+        logger.warning(f"Database setup failed: {str(db_error)}")
+        return False
 
-            crew = Crew(agents=[specialist], tasks=[design_task], verbose=True)
-            crew.kickoff()
 
-            query_output = extractMarkdown(design_task.output.raw)
+def _generate_sql(requirement: str, schema: str, fingerprint: str, model: str,
+                  chat_history: List[Dict[str, str]] = None,
+                  database: Optional[DatabaseManager] = None) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Generate the query, through the small-to-large model cascade when one is configured.
+    
+    Each cascade tier gets a prompt budgeted for its own model. A draft is
+    accepted when it parses and only uses tables and columns of the schema
+    (and, given a set up ``database``, when MySQL can EXPLAIN it); otherwise
+    the next, larger model is tried.
+    
+    Args:
+        requirement: User's query requirement
+        schema: SQL schema
+        fingerprint: ``schema_fingerprint(schema)``
+        model: AI model to use, the last tier of the cascade
+        chat_history: Previous conversation messages for context
+        database: Database to EXPLAIN drafts on, if any
         
-        # Step 3: Execute the query ONLY if explicitly requested
-        if execute_query:
+    Returns:
+        The generated query, and the cascade's report (None without a cascade)
+    """
+    def generate(name: str) -> str:
+        prompt = _plan_prompt(requirement, schema, fingerprint, name, chat_history, direct=SQL_ENGINE == "ollama")
+        return _design_sql(prompt['requirement'], prompt['schema'], name, prompt['options'])
+    
+    if sql_cascade is None:
+        return generate(model), None
+    
+    tables = schema_linker.index(schema, fingerprint).tables if schema_linker is not None else parse_schema(schema)
+    
+    def validate(sql: str) -> Optional[str]:
+        reason = validate_sql(sql, tables)
+        if reason is None and database is not None:
             try:
-                setup_success = database.setup(schema)
-                if setup_success:
-                    metadata = database.execute(query_output)
-                    query = markdownSQL(query_output)
-                    
-                    return {
-                        'query': query, 
-                        'explain': explain_output, 
-                        'rows': process_data(metadata['rows']), 
-                        'columns': metadata['columns'],
-                        'executed': True
-                    }
+                reason = database.explain(sql)
             except Exception as db_error:
-                logger.warning(f"Database execution failed: {str(db_error)}")
-                query = markdownSQL(query_output)
-                return {
-                    'query': query, 
-                    'explain': explain_output, 
-                    'rows': [], 
-                    'columns': [],
-                    'error': f'Execution failed: {str(db_error)}',
-                    'executed': False
-                }
-        
-        # Return generated query without execution
-        query = markdownSQL(query_output)
+                # An unreachable database says nothing about the draft
+                logger.warning(f"Could not EXPLAIN the draft query: {str(db_error)}")
+        return reason
+    
+    outcome = sql_cascade.run(model or model_registry.default_model(), generate, validate)
+    return outcome['sql'], {'model': outcome['model'], 'tier': outcome['tier'], 'attempts': outcome['attempts']}
+
+
+def _plan_prompt(requirement: str, schema: str, fingerprint: str, model: str,
+                 chat_history: List[Dict[str, str]] = None, direct: bool = True) -> Dict[str, Any]:
+    """Fit the schema and the conversation into the model's context window.
+    
+    The tables linked to the question (on large schemas) are rendered at
+    ``SCHEMA_FORMAT`` and the recent messages are added, both trimmed to the
+    token budget of the model.
+    
+    Args:
+        requirement: User's query requirement
+        schema: SQL schema
+        fingerprint: ``schema_fingerprint(schema)``
+        model: AI model to use
+        chat_history: Previous conversation messages for context
+        direct: Whether the prompt goes straight to Ollama rather than through a crew
+        
+    Returns:
+        Dictionary with the prompt ``schema``, the contextualized ``requirement``
+        and the Ollama ``options`` (``num_ctx``)
+    """
+    model = model or model_registry.default_model()
+    history = [f"{msg.get('role', 'user').upper()}: {msg.get('content', '')}" for msg in chat_history or []]
+    # Follow-ups ("and only for 2024?") name their tables in the previous messages
+    linking_text = " ".join([msg.get('content', '') for msg in (chat_history or [])[-3:]] + [requirement])
+    if schema_linker is not None:
+        tables = schema_linker.tables(linking_text, schema, fingerprint)
+    else:
+        tables = list(parse_schema(schema).values())
+    
+    if direct:
+        instructions = dedent(DESIGN_TASK_DESCRIPTION("", "")) + SQL_SYSTEM_PROMPT
+    else:
+        instructions = dedent(DESIGN_TASK_DESCRIPTION("", "")) + dedent(SPECIALIST_AGENT_BACKSTORY) + DESIGN_TASK_EXPECTED_OUTPUT
+    plan = token_budget.allocate(model, instructions, requirement, history, tables,
+                                 raw_schema="" if tables else filterSchema_v2(schema))
+    return {
+        'schema': plan['schema'],
+        'requirement': _contextualize_requirement(requirement, plan['history']),
+        'options': {'num_ctx': plan['num_ctx']}
+    }
+
+
+def schema_token_report(schema: str, models: List[str], exact: bool = False) -> Dict[str, Any]:
+    """Report how large a schema is in a prompt at every verbosity level.
+    
+    Args:
+        schema: Raw SQL schema content
+        models: Models whose tokenizers to count with
+        exact: Count each rendering with the model's tokenizer through Ollama
+            instead of the calibrated estimate
+        
+    Returns:
+        Dictionary with the table count, and characters and tokens per model for each level
+    """
+    levels = {}
+    for verbosity in VERBOSITY_LEVELS:
+        rendered = format_schema(schema, verbosity)
+        levels[verbosity] = {
+            'chars': len(rendered),
+            'tokens': {
+                model: token_counter.measure(rendered, model) if exact else token_counter.count(rendered, model)
+                for model in models
+            }
+        }
+    return {
+        'tables': len(parse_schema(schema)),
+        'exact': exact,
+        'levels': levels,
+        'calibration': token_counter.stats()
+    }
+
+
+def _cached_sql(requirement: str, fingerprint: str, model: str, chat_history: List[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+    """Look up validated SQL for a question in the answer cache."""
+    # Follow-up questions depend on the conversation, so only standalone questions use the cache
+    if sql_cache is None or chat_history:
+        return None
+    return sql_cache.get(requirement, fingerprint, model)
+
+
+def _remember_sql(requirement: str, fingerprint: str, model: str, chat_history: List[Dict[str, str]],
+                  query_output: str, result: Dict[str, Any], cache_hit: Optional[Dict[str, Any]],
+                  cascade: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Cache freshly generated SQL once it has been validated, and mark cached and cascaded answers in ``result``."""
+    if cascade:
+        result['cascade'] = cascade
+    if cache_hit:
+        result['cache'] = {'match': cache_hit['match'], 'similarity': cache_hit['similarity'], 'question': cache_hit['question']}
+    # Only SQL that ran and returned a result set counts as validated
+    elif sql_cache is not None and not chat_history and result.get('executed') and result.get('columns'):
+        sql_cache.put(requirement, fingerprint, model, query_output)
+    return result
+
+
+def _design_sql(requirement: str, filtered_schema: str, model: str, options: Optional[Dict[str, Any]] = None) -> str:
+    """Generate the query with the configured engine (``SQL_ENGINE``).
+    
+    ``options`` (e.g. ``num_ctx``) only apply to the direct Ollama engine.
+    """
+    if SQL_ENGINE == "ollama":
+        return _design_sql_direct(requirement, filtered_schema, model, options)
+    return _design_sql_crew(requirement, filtered_schema, model)
+
+
+def _design_sql_direct(requirement: str, filtered_schema: str, model: str, options: Optional[Dict[str, Any]] = None) -> str:
+    """Send the specialist prompt straight to Ollama, without CrewAI's agent scaffolding."""
+    prompt = dedent(DESIGN_TASK_DESCRIPTION(filtered_schema, requirement))
+    model = model or model_registry.default_model()
+    if model_lifecycle is not None:
+        model_lifecycle.touch(model)
+    response = ollama_client.generate(model, prompt, system=SQL_SYSTEM_PROMPT, options=options)
+    logger.info(f"Direct SQL generation: {response.get('prompt_eval_count')} prompt tokens, "
+                f"{response.get('eval_count')} output tokens")
+    return extractMarkdown(response.get("response", ""))
+
+
+def _design_sql_crew(requirement: str, filtered_schema: str, model: str) -> str:
+    """Run a pooled SQL specialist crew and return the generated query."""
+    with crew_pool.lease("specialist", model) as crew:
+        (design_output,) = crew.run(requirement=requirement, schema=filtered_schema)
+    return extractMarkdown(design_output)
+
+
+def _execute_sql(database: DatabaseManager, query_output: str, explain_output: str = "", pager: Any = None) -> Dict[str, Any]:
+    """Execute a generated query on a database that is already set up.
+    
+    With a ``pager``, rows are read in chunks into its result store and only
+    the first page is returned, with ``total_rows`` and the paging fields.
+    """
+    query = markdownSQL(query_output)
+    try:
+        if pager is not None:
+            chunks = database.execute_stream(query_output, pager.chunk_size, pager.max_rows)
+            paged = pager.collect({"rows": process_data(chunk["rows"])} if "rows" in chunk else chunk for chunk in chunks)
+            return {'query': query, 'explain': explain_output, **paged, 'executed': True}
+        metadata = database.execute(query_output)
         return {
             'query': query, 
-            'explain': explain_output + '\n\n💡 Query generated successfully.', 
+            'explain': explain_output, 
+            'rows': process_data(metadata['rows']), 
+            'columns': metadata['columns'],
+            'executed': True
+        }
+    except Exception as db_error:
+        logger.warning(f"Database execution failed: {str(db_error)}")
+        return {
+            'query': query, 
+            'explain': explain_output, 
             'rows': [], 
             'columns': [],
-            'executed': False,
-            'note': 'Query generated successfully.'
+            'error': f'Execution failed: {str(db_error)}',
+            'executed': False
         }
-            
-    except Exception as e:
-        logger.error(f"SQL query processing error: {str(e)}")
-        raise
+
+
+def _generated_only(query_output: str, explain_output: str = "") -> Dict[str, Any]:
+    """Return a generated query without execution."""
+    return {
+        'query': markdownSQL(query_output), 
+        'explain': explain_output + '\n\n💡 Query generated successfully.', 
+        'rows': [], 
+        'columns': [],
+        'executed': False,
+        'note': 'Query generated successfully.'
+    }
+
+
+def prepare_sql_batch(schema: str, model: str, execute_query: bool = True, pool_size: int = 4, pager: Any = None) -> Dict[str, Any]:
+    """Prepare everything a batch of questions against one schema shares.
+    
+    The schema is fingerprinted (and indexed for schema linking) once, a
+    specialist crew per concurrent question is built ahead of time, and the
+    database is set up once with a connection pool of ``pool_size`` for
+    executing the generated queries.
+    
+    Args:
+        schema: SQL schema
+        model: AI model to use
+        execute_query: Whether generated queries are executed
+        pool_size: Number of pooled database connections and prebuilt crews
+        pager: ``ResultPager`` for the rows of the executed queries (see ``process_sql_query``)
+        
+    Returns:
+        Batch context for ``process_sql_batch_question``; release it with ``close_sql_batch``
+    """
+    crew_pool.prewarm("specialist", model, pool_size)
+    fingerprint = schema_fingerprint(schema)
+    if schema_linker is not None:
+        schema_linker.index(schema, fingerprint)
+    batch = {
+        'schema': schema,
+        'fingerprint': fingerprint,
+        'model': model,
+        'database': None,
+        'pager': pager
+    }
+    if execute_query:
+        database = DatabaseManager("mysql")
+        try:
+            if database.setup(schema):
+                database.open_pool(pool_size)
+                batch['database'] = database
+            else:
+                logger.warning("Database setup failed, batch queries will not be executed")
+        except Exception as db_error:
+            logger.warning(f"Database setup failed, batch queries will not be executed: {str(db_error)}")
+    return batch
+
+
+def process_sql_batch_question(batch: Dict[str, Any], requirement: str) -> Dict[str, Any]:
+    """Generate (and execute) the SQL for one question of a prepared batch.
+    
+    Args:
+        batch: Context returned by ``prepare_sql_batch``
+        requirement: User's query requirement
+        
+    Returns:
+        Dictionary containing query, explanation, rows, and columns
+    """
+    cache_hit = _cached_sql(requirement, batch['fingerprint'], batch['model'])
+    cascade = None
+    if cache_hit:
+        query_output = cache_hit["sql"]
+    else:
+        explain_on = batch['database'] if sql_cascade is not None and sql_cascade.explain else None
+        query_output, cascade = _generate_sql(requirement, batch['schema'], batch['fingerprint'], batch['model'],
+                                              database=explain_on)
+    if batch['database'] is not None:
+        result = _execute_sql(batch['database'], query_output, pager=batch['pager'])
+    else:
+        result = _generated_only(query_output)
+    return _remember_sql(requirement, batch['fingerprint'], batch['model'], None, query_output, result, cache_hit, cascade)
+
+
+def close_sql_batch(batch: Dict[str, Any]) -> None:
+    """Release the connection pool of a prepared batch."""
+    if batch.get('database') is not None:
+        batch['database'].close_pool()
+
+
+def _contextualize_requirement(requirement: str, history: List[str] = None) -> str:
+    """Prefix the requirement with the conversation messages kept by the token budget, if any."""
+    if not history:
+        return requirement
+    return "\n\nPrevious conversation:\n" + "\n".join(history) + "\n\nCurrent question:\n" + requirement
+
+
+def stream_sql_generation(requirement: str, schema: str, model: str, chat_history: List[Dict[str, str]] = None) -> Iterator[Dict[str, Any]]:
+    """Generate a SQL query, yielding tokens as the model produces them.
+    
+    Generation goes through the same cache, engine and cascade as
+    ``process_sql_query``. Tokens are only streamed for the direct Ollama
+    engine without a cascade: CrewAI only returns once a crew has finished,
+    and cascade drafts are validated before one is accepted, so those send
+    the ``sql`` event alone. Cascade drafts are not EXPLAINed here, since the
+    database is only set up by ``stream_query_rows``. Once the query has been
+    executed, pass the answer to ``remember_streamed_sql`` to cache it.
+    
+    Args:
+        requirement: User's query requirement
+        schema: SQL schema
+        model: AI model to use
+        chat_history: Previous conversation messages for context
+        
+    Yields:
+        ``token`` events, followed by a single ``sql`` event with the extracted
+        query and, like the ``/ask-chat`` answer, its ``cache`` or ``cascade`` field
+    """
+    fingerprint = schema_fingerprint(schema)
+    cache_hit = _cached_sql(requirement, fingerprint, model, chat_history)
+    if cache_hit:
+        cache = {'match': cache_hit['match'], 'similarity': cache_hit['similarity'], 'question': cache_hit['question']}
+        yield {"event": "sql", "data": {"query": markdownSQL(cache_hit["sql"]), "sql": cache_hit["sql"], "cache": cache}}
+        return
+    
+    if sql_cascade is not None or SQL_ENGINE != "ollama":
+        query_output, cascade = _generate_sql(requirement, schema, fingerprint, model, chat_history)
+        data = {"query": markdownSQL(query_output), "sql": query_output}
+        if cascade:
+            data["cascade"] = cascade
+        yield {"event": "sql", "data": data}
+        return
+    
+    plan = _plan_prompt(requirement, schema, fingerprint, model, chat_history)
+    prompt = dedent(DESIGN_TASK_DESCRIPTION(plan['schema'], plan['requirement']))
+    
+    raw_output = []
+    if model_lifecycle is not None:
+        model_lifecycle.touch(model)
+    for token in ollama_client.stream_generate(model, prompt, system=SQL_SYSTEM_PROMPT, options=plan['options']):
+        raw_output.append(token)
+        yield {"event": "token", "data": token}
+    
+    query_output = extractMarkdown("".join(raw_output))
+    yield {"event": "sql", "data": {"query": markdownSQL(query_output), "sql": query_output}}
+
+
+def remember_streamed_sql(requirement: str, schema: str, model: str, chat_history: List[Dict[str, str]],
+                          sql: str, result: Dict[str, Any]) -> None:
+    """Cache SQL from ``stream_sql_generation`` once it has been validated by executing it.
+    
+    Args:
+        requirement: User's query requirement
+        schema: SQL schema
+        model: AI model to use
+        chat_history: Previous conversation messages for context
+        sql: The ``sql`` of the ``sql`` event
+        result: The streamed answer, with ``executed``, ``columns`` and the
+            ``cache`` field of the ``sql`` event if it was a cache hit
+    """
+    if not result.get('cache'):
+        _remember_sql(requirement, schema_fingerprint(schema), model, chat_history, sql, result, None)
+
+
+def stream_query_rows(schema: str, sql: str, chunk_size: int = 500, max_rows: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Execute a generated query, yielding result rows in chunks as they are fetched.
+    
+    Args:
+        schema: SQL schema used to set up the database if needed
+        sql: The query to execute
+        chunk_size: Number of rows per ``rows`` event
+        max_rows: Stop after this many rows, reporting ``truncated`` in the ``done`` event
+        
+    Yields:
+        A ``columns`` event, ``rows`` events, then a ``done`` event; an
+        ``error`` event precedes ``done`` if execution fails
+    """
+    database = DatabaseManager("mysql")
+    row_count = 0
+    truncated = False
+    try:
+        if not database.setup(schema):
+            raise RuntimeError("Database setup failed")
+        for chunk in database.execute_stream(sql, chunk_size, max_rows):
+            if "columns" in chunk:
+                yield {"event": "columns", "data": chunk["columns"]}
+            elif "rows" in chunk:
+                rows = process_data(chunk["rows"])
+                row_count += len(rows)
+                yield {"event": "rows", "data": rows}
+            else:
+                truncated = True
+        yield {"event": "done", "data": {"executed": True, "row_count": row_count, "truncated": truncated}}
+    except Exception as db_error:
+        logger.warning(f"Database execution failed: {str(db_error)}")
+        yield {"event": "error", "data": {"error": f"Execution failed: {str(db_error)}"}}
+        yield {"event": "done", "data": {"executed": False, "row_count": row_count}}
 
 
 class DatabaseDiscoveryState(TypedDict):
@@ -24,36 +24,13 @@ os.environ["OLLAMA_BASE_URL"] = "http://localhost:11434"
 
 from textwrap import dedent
 from crewai import Agent
-import requests
+from sql_bigbrother.pipelines.sql_processing.services.model_registry import model_registry
 
 class SQLAgents():
     def __init__(self):
-        self.default_model = self._get_best_available_model()
+        # Cached and refreshed in the background, so constructing agents does no network I/O
+        self.default_model = model_registry.default_model()
         
-    def _get_best_available_model(self):
-        """Get the best available Ollama model, fallback to a reasonable default."""
-        try:
-            response = requests.get("http://localhost:11434/api/tags", timeout=2)
-            if response.status_code == 200:
-                models = response.json().get("models", [])
-                model_names = [model["name"] for model in models]
-                
-                # Prefer smaller, faster models for title/recommendation tasks
-                preferred_order = ["qwen2.5:7b", "qwen2.5:14b", "qwen3:14b", "qwen3:30b", "gpt-oss:20b", "gemma2:9b", "llama3:8b"]
-                
-                for preferred in preferred_order:
-                    if preferred in model_names:
-                        return preferred
-                        
-                # If none of the preferred models, use the first available
-                if model_names:
-                    return model_names[0]
-                    
-        except Exception:
-            pass
-            
-        # Default fallback
-        return "qwen2.5:7b"
     def sql_specialist_agent(self, model=None):
         model = model or self.default_model
         return Agent(
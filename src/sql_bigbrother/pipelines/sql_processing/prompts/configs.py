@@ -14,6 +14,9 @@ GROQ_API_BASE = os.getenv('GROQ_API_BASE')
 GROQ_MODEL_NAME = os.getenv('GROQ_MODEL_NAME')
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
 
+# SQL generation engine: "crewai" (specialist agent crew) or "ollama" (direct prompt, no agent scaffolding)
+SQL_ENGINE = os.getenv('SQL_ENGINE', 'crewai').lower()
+
 
 # ------------------------------------------------ SQL SPECIALIST ----------------------------------------------
 SPECIALIST_AGENT_ROLE = 'SQL Specialist'
@@ -67,6 +70,10 @@ DESIGN_TASK_EXPECTED_OUTPUT = """
                 - **SQL Query** (output)
             """
 
+# System prompt used when the specialist prompt is sent to Ollama directly (no CrewAI scaffolding)
+SQL_SYSTEM_PROMPT = """You are a SQL Specialist who writes MySQL queries.
+Reply with exactly one MySQL query inside a ```sql code block and nothing else."""
+
 
 # ------------------------------------------------ SQL EXPERT ----------------------------------------------
 EXPERT_AGENT_ROLE = 'SQL Expert'
@@ -0,0 +1,153 @@
+"""Prebuilt, reusable CrewAI crews pooled per (role, model)."""
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from crewai import Crew, Process
+from .agents import SQLAgents
+from .tasks import SQLTasks
+from sql_bigbrother.pipelines.sql_processing.services.model_registry import model_registry
+from sql_bigbrother.pipelines.sql_processing.services.model_lifecycle import model_lifecycle
+
+logger = logging.getLogger(__name__)
+
+
+class CrewTemplate:
+    """A crew built once with ``{requirement}``/``{schema}`` placeholders in its tasks.
+
+    CrewAI keeps the original task descriptions and interpolates the
+    ``inputs`` given to ``kickoff`` on every run, so the same agents, tasks
+    and crew can answer many requests, one at a time.
+    """
+
+    def __init__(self, crew: Crew):
+        self.crew = crew
+        self.uses = 0
+
+    def kickoff(self, **inputs: str) -> Any:
+        """Kick off the crew with ``inputs`` and return CrewAI's ``CrewOutput``."""
+        self.uses += 1
+        return self.crew.kickoff(inputs=inputs)
+
+    def run(self, **inputs: str) -> List[str]:
+        """Kick off the crew and return the raw output of each task, in order."""
+        self.kickoff(**inputs)
+        return [task.output.raw for task in self.crew.tasks]
+
+    def reset(self) -> None:
+        """Drop everything the last run left behind before the next lease."""
+        for task in self.crew.tasks:
+            task.output = None
+        for agent in self.crew.agents:
+            if getattr(agent, "tools_results", None):
+                agent.tools_results = []
+
+
+def _specialist_crew(agents: SQLAgents, tasks: SQLTasks, model: str) -> Crew:
+    specialist = agents.sql_specialist_agent(model)
+    design_task = tasks.sql_design_task(specialist, "{requirement}", "{schema}")
+    return Crew(agents=[specialist], tasks=[design_task], verbose=True)
+
+
+def _specialist_expert_crew(agents: SQLAgents, tasks: SQLTasks, model: str) -> Crew:
+    specialist = agents.sql_specialist_agent(model)
+    expert = agents.sql_expert_agent(model)
+    design_task = tasks.sql_design_task(specialist, "{requirement}", "{schema}")
+    analyze_task = tasks.sql_expert_task(expert, design_task)
+    return Crew(agents=[specialist, expert], tasks=[design_task, analyze_task], verbose=True, process=Process.sequential)
+
+
+# Title and recommendations do not depend on each other, so they are separate
+# crews that can run side by side
+def _title_crew(agents: SQLAgents, tasks: SQLTasks, model: str) -> Crew:
+    title_agent = agents.sql_title_agent(model)
+    return Crew(agents=[title_agent], tasks=[tasks.sql_title_task(title_agent, "{schema}")], verbose=True)
+
+
+def _recommend_crew(agents: SQLAgents, tasks: SQLTasks, model: str) -> Crew:
+    recommended_agent = agents.sql_recommended_agent(model)
+    return Crew(agents=[recommended_agent], tasks=[tasks.sql_recommended_task(recommended_agent, "{schema}")], verbose=True)
+
+
+CREW_BUILDERS: Dict[str, Callable[[SQLAgents, SQLTasks, str], Crew]] = {
+    "specialist": _specialist_crew,
+    "specialist+expert": _specialist_expert_crew,
+    "title": _title_crew,
+    "recommend": _recommend_crew,
+}
+
+
+class CrewPool:
+    """Idle ``CrewTemplate`` instances keyed by (role, model).
+
+    ``lease`` hands out an idle template, or builds one when all are busy, and
+    takes it back reset once the caller is done. A template is used by one
+    request at a time; at most ``max_idle`` are kept per key, and a template is
+    rebuilt after ``max_uses`` runs so state CrewAI accumulates per run stays
+    bounded.
+    """
+
+    def __init__(self, max_idle: int = 4, max_uses: int = 200):
+        self.max_idle = max_idle
+        self.max_uses = max_uses
+        self._idle: Dict[Tuple[str, str], List[CrewTemplate]] = {}
+        self._lock = threading.Lock()
+        self.built = 0
+        self.reused = 0
+
+    def _build(self, role: str, model: str) -> CrewTemplate:
+        self.built += 1
+        return CrewTemplate(CREW_BUILDERS[role](SQLAgents(), SQLTasks(), model))
+
+    @contextmanager
+    def lease(self, role: str, model: Optional[str] = None) -> Iterator[CrewTemplate]:
+        """Borrow a template for ``role``; the default model is used when ``model`` is empty."""
+        key = (role, model or model_registry.default_model())
+        if model_lifecycle is not None:
+            model_lifecycle.touch(key[1])
+        with self._lock:
+            idle = self._idle.get(key)
+            template = idle.pop() if idle else None
+            if template is not None:
+                self.reused += 1
+        if template is None:
+            template = self._build(*key)
+
+        healthy = False
+        try:
+            yield template
+            healthy = True
+        finally:
+            # A failed run may leave the crew mid-execution; build a fresh one next time
+            if healthy and template.uses < self.max_uses:
+                template.reset()
+                with self._lock:
+                    idle = self._idle.setdefault(key, [])
+                    if len(idle) < self.max_idle:
+                        idle.append(template)
+
+    def prewarm(self, role: str, model: Optional[str] = None, count: int = 1) -> None:
+        """Build ``count`` idle templates ahead of the first request."""
+        key = (role, model or model_registry.default_model())
+        templates = [self._build(*key) for _ in range(count)]
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            idle.extend(templates[:max(0, self.max_idle - len(idle))])
+
+    def stats(self) -> Dict[str, Any]:
+        """Return build/reuse counters and idle templates per key."""
+        with self._lock:
+            return {
+                "built": self.built,
+                "reused": self.reused,
+                "idle": {f"{role}/{model}": len(idle) for (role, model), idle in self._idle.items()}
+            }
+
+
+crew_pool = CrewPool(
+    max_idle=int(os.getenv('CREW_POOL_MAX_IDLE', '4')),
+    max_uses=int(os.getenv('CREW_POOL_MAX_USES', '200'))
+)
@@ -18,8 +18,6 @@ class SQLTasks():
     def sql_expert_task(self, agent, context):
         return Task(
             description=dedent(EXPERT_TASK_DESCRIPTION),
-            output_file='outputs/result.txt',
-            create_directory=True,
             agent=agent,
             expected_output=EXPERT_TASK_EXPECTED_OUTPUT
         )
@@ -0,0 +1,135 @@
+"""Optional archive of crew task artifacts, written off the request path."""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactStore:
+    """Append-only archive of task artifacts, one JSON Lines file per request.
+
+    ``append`` only queues a record, so requests never wait on the disk. A
+    background thread writes what is queued every ``flush_interval`` seconds,
+    or as soon as ``max_batch`` records are waiting, opening each request's
+    file once per batch. Files live under a directory per day and are never
+    rewritten. When more than ``max_queue`` records are waiting (the disk is
+    slow or gone), new ones are dropped and counted rather than held.
+    """
+
+    def __init__(self, directory: str, flush_interval: float = 2.0, max_batch: int = 256, max_queue: int = 10000):
+        self.directory = Path(directory)
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self._queue: List[Tuple[str, Dict[str, Any]]] = []
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self.appended = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name="artifact-store", daemon=True)
+        self._thread.start()
+
+    def append(self, request_id: str, name: str, content: Any) -> bool:
+        """Queue an artifact of a request for archiving.
+
+        Args:
+            request_id: Request the artifact belongs to; its file name
+            name: What the artifact is (e.g. the task that produced it)
+            content: JSON-serializable artifact
+
+        Returns:
+            False when the artifact was dropped because the queue is full
+        """
+        record = {"time": time.time(), "name": name, "content": content}
+        with self._condition:
+            if self._closed or len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                return False
+            self._queue.append((re.sub(r"[^\w.-]", "_", request_id), record))
+            self.appended += 1
+            if len(self._queue) >= self.max_batch:
+                self._condition.notify()
+        return True
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if not self._closed and len(self._queue) < self.max_batch:
+                    self._condition.wait(self.flush_interval)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def flush(self) -> int:
+        """Write everything queued now, returning the number of records written."""
+        with self._write_lock:
+            with self._condition:
+                batch, self._queue = self._queue, []
+            if not batch:
+                return 0
+
+            by_request: Dict[str, List[Dict[str, Any]]] = {}
+            for request_id, record in batch:
+                by_request.setdefault(request_id, []).append(record)
+            day = self.directory / time.strftime("%Y-%m-%d")
+            written = 0
+            try:
+                day.mkdir(parents=True, exist_ok=True)
+                for request_id, records in by_request.items():
+                    with open(day / f"{request_id}.jsonl", "a", encoding="utf-8") as handle:
+                        handle.write("".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in records))
+                    written += len(records)
+            except OSError as e:
+                logger.error(f"Could not archive {len(batch) - written} artifact(s) to {day}: {e}")
+                with self._condition:
+                    self.errors += 1
+                    self.dropped += len(batch) - written
+            with self._condition:
+                self.written += written
+                self.batches += 1
+            return written
+
+    def close(self) -> None:
+        """Write what is still queued and stop the background writer."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join(timeout=10)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue and write counters."""
+        with self._condition:
+            return {
+                "directory": str(self.directory),
+                "queued": len(self._queue),
+                "appended": self.appended,
+                "written": self.written,
+                "dropped": self.dropped,
+                "batches": self.batches,
+                "errors": self.errors
+            }
+
+
+def _create_artifact_store() -> Optional[ArtifactStore]:
+    if os.getenv('ARTIFACT_ARCHIVE', 'off').lower() not in ('on', 'true', '1'):
+        return None
+    return ArtifactStore(
+        os.getenv('ARTIFACT_DIR', 'data/artifacts'),
+        flush_interval=float(os.getenv('ARTIFACT_FLUSH_SECONDS', '2')),
+        max_batch=int(os.getenv('ARTIFACT_BATCH_SIZE', '256'))
+    )
+
+
+artifact_store = _create_artifact_store()
@@ -0,0 +1,111 @@
+"""Small-to-large model cascade for SQL generation."""
+
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SQLCascade:
+    """Tries the cheapest model first and escalates only when its SQL fails validation.
+
+    ``tiers`` lists the draft models from small to large; the model a request
+    asks for (or the default model) is always the last tier. A tier's answer
+    is used when ``validate`` accepts it. The last tier's answer is used
+    either way, because there is nothing left to escalate to. Hit rate and
+    latency are recorded per model.
+    """
+
+    def __init__(self, tiers: List[str], explain: bool = False, latency_window: int = 200):
+        self.tiers = tiers
+        self.explain = explain
+        self.latency_window = latency_window
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def models_for(self, model: str) -> List[str]:
+        """Return the models to try, in order, for a request that asked for ``model``."""
+        return [tier for tier in self.tiers if tier != model] + [model]
+
+    def run(self, model: str, generate: Callable[[str], str], validate: Callable[[str], Optional[str]]) -> Dict[str, Any]:
+        """Generate SQL with each tier until one passes validation.
+
+        Args:
+            model: The requested model, used as the last tier
+            generate: Generates the SQL with the given model
+            validate: Returns why SQL is rejected, or None
+
+        Returns:
+            ``sql``, the ``model`` and ``tier`` that produced it, and every ``attempt``
+        """
+        models = self.models_for(model)
+        attempts = []
+        for tier, name in enumerate(models):
+            last = tier == len(models) - 1
+            started = time.perf_counter()
+            try:
+                sql = generate(name)
+            except Exception as e:
+                if last:
+                    raise
+                sql, reason = "", f"generation failed: {e}"
+            else:
+                try:
+                    reason = validate(sql)
+                except Exception as e:
+                    # A broken check must not cost every tier, or the answer itself
+                    logger.exception(f"SQL cascade: validating the answer of {name} failed")
+                    reason = f"validation failed: {e}"
+            elapsed = time.perf_counter() - started
+            self._record(name, reason, elapsed)
+            attempts.append({"model": name, "seconds": round(elapsed, 2), "rejected": reason})
+            if reason is None or last:
+                if reason is not None:
+                    logger.warning(f"SQL cascade: last tier {name} also failed validation ({reason})")
+                return {"sql": sql, "model": name, "tier": tier, "attempts": attempts}
+            logger.info(f"SQL cascade: tier {tier} ({name}) rejected after {elapsed:.1f}s: {reason}; escalating")
+
+    def _record(self, model: str, reason: Optional[str], elapsed: float) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(model, {"attempts": 0, "accepted": 0, "rejected": 0, "reasons": {}})
+            stats["attempts"] += 1
+            if reason is None:
+                stats["accepted"] += 1
+            else:
+                stats["rejected"] += 1
+                # "unknown column X" and "unknown column Y" count as the same reason
+                kind = reason.split(":")[0] if ":" in reason else " ".join(reason.split()[:2])
+                stats["reasons"][kind] = stats["reasons"].get(kind, 0) + 1
+            self._latencies.setdefault(model, deque(maxlen=self.latency_window)).append(elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit rate, rejection reasons and latency per model."""
+        with self._lock:
+            models = {}
+            for model, stats in self._stats.items():
+                latencies = sorted(self._latencies.get(model, ()))
+                models[model] = {
+                    **stats,
+                    "reasons": dict(stats["reasons"]),
+                    "hit_rate": round(stats["accepted"] / stats["attempts"], 3) if stats["attempts"] else None,
+                    "latency_mean_s": round(statistics.mean(latencies), 2) if latencies else None,
+                    "latency_p50_s": round(latencies[len(latencies) // 2], 2) if latencies else None,
+                    "latency_p95_s": round(latencies[int(len(latencies) * 0.95)], 2) if latencies else None
+                }
+            return {"tiers": self.tiers, "explain": self.explain, "models": models}
+
+
+def _create_sql_cascade() -> Optional[SQLCascade]:
+    tiers = [name.strip() for name in os.getenv('SQL_CASCADE_MODELS', '').split(',') if name.strip()]
+    if not tiers:
+        return None
+    return SQLCascade(tiers, explain=os.getenv('SQL_CASCADE_EXPLAIN', 'off').lower() in ('on', 'true', '1'))
+
+
+sql_cascade = _create_sql_cascade()
@@ -1,7 +1,9 @@
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector import pooling
 import os
-from typing import Dict, Any, List
+import uuid
+from typing import Dict, Any, Iterator, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -30,19 +32,70 @@ class DatabaseManager:
             self.config['password'] = ''
         if not self.config['use_database']:
             self.config['use_database'] = 'ecommerce_db'
+        self._pool = None
+        self._pooled = []
+
+    def open_pool(self, pool_size: int = 4) -> None:
+        """Reuse a pool of connections to the use database for ``execute`` and ``execute_stream``.
+
+        Closing a pooled connection returns it to the pool, so the query
+        methods work unchanged. Call ``close_pool`` once the work is done.
+        """
+        if self._pool is not None:
+            return
+        size = max(1, min(pool_size, pooling.CNX_POOL_MAXSIZE))
+        # Pool names are global to the connector; every manager gets its own
+        pool = pooling.MySQLConnectionPool(pool_name=f"sql_bigbrother-{uuid.uuid4().hex[:12]}", pool_size=size)
+        pool.set_config(
+            host=self.config['host'],
+            user=self.config['user'],
+            password=self.config['password'],
+            database=self.config['use_database'],
+            port=self.config['port']
+        )
+        # The pool is filled with connections opened here, so close_pool can close them
+        connections = []
+        try:
+            for _ in range(size):
+                connections.append(self._connect(self.config['use_database']))
+                pool.add_connection(connections[-1])
+        except Exception:
+            for connection in connections:
+                connection.close()
+            raise
+        self._pool, self._pooled = pool, connections
+        logger.info(f"Opened connection pool of {size} to {self.config['use_database']}")
+
+    def close_pool(self) -> None:
+        """Close the connections of the pool opened by ``open_pool``.
+
+        Call it once no query is running: the connections are closed whether
+        or not they are leased.
+        """
+        if self._pool is not None:
+            for connection in self._pooled:
+                connection.close()
+            self._pool, self._pooled = None, []
+
+    def _connect(self, database: str, **kwargs):
+        """Open a MySQL connection to ``database`` using the manager's config."""
+        if self._pool is not None and database == self.config['use_database'] and not kwargs:
+            return self._pool.get_connection()
+        return mysql.connector.connect(
+            host=self.config['host'],
+            user=self.config['user'],
+            password=self.config['password'],
+            database=database,
+            port=self.config['port'],
+            **kwargs
+        )
 
     def execute(self, ssql: str) -> Dict[str, Any]:
         """Execute SQL query and return results."""
         connection = None
         try:
             logger.info(f"Connecting to database: {self.config['use_database']} on {self.config['host']}:{self.config['port']}")
-            connection = mysql.connector.connect(
-                host=self.config['host'],
-                user=self.config['user'],
-                password=self.config['password'],
-                database=self.config['use_database'],
-                port=self.config['port']
-            )
+            connection = self._connect(self.config['use_database'])
 
             if connection.is_connected():
                 cursor = connection.cursor()
@@ -69,19 +122,70 @@ class DatabaseManager:
                 connection.close()
                 print("MySQL connection is closed")
     
+    def execute_stream(self, ssql: str, chunk_size: int = 500, max_rows: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Execute SQL query and yield the columns, then rows in chunks as they are fetched.
+
+        Unlike ``execute``, errors are raised to the caller so a stream can
+        report them after it has started. With ``max_rows``, at most that
+        many rows are yielded, followed by ``{"truncated": True}`` when the
+        query returned more.
+        """
+        logger.info(f"Connecting to database: {self.config['use_database']} on {self.config['host']}:{self.config['port']}")
+        connection = self._connect(self.config['use_database'])
+        cursor = connection.cursor()
+        try:
+            if max_rows is not None:
+                # The server stops one row past the cap, unless the query has a LIMIT of its own.
+                # Closing the connection (or returning it to the pool) resets the session
+                cursor.execute(f"SET SESSION sql_select_limit = {int(max_rows) + 1}")
+            logger.info(f"Executing query: {ssql[:100]}...")
+            cursor.execute(ssql)
+            yield {"columns": [i[0] for i in cursor.description] if cursor.description else []}
+
+            total = 0
+            while True:
+                size = chunk_size if max_rows is None else max(1, min(chunk_size, max_rows - total))
+                rows = cursor.fetchmany(size)
+                if not rows:
+                    break
+                if max_rows is not None and total >= max_rows:
+                    yield {"truncated": True}
+                    # The rest must be read before the connection can run another statement
+                    while cursor.fetchmany(chunk_size):
+                        pass
+                    break
+                total += len(rows)
+                yield {"rows": rows}
+            logger.info(f"Query streamed successfully, returned {total} rows")
+        finally:
+            cursor.close()
+            connection.close()
+
+    def explain(self, ssql: str) -> Optional[str]:
+        """Ask MySQL to plan a query without running it.
+
+        Returns:
+            The MySQL error when the query cannot be planned, or None when it can.
+            Connection errors are raised, since they say nothing about the query.
+        """
+        connection = self._connect(self.config['use_database'])
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN {ssql.strip().rstrip(';')}")
+            cursor.fetchall()
+            return None
+        except mysql.connector.Error as e:
+            return e.msg
+        finally:
+            cursor.close()
+            connection.close()
+
     def setup(self, schema: str) -> bool:
         """Setup database with provided schema."""
         connection = None
         try:
             logger.info(f"Setting up database: {self.config['use_database']}")
-            connection = mysql.connector.connect(
-                host=self.config['host'],
-                user=self.config['user'],
-                password=self.config['password'],
-                database=self.config['setup_database'],
-                autocommit=False,
-                port=self.config['port']
-            )
+            connection = self._connect(self.config['setup_database'], autocommit=False)
             
             if connection.is_connected():
                 cursor = connection.cursor()
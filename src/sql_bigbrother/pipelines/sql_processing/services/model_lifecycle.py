@@ -0,0 +1,244 @@
+"""Keeps the models we use loaded in Ollama, and tracks which ones are."""
+
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sql_bigbrother.pipelines.sql_processing.services.ollama import OllamaClient, ollama_client
+
+logger = logging.getLogger(__name__)
+
+UNLOADED = "unloaded"
+LOADING = "loading"
+LOADED = "loaded"
+FAILED = "failed"
+
+
+def _model_name(model: str) -> str:
+    # Ollama reports "llama3" as "llama3:latest"
+    return model if ":" in model else f"{model}:latest"
+
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    """Parse Ollama's RFC 3339 times, which carry nanoseconds that ``fromisoformat`` rejects before 3.11."""
+    if not value:
+        return None
+    value = re.sub(r"(\.\d{6})\d+", r"\1", value).replace("Z", "+00:00")
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+class ModelLifecycle:
+    """Preloads models into Ollama and keeps the hot ones resident.
+
+    Ollama unloads a model once its ``keep_alive`` runs out, and the next
+    request then waits for the whole load (often 10-30s on CPU). ``start``
+    loads the ``preload`` models (or the default model) with a zero-token
+    generation, then every ``refresh_seconds`` reads what Ollama has loaded
+    and reloads each hot model that is gone or expires before the next two
+    refreshes. Preloaded models are always hot; other models are hot for
+    ``hot_seconds`` after their last ``touch``. Only installed models are
+    tracked, and a model that is not preloaded is forgotten when it fails to
+    load. Reloading a resident model only resets its expiry.
+
+    Each model's state (``unloaded``, ``loading``, ``loaded`` or ``failed``)
+    is kept in memory and reads never touch the network.
+    """
+
+    def __init__(self, client: OllamaClient, preload: Optional[List[str]] = None,
+                 refresh_seconds: float = 120, hot_seconds: float = 900):
+        self.client = client
+        self.preload = preload or []
+        self.refresh_seconds = refresh_seconds
+        self.hot_seconds = hot_seconds
+        self._models: Dict[str, Dict[str, Any]] = {}
+        self._pinned: List[str] = []
+        self._installed: Optional[Callable[[], List[str]]] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.loads = 0
+        self.refreshes = 0
+        self.evictions = 0
+        self._last_error: Optional[str] = None
+
+    def _entry(self, model: str) -> Dict[str, Any]:
+        return self._models.setdefault(_model_name(model), {
+            "state": UNLOADED,
+            "expires_at": None,
+            "last_used": None,
+            "loaded_at": None,
+            "load_seconds": None,
+            "size_vram": None,
+            "error": None
+        })
+
+    def state(self, model: str) -> str:
+        """Return the last known load state of ``model`` without network I/O."""
+        entry = self._models.get(_model_name(model))
+        return entry["state"] if entry else UNLOADED
+
+    def is_loaded(self, model: str) -> bool:
+        return self.state(model) == LOADED
+
+    def touch(self, model: Optional[str]) -> None:
+        """Record that a request used ``model``, which keeps it hot for ``hot_seconds``."""
+        if not model:
+            return
+        # Requests may name any model; only the ones Ollama has are worth keeping loaded
+        if self._installed is not None and _model_name(model) not in {_model_name(name) for name in self._installed()}:
+            return
+        with self._lock:
+            self._entry(model)["last_used"] = time.time()
+
+    def load(self, model: str) -> bool:
+        """Load ``model`` now (blocking), or extend its residency if it is loaded.
+
+        Returns:
+            Whether Ollama has the model loaded afterwards
+        """
+        with self._lock:
+            entry = self._entry(model)
+            if entry["state"] == LOADING:
+                return False
+            previous = entry["state"]
+            entry["state"] = LOADING
+        started = time.perf_counter()
+        try:
+            self.client.load(model)
+        except Exception as e:
+            with self._lock:
+                entry.update(state=FAILED, error=str(e))
+                # Preloaded models keep their failed state and are retried on every refresh
+                if _model_name(model) not in self._pinned:
+                    self._models.pop(_model_name(model), None)
+            logger.warning(f"Could not load {model} into Ollama: {e}")
+            return False
+
+        elapsed = time.perf_counter() - started
+        keep_alive = self.client.keep_alive_for(model)
+        with self._lock:
+            entry.update(state=LOADED, error=None)
+            if previous != LOADED:
+                self.loads += 1
+                entry.update(loaded_at=time.time(), load_seconds=round(elapsed, 2))
+                logger.info(f"Loaded {model} into Ollama in {elapsed:.1f}s (keep_alive={keep_alive})")
+            else:
+                self.refreshes += 1
+        return True
+
+    def sync(self) -> None:
+        """Update the states from the models Ollama reports as loaded."""
+        try:
+            running = {model["name"]: model for model in self.client.running()}
+            self._last_error = None
+        except Exception as e:
+            self._last_error = str(e)
+            logger.warning(f"Could not read the loaded Ollama models: {e}")
+            return
+        with self._lock:
+            for name, model in running.items():
+                entry = self._entry(name)
+                if entry["state"] != LOADED:
+                    entry["loaded_at"] = entry["loaded_at"] or time.time()
+                entry.update(state=LOADED, expires_at=_timestamp(model.get("expires_at")),
+                             size_vram=model.get("size_vram"), error=None)
+            for name, entry in self._models.items():
+                if name not in running and entry["state"] == LOADED:
+                    entry.update(state=UNLOADED, expires_at=None)
+                    self.evictions += 1
+                    logger.info(f"Ollama unloaded {name}")
+
+    def _hot(self, now: float) -> List[Tuple[str, str, Optional[float]]]:
+        """Return (name, state, expires_at) of the hot models, read under the lock."""
+        with self._lock:
+            return [
+                (name, entry["state"], entry["expires_at"]) for name, entry in self._models.items()
+                if name in self._pinned or (entry["last_used"] and now - entry["last_used"] < self.hot_seconds)
+            ]
+
+    def refresh(self) -> None:
+        """Sync the states, then reload the hot models that are gone or expire soon."""
+        self.sync()
+        now = time.time()
+        for name, state, expires_at in self._hot(now):
+            # A model with keep_alive=-1 never expires; Ollama reports a date far in the future
+            if state != LOADED or (expires_at is not None and expires_at - now < 2 * self.refresh_seconds):
+                self.load(name)
+
+    def start(self, default_model: Callable[[], str], installed: Optional[Callable[[], List[str]]] = None) -> None:
+        """Preload models now and refresh every ``refresh_seconds`` on a daemon thread.
+
+        Args:
+            default_model: Returns the model to preload when no ``preload`` models are configured
+            installed: Returns the installed model names (without network I/O); ``touch``
+                ignores other models
+        """
+        if self._thread is not None:
+            return
+        self._installed = installed
+
+        def loop():
+            models = self.preload or [default_model()]
+            with self._lock:
+                self._pinned = [_model_name(model) for model in models]
+                for model in models:
+                    self._entry(model)
+            self.sync()
+            # One at a time: loading several models at once only slows each of them down
+            for model in models:
+                if not self.is_loaded(model):
+                    self.load(model)
+            while not self._stop.wait(self.refresh_seconds):
+                self.refresh()
+
+        self._thread = threading.Thread(target=loop, name="model-lifecycle", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the refresh thread; loaded models stay until their keep_alive runs out."""
+        self._stop.set()
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the state of every known model and the load counters."""
+        now = time.time()
+        with self._lock:
+            models = {
+                name: {
+                    **entry,
+                    "hot": name in self._pinned or bool(entry["last_used"] and now - entry["last_used"] < self.hot_seconds),
+                    "keep_alive": self.client.keep_alive_for(name),
+                    "expires_in_s": round(entry["expires_at"] - now) if entry["expires_at"] else None
+                }
+                for name, entry in self._models.items()
+            }
+            return {
+                "models": models,
+                "preload": list(self._pinned),
+                "refresh_seconds": self.refresh_seconds,
+                "loads": self.loads,
+                "refreshes": self.refreshes,
+                "evictions": self.evictions,
+                "last_error": self._last_error
+            }
+
+
+def _create_model_lifecycle() -> Optional[ModelLifecycle]:
+    if os.getenv('OLLAMA_LIFECYCLE', 'on').lower() in ('off', 'false', '0'):
+        return None
+    return ModelLifecycle(
+        ollama_client,
+        preload=[name.strip() for name in os.getenv('OLLAMA_PRELOAD_MODELS', '').split(',') if name.strip()],
+        refresh_seconds=float(os.getenv('OLLAMA_RESIDENCY_REFRESH_SECONDS', '120')),
+        hot_seconds=float(os.getenv('OLLAMA_HOT_SECONDS', '900'))
+    )
+
+
+model_lifecycle = _create_model_lifecycle()
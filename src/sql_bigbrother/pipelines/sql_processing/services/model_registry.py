@@ -0,0 +1,136 @@
+"""Process-wide cache of the models available in Ollama."""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sql_bigbrother.pipelines.sql_processing.services.model_lifecycle import ModelLifecycle, model_lifecycle
+from sql_bigbrother.pipelines.sql_processing.services.ollama import OllamaClient, ollama_client
+
+logger = logging.getLogger(__name__)
+
+# Prefer smaller, faster models for title/recommendation tasks
+PREFERRED_MODELS = ["qwen2.5:7b", "qwen2.5:14b", "qwen3:14b", "qwen3:30b", "gpt-oss:20b", "gemma2:9b", "llama3:8b"]
+FALLBACK_MODEL = "qwen2.5:7b"
+
+
+class ModelRegistry:
+    """Cached list of installed Ollama models and the default model chosen from it.
+
+    Reads never touch the network: they return the cached list (or the
+    fallback model before the first refresh completes) and, when the cache is
+    older than ``ttl_seconds``, start a refresh on a background thread.
+    ``start`` additionally refreshes on a fixed interval.
+
+    With a ``lifecycle``, a model Ollama already has loaded is chosen over
+    preferred models that would first have to be loaded.
+    """
+
+    def __init__(self, client: OllamaClient, ttl_seconds: float = 60, probe_timeout: float = 2,
+                 preferred: Optional[List[str]] = None, fallback: str = FALLBACK_MODEL,
+                 lifecycle: Optional[ModelLifecycle] = None):
+        self.client = client
+        self.lifecycle = lifecycle
+        self.ttl_seconds = ttl_seconds
+        self.probe_timeout = probe_timeout
+        self.preferred = preferred or PREFERRED_MODELS
+        self.fallback = fallback
+        self._models: List[str] = []
+        self._default = fallback
+        self._refreshed_at = 0.0
+        self._last_error: Optional[str] = None
+        self._refreshing = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> List[str]:
+        """Fetch the model list from Ollama now (blocking) and update the default."""
+        with self._refreshing:
+            return self._fetch()
+
+    def _fetch(self) -> List[str]:
+        try:
+            models = self.client.list_models(timeout=self.probe_timeout)
+            self._last_error = None
+        except Exception as e:
+            # Keep serving the last known list; retry after the next TTL
+            self._last_error = str(e)
+            logger.warning(f"Could not list Ollama models: {e}")
+            self._refreshed_at = time.time()
+            return self._models
+        self._models = models
+        self._default = self._choose_default(models)
+        self._refreshed_at = time.time()
+        return models
+
+    def _choose_default(self, models: List[str]) -> str:
+        # If none of the preferred models is installed, any installed model will do
+        candidates = [preferred for preferred in self.preferred if preferred in models] or models
+        if self.lifecycle is not None:
+            loaded = [model for model in candidates if self.lifecycle.is_loaded(model)]
+            if loaded:
+                return loaded[0]
+        return candidates[0] if candidates else self.fallback
+
+    def _refresh_if_stale(self) -> None:
+        if time.time() - self._refreshed_at < self.ttl_seconds or not self._refreshing.acquire(blocking=False):
+            return
+
+        def refresh_in_background():
+            try:
+                self._fetch()
+            finally:
+                self._refreshing.release()
+
+        threading.Thread(target=refresh_in_background, name="model-registry-refresh", daemon=True).start()
+
+    def models(self) -> List[str]:
+        """Return the cached model names without network I/O."""
+        self._refresh_if_stale()
+        return list(self._models)
+
+    def default_model(self) -> str:
+        """Return the preferred installed model, loaded ones first, without network I/O."""
+        self._refresh_if_stale()
+        return self._choose_default(self._models) if self._models else self._default
+
+    def installed_default(self) -> str:
+        """Return the default model, fetching the model list first if it never has been (blocking)."""
+        if not self._refreshed_at:
+            self.refresh()
+        return self.default_model()
+
+    def start(self) -> None:
+        """Refresh now and then every ``ttl_seconds`` on a daemon thread."""
+        if self._thread is not None:
+            return
+
+        def loop():
+            while not self._stop.is_set():
+                self.refresh()
+                self._stop.wait(self.ttl_seconds)
+
+        self._thread = threading.Thread(target=loop, name="model-registry", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the periodic refresh thread."""
+        self._stop.set()
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the cached models, the default, the cache age and the models' load state."""
+        return {
+            "models": list(self._models),
+            "default_model": self._choose_default(self._models) if self._models else self._default,
+            "age_s": round(time.time() - self._refreshed_at, 1) if self._refreshed_at else None,
+            "ttl_seconds": self.ttl_seconds,
+            "last_error": self._last_error,
+            "load_state": self.lifecycle.stats() if self.lifecycle is not None else None
+        }
+
+
+model_registry = ModelRegistry(ollama_client, ttl_seconds=float(os.getenv('OLLAMA_MODELS_TTL_SECONDS', '60')),
+                               lifecycle=model_lifecycle)
@@ -0,0 +1,131 @@
+import json
+import os
+import logging
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_BASE_URL = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
+# How long Ollama keeps a model loaded after a request
+OLLAMA_KEEP_ALIVE = os.getenv('OLLAMA_KEEP_ALIVE', '30m')
+# Per-model overrides, e.g. "qwen2.5:7b=-1,llama3:8b=10m"
+OLLAMA_KEEP_ALIVE_MODELS = {
+    name.strip(): value.strip()
+    for name, _, value in (item.partition('=') for item in os.getenv('OLLAMA_KEEP_ALIVE_MODELS', '').split(','))
+    if name.strip() and value.strip()
+}
+
+
+def _keep_alive_value(keep_alive: str) -> Any:
+    # Ollama takes durations ("30m") as strings but bare seconds (-1 = forever) only as numbers
+    return int(keep_alive) if keep_alive.lstrip('-').isdigit() else keep_alive
+
+
+class OllamaClient:
+    """Thin client for the Ollama HTTP API over a persistent keep-alive session."""
+
+    def __init__(self, base_url: str = OLLAMA_BASE_URL, timeout: float = 300, keep_alive: Optional[str] = OLLAMA_KEEP_ALIVE,
+                 model_keep_alive: Optional[Dict[str, str]] = None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.model_keep_alive = dict(OLLAMA_KEEP_ALIVE_MODELS if model_keep_alive is None else model_keep_alive)
+        self.session = requests.Session()
+
+    def keep_alive_for(self, model: str) -> Optional[str]:
+        """Return how long Ollama should keep ``model`` loaded after a request."""
+        return self.model_keep_alive.get(model) or self.model_keep_alive.get(model.removesuffix(":latest"), self.keep_alive)
+
+    def _payload(self, model: str, prompt: str, system: Optional[str], options: Optional[Dict[str, Any]], stream: bool) -> Dict[str, Any]:
+        payload = {"model": model, "prompt": prompt, "stream": stream}
+        keep_alive = self.keep_alive_for(model)
+        if keep_alive:
+            payload["keep_alive"] = _keep_alive_value(keep_alive)
+        if system:
+            payload["system"] = system
+        if options:
+            payload["options"] = options
+        return payload
+
+    def generate(self, model: str, prompt: str, system: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run a single non-streaming generation and return Ollama's response body."""
+        response = self.session.post(
+            f"{self.base_url}/api/generate",
+            json=self._payload(model, prompt, system, options, stream=False),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def count_tokens(self, model: str, text: str) -> int:
+        """Return how many prompt tokens ``model``'s own tokenizer makes of ``text``.
+
+        The text is sent raw (without the model's prompt template) and only one
+        token is generated. A unique first line keeps Ollama's prompt cache from
+        skipping tokens it has seen before; its two or three tokens are counted.
+        """
+        payload = self._payload(model, f"{time.time_ns()}\n{text}", None, {"num_predict": 1}, stream=False)
+        payload["raw"] = True
+        response = self.session.post(f"{self.base_url}/api/generate", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return int(response.json().get("prompt_eval_count", 0))
+
+    def show(self, model: str, timeout: float = 2) -> Dict[str, Any]:
+        """Return Ollama's details for ``model`` (``model_info``, ``parameters``, ...)."""
+        response = self.session.post(f"{self.base_url}/api/show", json={"model": model}, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def load(self, model: str) -> Dict[str, Any]:
+        """Load ``model`` into memory, or extend its residency, with a zero-token generation.
+
+        An empty prompt makes Ollama load the model and return without
+        generating; the model then stays for ``keep_alive_for(model)``.
+        """
+        response = self.session.post(
+            f"{self.base_url}/api/generate",
+            json=self._payload(model, "", None, None, stream=False),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def running(self, timeout: float = 2) -> List[Dict[str, Any]]:
+        """Return the models Ollama has loaded (``name``, ``expires_at``, ``size_vram``, ...)."""
+        response = self.session.get(f"{self.base_url}/api/ps", timeout=timeout)
+        response.raise_for_status()
+        return response.json().get("models", [])
+
+    def list_models(self, timeout: float = 2) -> List[str]:
+        """Return the names of the models installed in Ollama."""
+        response = self.session.get(f"{self.base_url}/api/tags", timeout=timeout)
+        response.raise_for_status()
+        return [model["name"] for model in response.json().get("models", [])]
+
+    def stream_generate(self, model: str, prompt: str, system: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Yield response tokens as Ollama produces them."""
+        with self.session.post(
+            f"{self.base_url}/api/generate",
+            json=self._payload(model, prompt, system, options, stream=True),
+            timeout=self.timeout,
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(f"Ollama error: {chunk['error']}")
+                token = chunk.get("response", "")
+                if token:
+                    yield token
+                if chunk.get("done"):
+                    break
+
+
+# Shared client so every request reuses the same HTTP connection pool
+ollama_client = OllamaClient()
@@ -0,0 +1,100 @@
+"""Persistent content-addressed cache of schema initialization results."""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaCache:
+    """SQLite cache of title and recommendations keyed by schema fingerprint.
+
+    Keys are fingerprints of the canonical DDL, so re-uploading a schema that
+    differs only in comments, whitespace or statement order is a hit. When the
+    stored values exceed ``max_bytes`` the least recently used entries are
+    dropped. The file is shared by every worker process.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_cache (
+                fingerprint TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value for ``fingerprint``, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM schema_cache WHERE fingerprint = ?", (fingerprint,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE schema_cache SET last_used = ? WHERE fingerprint = ?", (time.time(), fingerprint))
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, fingerprint: str, value: Dict[str, Any]) -> None:
+        """Store ``value`` for ``fingerprint`` and evict down to ``max_bytes``."""
+        encoded = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO schema_cache (fingerprint, value, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (fingerprint, encoded, len(encoded.encode("utf-8")), now, now)
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        while True:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM schema_cache").fetchone()
+            if count <= 1 or total <= self.max_bytes:
+                break
+            (oldest,) = self._conn.execute("SELECT fingerprint FROM schema_cache ORDER BY last_used LIMIT 1").fetchone()
+            self._conn.execute("DELETE FROM schema_cache WHERE fingerprint = ?", (oldest,))
+            logger.info(f"Evicted schema cache entry {oldest[:12]}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the cache size."""
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM schema_cache").fetchone()
+        return {"entries": count, "bytes": total, "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def _create_schema_cache() -> Optional[SchemaCache]:
+    if os.getenv('SCHEMA_CACHE', 'on').lower() in ('off', 'false', '0'):
+        return None
+    project_path = Path(__file__).resolve().parents[5]
+    state_dir = os.getenv('API_STATE_DIR', str(project_path / "data" / "state"))
+    path = os.getenv('SCHEMA_CACHE_PATH', os.path.join(state_dir, 'schema_cache.db'))
+    try:
+        return SchemaCache(path, max_bytes=int(os.getenv('SCHEMA_CACHE_MAX_BYTES', str(64 * 1024 * 1024))))
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Schema cache disabled, could not open {path}: {e}")
+        return None
+
+
+schema_cache = _create_schema_cache()
@@ -0,0 +1,263 @@
+"""Parsing DDL into tables and rendering them compactly for prompts."""
+
+import logging
+import os
+import re
+from typing import Any, Dict, List
+
+from sql_bigbrother.pipelines.sql_processing.services.utils import filterSchema_v2, markdownSQL
+
+logger = logging.getLogger(__name__)
+
+CREATE_TABLE = re.compile(
+    r"CREATE\s+(?:TEMPORARY\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?((?:[`\"\[]?[\w$]+[`\"\]]?\.)?[`\"\[]?[\w$]+[`\"\]]?)\s*\(",
+    re.IGNORECASE
+)
+ALTER_FOREIGN_KEY = re.compile(
+    r"ALTER\s+TABLE\s+(?:ONLY\s+)?([`\"\[\]\w$.]+)\s+ADD\s+(?:CONSTRAINT\s+\S+\s+)?FOREIGN\s+KEY\s*\(([^)]*)\)\s*"
+    r"REFERENCES\s+([`\"\[\]\w$.]+)\s*\(([^)]*)\)",
+    re.IGNORECASE
+)
+FOREIGN_KEY = re.compile(r"FOREIGN\s+KEY\s*\(([^)]*)\)\s*REFERENCES\s+([`\"\[\]\w$.]+)\s*\(([^)]*)\)", re.IGNORECASE)
+INLINE_REFERENCES = re.compile(r"\bREFERENCES\s+([`\"\[\]\w$.]+)\s*(?:\(([^)]*)\))?", re.IGNORECASE)
+PRIMARY_KEY = re.compile(r"PRIMARY\s+KEY\s*\(([^)]*)\)", re.IGNORECASE)
+# int, DECIMAL(10, 2), int unsigned, double precision, timestamp without time zone, character varying(255)
+COLUMN_TYPE = re.compile(r"(\w+(?:\s+(?:varying|precision|unsigned|without|with|time|zone)\b)*(?:\s*\([^)]*\))?)", re.IGNORECASE)
+COMMENT = re.compile(r"\bCOMMENT\s*(?:=\s*)?'((?:[^'\\]|\\.|'')*)'", re.IGNORECASE)
+CONSTRAINT_PREFIXES = ("PRIMARY", "FOREIGN", "UNIQUE", "KEY", "INDEX", "CONSTRAINT", "CHECK", "FULLTEXT", "SPATIAL", "EXCLUDE")
+
+
+def _identifier(name: str) -> str:
+    # `db`.`table` -> table
+    return name.split(".")[-1].strip("`\"[] ")
+
+
+def _identifiers(names: str) -> List[str]:
+    # "(a, `b`(10))" -> ["a", "b"]; prefix lengths and sort orders are dropped
+    return [_identifier(re.split(r"[\s(]", name.strip(), 1)[0]) for name in names.split(",") if name.strip()]
+
+
+def _closing_paren(text: str, start: int) -> int:
+    """Return the index of the parenthesis closing the one at ``start``, skipping quoted text."""
+    depth, quote, i = 0, None, start
+    while i < len(text):
+        char = text[i]
+        if quote:
+            if char == "\\":
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in "'\"`":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return len(text)
+
+
+def _split_top_level(body: str) -> List[str]:
+    """Split a CREATE TABLE body on the commas that are not inside parentheses or quotes."""
+    parts, depth, quote, current = [], 0, None, []
+    i = 0
+    while i < len(body):
+        char = body[i]
+        if quote:
+            if char == "\\" and i + 1 < len(body):
+                current.append(char)
+                i += 1
+                char = body[i]
+            elif char == quote:
+                quote = None
+        elif char in "'\"`":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            i += 1
+            continue
+        current.append(char)
+        i += 1
+    parts.append("".join(current).strip())
+    return [part for part in parts if part]
+
+
+def _leading_comment(schema: str, start: int) -> str:
+    # "-- ..." lines right above a CREATE TABLE describe the table
+    lines = schema[:start].rstrip().split("\n")
+    comments = []
+    for line in reversed(lines):
+        stripped = line.strip()
+        if not stripped.startswith("--"):
+            break
+        comments.append(stripped.lstrip("-").strip())
+    return " ".join(reversed(comments))
+
+
+def parse_schema(schema: str) -> Dict[str, Dict[str, Any]]:
+    """Parse the CREATE TABLE statements of a DDL script.
+
+    Args:
+        schema: Raw SQL schema content
+
+    Returns:
+        Tables by lower-cased name, in script order. Each table is a dict with
+        ``name``, ``ddl`` (the CREATE statement), ``comment``, ``columns``
+        (dicts with ``name``, ``type``, ``definition``, ``comment``, ``pk``)
+        and ``foreign_keys`` (``(column, table, column)`` tuples)
+    """
+    tables: Dict[str, Dict[str, Any]] = {}
+    for match in CREATE_TABLE.finditer(schema):
+        body_start = match.end() - 1
+        body_end = _closing_paren(schema, body_start)
+        statement_end = schema.find(";", body_end)
+        statement_end = len(schema) if statement_end == -1 else statement_end + 1
+        options = schema[body_end + 1:statement_end]
+
+        table_comment = COMMENT.search(options)
+        table = {
+            "name": _identifier(match.group(1)),
+            "ddl": schema[match.start():statement_end].strip(),
+            "comment": " ".join(filter(None, [_leading_comment(schema, match.start()),
+                                              table_comment.group(1) if table_comment else ""])),
+            "columns": [],
+            "foreign_keys": []
+        }
+        primary_keys = set()
+        for part in _split_top_level(schema[body_start + 1:body_end]):
+            keyword = part.split(None, 1)[0].upper()
+            if keyword in CONSTRAINT_PREFIXES:
+                primary = PRIMARY_KEY.search(part)
+                if primary and (keyword == "PRIMARY" or part.upper().startswith("CONSTRAINT")):
+                    primary_keys.update(column.lower() for column in _identifiers(primary.group(1)))
+                foreign = FOREIGN_KEY.search(part)
+                if foreign:
+                    _add_foreign_keys(table, foreign.group(1), foreign.group(2), foreign.group(3))
+                continue
+
+            name, _, definition = re.sub(r"\s+", " ", part).partition(" ")
+            column_type = COLUMN_TYPE.match(definition)
+            column_comment = COMMENT.search(definition)
+            column = {
+                "name": _identifier(name),
+                "type": column_type.group(1) if column_type else "",
+                "definition": definition.strip(),
+                "comment": column_comment.group(1) if column_comment else "",
+                "pk": bool(re.search(r"\bPRIMARY\s+KEY\b", definition, re.IGNORECASE))
+            }
+            references = INLINE_REFERENCES.search(definition)
+            if references:
+                _add_foreign_keys(table, column["name"], references.group(1), references.group(2) or column["name"])
+            table["columns"].append(column)
+
+        for column in table["columns"]:
+            column["pk"] = column["pk"] or column["name"].lower() in primary_keys
+        tables[table["name"].lower()] = table
+
+    for match in ALTER_FOREIGN_KEY.finditer(schema):
+        table = tables.get(_identifier(match.group(1)).lower())
+        if table is not None:
+            _add_foreign_keys(table, match.group(2), match.group(3), match.group(4))
+    return tables
+
+
+def _add_foreign_keys(table: Dict[str, Any], columns: str, target: str, target_columns: str) -> None:
+    for key in zip(_identifiers(columns), [_identifier(target)] * len(_identifiers(columns)), _identifiers(target_columns)):
+        if key not in table["foreign_keys"]:
+            table["foreign_keys"].append(key)
+
+
+# From fewest to most prompt tokens:
+#   minimal    Products(ProductID pk, ProductName, CategoryID->Categories.CategoryID)
+#   compact    Products(ProductID int pk, ProductName varchar, CategoryID->Categories.CategoryID)
+#   annotated  compact, plus table comments on the line above and column comments in brackets
+#   ddl        the CREATE TABLE statements as written, like filterSchema_v2
+VERBOSITY_LEVELS = ("minimal", "compact", "annotated", "ddl")
+SCHEMA_FORMAT = os.getenv('SCHEMA_FORMAT', 'compact').lower()
+if SCHEMA_FORMAT not in VERBOSITY_LEVELS:
+    logger.warning(f"Unknown SCHEMA_FORMAT '{SCHEMA_FORMAT}', using 'compact'")
+    SCHEMA_FORMAT = "compact"
+
+TYPE_ALIASES = {
+    "integer": "int",
+    "character varying": "varchar",
+    "character": "char",
+    "double precision": "double",
+    "timestamp without time zone": "timestamp",
+    "timestamp with time zone": "timestamptz",
+    "boolean": "bool"
+}
+# Type arguments that say which values a column holds; lengths such as varchar(255) do not
+VALUE_ARGUMENT_TYPES = ("enum", "set", "decimal", "numeric")
+
+
+def compact_type(column_type: str) -> str:
+    """Shorten a column type: ``VARCHAR(100)`` -> ``varchar``, ``DECIMAL(10, 2)`` -> ``decimal(10,2)``."""
+    base, _, arguments = column_type.partition("(")
+    base = re.sub(r"\s+", " ", base.strip().lower()).replace(" unsigned", "")
+    base = TYPE_ALIASES.get(base, base)
+    if arguments and base in VALUE_ARGUMENT_TYPES:
+        arguments = re.sub(r"\s*,\s*", ",", arguments.rstrip(") "))
+        return f"{base}({arguments})"
+    return base
+
+
+def render_table(table: Dict[str, Any], verbosity: str = "compact") -> str:
+    """Render one parsed table on one line (``annotated`` may add a comment line above it)."""
+    if verbosity == "ddl":
+        return table["ddl"]
+    if verbosity not in VERBOSITY_LEVELS:
+        raise ValueError(f"Unknown schema verbosity '{verbosity}', expected one of {', '.join(VERBOSITY_LEVELS)}")
+
+    foreign_keys = {column.lower(): (target, target_column) for column, target, target_column in table["foreign_keys"]}
+    columns = []
+    for column in table["columns"]:
+        reference = foreign_keys.get(column["name"].lower())
+        parts = [column["name"]]
+        # A foreign key has the type of the column it references
+        if verbosity != "minimal" and reference is None and column["type"]:
+            parts.append(compact_type(column["type"]))
+        if column["pk"]:
+            parts.append("pk")
+        text = " ".join(parts)
+        if reference is not None:
+            text += f"->{reference[0]}.{reference[1]}"
+        if verbosity == "annotated" and column["comment"]:
+            text += f" [{column['comment']}]"
+        columns.append(text)
+
+    line = f"{table['name']}({', '.join(columns)})"
+    if verbosity == "annotated" and table["comment"]:
+        return f"-- {table['comment']}\n{line}"
+    return line
+
+
+def render_tables(tables: List[Dict[str, Any]], verbosity: str = "compact") -> str:
+    """Render parsed tables for a prompt; ``ddl`` keeps the markdown SQL block of ``filterSchema_v2``."""
+    if verbosity == "ddl":
+        return markdownSQL("\n\n".join(table["ddl"] for table in tables))
+    return "\n".join(render_table(table, verbosity) for table in tables)
+
+
+def format_schema(schema: str, verbosity: str = SCHEMA_FORMAT) -> str:
+    """Render a whole DDL script at ``verbosity``.
+
+    Args:
+        schema: Raw SQL schema content
+        verbosity: One of ``VERBOSITY_LEVELS``
+
+    Returns:
+        The rendered schema; scripts without parseable CREATE TABLE
+        statements fall back to ``filterSchema_v2``
+    """
+    tables = parse_schema(schema)
+    if not tables:
+        return filterSchema_v2(schema)
+    return render_tables(list(tables.values()), verbosity)
@@ -0,0 +1,196 @@
+"""Schema linking: pick the tables of a large schema that a question is about."""
+
+import logging
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sql_bigbrother.pipelines.sql_processing.services.schema_format import SCHEMA_FORMAT, parse_schema, render_tables
+from sql_bigbrother.pipelines.sql_processing.services.sql_cache import question_terms
+from sql_bigbrother.pipelines.sql_processing.services.utils import filterSchema_v2, schema_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+def _terms(text: str) -> List[str]:
+    # OrderDetails / order_details / "order details" all become ["order", "detail"]
+    spaced = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text or "").replace("_", " ")
+    return question_terms(spaced)
+
+
+class SchemaIndex:
+    """BM25 index over the tables of one schema.
+
+    A table's document is its name (weighted ``name_weight`` times), its
+    column names and the comments on the table and its columns.
+    """
+
+    def __init__(self, tables: Dict[str, Dict[str, Any]], k1: float = 1.2, b: float = 0.75, name_weight: int = 3):
+        self.tables = tables
+        self.k1 = k1
+        self.b = b
+        self._term_frequencies: Dict[str, Dict[str, int]] = {}
+        self._document_frequencies: Dict[str, int] = {}
+        self._lengths: Dict[str, int] = {}
+        for key, table in tables.items():
+            terms = _terms(table["name"]) * name_weight + _terms(table["comment"])
+            for column in table["columns"]:
+                terms += _terms(column["name"]) + _terms(column["comment"])
+            frequencies: Dict[str, int] = {}
+            for term in terms:
+                frequencies[term] = frequencies.get(term, 0) + 1
+            self._term_frequencies[key] = frequencies
+            self._lengths[key] = len(terms)
+            for term in frequencies:
+                self._document_frequencies[term] = self._document_frequencies.get(term, 0) + 1
+        self._average_length = sum(self._lengths.values()) / max(len(tables), 1)
+
+        # Undirected FK graph for pulling in join partners
+        self.references: Dict[str, List[str]] = {key: [] for key in tables}
+        self.referenced_by: Dict[str, List[str]] = {key: [] for key in tables}
+        for key, table in tables.items():
+            for _, target, _ in table["foreign_keys"]:
+                target = target.lower()
+                if target in tables and target != key and target not in self.references[key]:
+                    self.references[key].append(target)
+                    self.referenced_by[target].append(key)
+
+    def rank(self, question: str) -> List[Tuple[str, float]]:
+        """Return (table key, BM25 score) for every table matching a term of ``question``, best first."""
+        # "top 10" says nothing about which tables to use
+        terms = {term for term in _terms(question) if not term.isdigit()}
+        scores: Dict[str, float] = {}
+        count = len(self.tables)
+        for term in terms:
+            document_frequency = self._document_frequencies.get(term)
+            if not document_frequency:
+                continue
+            idf = math.log(1 + (count - document_frequency + 0.5) / (document_frequency + 0.5))
+            for key, frequencies in self._term_frequencies.items():
+                frequency = frequencies.get(term)
+                if frequency:
+                    length_norm = 1 - self.b + self.b * self._lengths[key] / (self._average_length or 1)
+                    scores[key] = scores.get(key, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+    def select(self, question: str, top_k: int = 8, max_tables: int = 16) -> List[str]:
+        """Pick the tables for ``question``: the ``top_k`` best matches plus the FK neighbours needed to join them.
+
+        Neighbours are the tables the matches reference and junction tables
+        that reference two or more matches. At most ``max_tables`` are
+        returned, most relevant first: matches by score, then junctions, then
+        referenced tables. Questions that match nothing get the most
+        referenced tables.
+        """
+        ranked = [key for key, _ in self.rank(question)[:top_k]]
+        if not ranked:
+            ranked = sorted(self.tables, key=lambda key: len(self.referenced_by[key]), reverse=True)[:top_k]
+
+        selected = list(ranked)
+        matched = set(ranked)
+        junctions = [key for key in self.tables
+                     if key not in matched and len(matched.intersection(self.references[key])) >= 2]
+        referenced = [target for key in ranked for target in self.references[key]]
+        for key in junctions + referenced:
+            if len(selected) >= max_tables:
+                break
+            if key not in selected:
+                selected.append(key)
+        return selected
+
+    def render(self, keys: List[str], verbosity: str = SCHEMA_FORMAT) -> str:
+        """Render the tables ``keys`` at ``verbosity`` (see ``schema_format.VERBOSITY_LEVELS``)."""
+        return render_tables([self.tables[key] for key in keys], verbosity)
+
+
+class SchemaLinker:
+    """Per-fingerprint ``SchemaIndex`` cache that prunes large schemas for a question.
+
+    Schemas with at most ``min_tables`` tables are passed through whole; the
+    indexes of the ``max_indexes`` most recently used schemas are kept.
+    """
+
+    def __init__(self, top_k: int = 8, max_tables: int = 16, min_tables: int = 12, max_indexes: int = 32):
+        self.top_k = top_k
+        self.max_tables = max_tables
+        self.min_tables = min_tables
+        self.max_indexes = max_indexes
+        self._indexes: "OrderedDict[str, SchemaIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.built = 0
+        self.linked = 0
+        self.passed_through = 0
+
+    def index(self, schema: str, fingerprint: Optional[str] = None) -> SchemaIndex:
+        """Return the index of ``schema``, building it on first use."""
+        fingerprint = fingerprint or schema_fingerprint(schema)
+        with self._lock:
+            index = self._indexes.get(fingerprint)
+            if index is not None:
+                self._indexes.move_to_end(fingerprint)
+                return index
+        # Built outside the lock; two threads racing on a new schema build it twice at worst
+        index = SchemaIndex(parse_schema(schema))
+        with self._lock:
+            self.built += 1
+            self._indexes[fingerprint] = index
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        return index
+
+    def tables(self, question: str, schema: str, fingerprint: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return the parsed tables to prompt with for ``question``, most relevant first.
+
+        Args:
+            question: The (contextualized) user question
+            schema: Raw SQL schema content
+            fingerprint: ``schema_fingerprint(schema)``, if already computed
+
+        Returns:
+            The linked tables for large schemas, else every table (matching ones first)
+        """
+        index = self.index(schema, fingerprint)
+        if len(index.tables) <= self.min_tables:
+            self.passed_through += 1
+            ranked = [key for key, _ in index.rank(question)]
+            keys = ranked + [key for key in index.tables if key not in ranked]
+        else:
+            keys = index.select(question, self.top_k, self.max_tables)
+            self.linked += 1
+            logger.info(f"Schema linking: {len(keys)} of {len(index.tables)} tables for '{question[-80:]}': "
+                        f"{', '.join(index.tables[key]['name'] for key in keys)}")
+        return [index.tables[key] for key in keys]
+
+    def link(self, question: str, schema: str, fingerprint: Optional[str] = None, verbosity: str = SCHEMA_FORMAT) -> str:
+        """Return the schema to put in the prompt for ``question``, rendered at ``verbosity``."""
+        tables = self.tables(question, schema, fingerprint)
+        return render_tables(tables, verbosity) if tables else filterSchema_v2(schema)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return index and linking counters."""
+        with self._lock:
+            return {
+                "indexes": len(self._indexes),
+                "built": self.built,
+                "linked": self.linked,
+                "passed_through": self.passed_through,
+                "top_k": self.top_k,
+                "max_tables": self.max_tables,
+                "min_tables": self.min_tables
+            }
+
+
+def _create_schema_linker() -> Optional[SchemaLinker]:
+    if os.getenv('SCHEMA_LINKING', 'on').lower() in ('off', 'false', '0'):
+        return None
+    return SchemaLinker(
+        top_k=int(os.getenv('SCHEMA_LINK_TOP_K', '8')),
+        max_tables=int(os.getenv('SCHEMA_LINK_MAX_TABLES', '16')),
+        min_tables=int(os.getenv('SCHEMA_LINK_MIN_TABLES', '12'))
+    )
+
+
+schema_linker = _create_schema_linker()
@@ -0,0 +1,324 @@
+"""Local cache of validated SQL for natural-language questions, with similarity lookup."""
+
+import logging
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sql_bigbrother.pipelines.sql_processing.services.utils import normalize_question
+
+logger = logging.getLogger(__name__)
+
+# Words that carry no meaning for matching questions against each other
+STOPWORDS = {
+    "a", "an", "the", "of", "for", "in", "on", "at", "to", "by", "with", "from", "and", "or",
+    "me", "show", "list", "give", "get", "find", "display", "what", "which", "who", "is", "are",
+    "was", "were", "all", "please", "can", "you", "i", "want", "see", "tell", "about"
+}
+# Words that negate or direct a question. Two questions only match approximately when they
+# agree on all of them, since "orders" and "no orders" differ by one word but not one feature
+QUALIFIERS = {
+    **dict.fromkeys(("not", "no", "never", "without", "none", "nobody", "nothing"), "not"),
+    **dict.fromkeys(("top", "highest", "most", "best", "largest", "biggest", "greatest"), "high"),
+    **dict.fromkeys(("bottom", "lowest", "least", "worst", "smallest", "fewest"), "low"),
+    **dict.fromkeys(("more", "above", "greater"), "above"),
+    **dict.fromkeys(("less", "below", "fewer"), "below"),
+    "before": "before",
+    "after": "after"
+}
+# The word after these decides what rows are grouped or ordered by ("orders per customer")
+GROUPING_WORDS = {"per", "by", "each"}
+# Forms that suffix stripping cannot bring together
+IRREGULAR_STEMS = {
+    "sale": "sell", "sales": "sell", "sold": "sell", "bought": "buy", "paid": "pay", "spent": "spend",
+    "made": "make", "people": "person", "children": "child"
+}
+FEATURE_BUCKETS = 1 << 20
+
+
+def _stem(word: str) -> str:
+    """Light stemming that gives the inflections of a word one stem.
+
+    "sale"/"sales", "order"/"orders"/"ordered"/"ordering", "ship"/"shipped"
+    and "category"/"categories" each share a stem. The stems are not always
+    words ("sale" becomes "sell", "price" becomes "pric").
+    """
+    if word in IRREGULAR_STEMS:
+        return IRREGULAR_STEMS[word]
+    if len(word) > 4 and word.endswith(("ies", "ied")):
+        return word[:-3] + "y"
+    if len(word) > 5 and word.endswith("ing"):
+        word = word[:-3]
+    elif len(word) > 4 and word.endswith("ed"):
+        word = word[:-2]
+    elif len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    # "shipp" (from "shipped") -> "ship", while "sell" and "class" keep their ending
+    if len(word) > 3 and word[-1] == word[-2] and word[-1] not in "aeiouslz":
+        word = word[:-1]
+    # "sale"/"sales" and "price"/"priced" share a stem once the final "e" goes
+    if len(word) > 3 and word.endswith("e"):
+        word = word[:-1]
+    return word
+
+
+def _words(question: str) -> List[str]:
+    return re.findall(r"[a-z0-9_]+", normalize_question(question).replace("n't", " not"))
+
+
+def question_terms(question: str) -> List[str]:
+    """Split a question into stemmed words without stopwords."""
+    return [_stem(word) for word in _words(question) if word not in STOPWORDS]
+
+
+def question_qualifiers(question: str) -> Set[str]:
+    """Return the negation and direction of a question, which must agree for a similar match.
+
+    ``"not"``/``"high"``/``"low"``/... for the words in ``QUALIFIERS``.
+    """
+    return {QUALIFIERS[word] for word in _words(question) if word in QUALIFIERS}
+
+
+def question_groups(question: str) -> Set[str]:
+    """Return the stemmed terms that follow "per", "by" or "each" in a question."""
+    words = _words(question)
+    groups = set()
+    for position, word in enumerate(words):
+        if word in GROUPING_WORDS:
+            following = next((other for other in words[position + 1:] if other not in STOPWORDS), None)
+            if following is not None:
+                groups.add(_stem(following))
+    return groups
+
+
+def question_literals(question: str) -> Set[str]:
+    """Return the values a question names: quoted text, numbers, single letters and capitalized names.
+
+    They tell apart questions that are otherwise worded the same ("product A"
+    vs "product B", "orders from France" vs "orders from Spain"), so they
+    must agree exactly for a similar match. Capitalized words only count
+    when most of the question is lowercase.
+    """
+    text = question or ""
+    literals = {value.strip().lower() for quoted in re.findall(r"(?<!\w)'([^']+)'|\"([^\"]+)\"", text)
+                for value in quoted if value.strip()}
+    words = re.findall(r"[A-Za-z0-9_]+", re.sub(r"(?<!\w)'[^']+'|\"[^\"]+\"", " ", text))
+    names = len(words) > 1 and sum(word[0].isupper() for word in words[1:]) * 2 <= len(words) - 1
+    for position, word in enumerate(words):
+        if any(char.isdigit() for char in word):
+            literals.add(word.lower())
+        elif len(word) == 1 and word not in ("a", "i", "I"):
+            # A lowercase "a" is the article; "A" after the first word names something
+            literals.add(word.lower())
+        elif names and position > 0 and word[0].isupper() and word != "I":
+            literals.add(word.lower())
+    return literals
+
+
+def _match_terms(question: str) -> List[str]:
+    # "top", "best" and "highest" all ask for the high end, so they count as one term
+    return [f"q:{QUALIFIERS[word]}" if word in QUALIFIERS else _stem(word)
+            for word in _words(question) if word not in STOPWORDS]
+
+
+def _bigrams(terms: List[str]) -> Set[Tuple[str, str]]:
+    return set(zip(terms, terms[1:]))
+
+
+def question_vector(terms: List[str]) -> Dict[int, float]:
+    """Hash word unigrams, bigrams and character trigrams into a unit-length sparse vector."""
+    features: List[Tuple[str, float]] = [(f"w:{term}", 1.0) for term in terms]
+    features += [(f"b:{first} {second}", 0.5) for first, second in zip(terms, terms[1:])]
+    for term in terms:
+        padded = f"#{term}#"
+        features += [(f"c:{padded[i:i + 3]}", 0.25) for i in range(len(padded) - 2)]
+
+    vector: Dict[int, float] = {}
+    for feature, weight in features:
+        bucket = zlib.crc32(feature.encode("utf-8")) % FEATURE_BUCKETS
+        vector[bucket] = vector.get(bucket, 0.0) + weight
+    norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+    return {bucket: value / norm for bucket, value in vector.items()}
+
+
+def _similarity(left: Dict[int, float], right: Dict[int, float]) -> float:
+    if len(left) > len(right):
+        left, right = right, left
+    return sum(value * right.get(bucket, 0.0) for bucket, value in left.items())
+
+
+def question_features(question: str) -> Dict[str, Any]:
+    """Return what the cache compares a question by: terms, literals, qualifiers, groups, word pairs and vector."""
+    terms = _match_terms(question)
+    return {
+        "terms": terms,
+        "literals": question_literals(question),
+        "qualifiers": question_qualifiers(question),
+        "groups": question_groups(question),
+        "bigrams": _bigrams(terms),
+        "vector": question_vector(terms)
+    }
+
+
+def _agree(left: Dict[str, Any], right: Dict[str, Any]) -> bool:
+    """Whether two questions may match approximately, before comparing their vectors."""
+    if left["literals"] != right["literals"] or left["qualifiers"] != right["qualifiers"]:
+        return False
+    reordered = False
+    if left["groups"] != right["groups"]:
+        # "top products by sales" and "best selling products" rank by the same thing,
+        # but "orders per customer" and "orders" are different questions
+        ranked = left["qualifiers"] & {"high", "low"}
+        grouped, other = (left, right) if left["groups"] else (right, left)
+        if not ranked or other["groups"] or not grouped["groups"] <= set(other["terms"]):
+            return False
+        reordered = True
+    if left["bigrams"] and right["bigrams"]:
+        # The same words in another order ask something else, unless the ranking moved them
+        if reordered:
+            shared = {frozenset(pair) for pair in left["bigrams"]} & {frozenset(pair) for pair in right["bigrams"]}
+        else:
+            shared = left["bigrams"] & right["bigrams"]
+        if not shared:
+            return False
+    return True
+
+
+class SQLAnswerCache:
+    """In-process cache of (normalized question, schema fingerprint, model) to validated SQL.
+
+    ``get`` first tries an exact match on the normalized question, then the
+    most similar cached question for the same schema and model, accepted when
+    its cosine similarity reaches ``similarity_threshold``. Questions whose
+    literals differ ("top 5" vs "top 10", "product A" vs "product B"), whose
+    qualifiers differ ("orders" vs "no orders", "orders per customer" vs
+    "customers per order"), or that share no word pair never match
+    approximately. Entries
+    expire after ``ttl_seconds`` and the least recently used ones are evicted
+    above ``max_entries``.
+    """
+
+    def __init__(self, max_entries: int = 5000, ttl_seconds: float = 24 * 3600,
+                 similarity_threshold: float = 0.85, max_candidates: int = 200):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.max_candidates = max_candidates
+        self._entries: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+        # (fingerprint, model) -> term -> keys of the entries containing it
+        self._index: Dict[Tuple[str, str], Dict[str, Set[Tuple[str, str, str]]]] = {}
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def get(self, question: str, fingerprint: str, model: str) -> Optional[Dict[str, Any]]:
+        """Return ``{"sql", "match", "similarity", "question"}`` for a cached answer, or None."""
+        key = (normalize_question(question), fingerprint, model or "")
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._fresh(entry):
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return {"sql": entry["sql"], "match": "exact", "similarity": 1.0, "question": entry["question"]}
+
+            match = self._most_similar(key, question_features(question)) if self.similarity_threshold < 1 else None
+            if match is None:
+                self.misses += 1
+                return None
+            similarity, match_key = match
+            self._entries.move_to_end(match_key)
+            self.similar_hits += 1
+            entry = self._entries[match_key]
+            logger.info(f"SQL cache similar hit ({similarity:.2f}): '{question[:50]}' ~ '{entry['question'][:50]}'")
+            return {"sql": entry["sql"], "match": "similar", "similarity": round(similarity, 3), "question": entry["question"]}
+
+    def _most_similar(self, key: Tuple[str, str, str],
+                      features: Dict[str, Any]) -> Optional[Tuple[float, Tuple[str, str, str]]]:
+        postings = self._index.get(key[1:], {})
+        candidates: Set[Tuple[str, str, str]] = set()
+        for term in features["terms"]:
+            candidates |= postings.get(term, set())
+            if len(candidates) >= self.max_candidates:
+                break
+        if not candidates:
+            return None
+
+        best: Optional[Tuple[float, Tuple[str, str, str]]] = None
+        for candidate in candidates:
+            entry = self._entries[candidate]
+            if not self._fresh(entry) or not _agree(features, entry):
+                continue
+            similarity = _similarity(features["vector"], entry["vector"])
+            if similarity >= self.similarity_threshold and (best is None or similarity > best[0]):
+                best = (similarity, candidate)
+        return best
+
+    def put(self, question: str, fingerprint: str, model: str, sql: str) -> None:
+        """Remember validated ``sql`` as the answer to ``question``."""
+        key = (normalize_question(question), fingerprint, model or "")
+        features = question_features(question)
+        with self._lock:
+            # Generations are slow, so a full expiry sweep per insert is cheap in comparison
+            self._expire()
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = {"question": question, "sql": sql, "created": time.time(), **features}
+            postings = self._index.setdefault(key[1:], {})
+            for term in set(features["terms"]):
+                postings.setdefault(term, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Tuple[str, str, str]) -> None:
+        entry = self._entries.pop(key)
+        postings = self._index.get(key[1:], {})
+        for term in set(entry["terms"]):
+            keys = postings.get(term)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del postings[term]
+        if not postings:
+            self._index.pop(key[1:], None)
+
+    def _fresh(self, entry: Dict[str, Any]) -> bool:
+        return entry["created"] >= time.time() - self.ttl_seconds
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        for key in [key for key, entry in self._entries.items() if entry["created"] < cutoff]:
+            self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the cache size."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "similarity_threshold": self.similarity_threshold,
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses
+            }
+
+
+def _create_sql_cache() -> Optional[SQLAnswerCache]:
+    if os.getenv('SQL_CACHE', 'on').lower() in ('off', 'false', '0'):
+        return None
+    return SQLAnswerCache(
+        max_entries=int(os.getenv('SQL_CACHE_MAX_ENTRIES', '5000')),
+        ttl_seconds=float(os.getenv('SQL_CACHE_TTL_SECONDS', str(24 * 3600))),
+        similarity_threshold=float(os.getenv('SQL_CACHE_SIMILARITY', '0.85'))
+    )
+
+
+sql_cache = _create_sql_cache()
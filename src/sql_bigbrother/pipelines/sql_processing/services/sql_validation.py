@@ -0,0 +1,111 @@
+"""Local checks of generated SQL against the schema, without touching the database."""
+
+import re
+from typing import Any, Dict, Optional, Set
+
+try:
+    import sqlglot
+    from sqlglot import exp
+except ImportError:  # optional dependency, see the "validation" extra
+    sqlglot = None
+
+# REPLACE is left out: it is also a string function
+WRITE_STATEMENT = re.compile(r"\b(INSERT|UPDATE|DELETE|DROP|ALTER|TRUNCATE|CREATE|GRANT|REVOKE)\b", re.IGNORECASE)
+TABLE_REFERENCE = re.compile(r"\b(?:FROM|JOIN)\s+([`\w.]+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+QUALIFIED_COLUMN = re.compile(r"\b(\w+)\.`?(\w+)`?")
+SQL_KEYWORDS = {
+    "where", "on", "join", "left", "right", "inner", "outer", "cross", "full", "group", "order", "limit",
+    "having", "union", "using", "natural", "straight_join", "window", "as"
+}
+
+
+def _strip_literals(sql: str) -> str:
+    # String literals may contain anything, including ';' and keywords
+    return re.sub(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"", "''", sql)
+
+
+def validate_sql(sql: str, tables: Dict[str, Dict[str, Any]]) -> Optional[str]:
+    """Check that generated SQL is a single read-only query over tables and columns of the schema.
+
+    Uses sqlglot's MySQL parser when it is installed, and lighter regular
+    expression checks otherwise.
+
+    Args:
+        sql: The generated query
+        tables: Parsed schema tables, as returned by ``schema_format.parse_schema``;
+            when empty, only the statement itself is checked
+
+    Returns:
+        Why the query is rejected, or None when it passes
+    """
+    sql = (sql or "").strip().rstrip(";").strip()
+    if not sql:
+        return "no SQL in the answer"
+    if not re.match(r"(SELECT|WITH)\b", sql, re.IGNORECASE):
+        return "answer does not start with SELECT"
+    body = _strip_literals(sql)
+    if ";" in body:
+        return "more than one statement"
+    if WRITE_STATEMENT.search(body):
+        return "not a read-only query"
+
+    columns = {table_key: {column["name"].lower() for column in table["columns"]} for table_key, table in tables.items()}
+    if sqlglot is not None:
+        return _check_parsed(sql, columns)
+    return _check_lexical(body, columns)
+
+
+def _check_parsed(sql: str, columns: Dict[str, Set[str]]) -> Optional[str]:
+    try:
+        tree = sqlglot.parse_one(sql, read="mysql")
+    except sqlglot.errors.ParseError as e:
+        return f"parse error: {str(e).splitlines()[0]}"
+
+    ctes = {cte.alias_or_name.lower() for cte in tree.find_all(exp.CTE)}
+    derived = {subquery.alias_or_name.lower() for subquery in tree.find_all(exp.Subquery) if subquery.alias}
+    aliases: Dict[str, str] = {}
+    for table in tree.find_all(exp.Table):
+        name = table.name.lower()
+        if name in ctes:
+            continue
+        if columns and name not in columns:
+            return f"unknown table {table.name}"
+        aliases[table.alias_or_name.lower()] = name
+
+    select_aliases = {alias.alias.lower() for alias in tree.find_all(exp.Alias)}
+    known = set().union(*columns.values()) if columns else set()
+    for column in tree.find_all(exp.Column):
+        name = column.name.lower()
+        if not name or name == "*" or name in select_aliases:
+            continue
+        qualifier = column.table.lower()
+        if qualifier and qualifier in aliases:
+            # Without a parsed schema there are no columns to check against
+            if aliases[qualifier] in columns and name not in columns[aliases[qualifier]]:
+                return f"unknown column {column.table}.{column.name}"
+        elif not qualifier and known and name not in known and not ctes and not derived:
+            return f"unknown column {column.name}"
+    return None
+
+
+def _check_lexical(body: str, columns: Dict[str, Set[str]]) -> Optional[str]:
+    if body.count("(") != body.count(")"):
+        return "unbalanced parentheses"
+
+    aliases: Dict[str, str] = {}
+    ctes = {name.lower() for name in re.findall(r"(?:\bWITH|,)\s+(\w+)\s+AS\s*\(", body, re.IGNORECASE)}
+    for table, alias in TABLE_REFERENCE.findall(body):
+        name = table.split(".")[-1].strip("`").lower()
+        if name in ctes:
+            continue
+        if columns and name not in columns:
+            return f"unknown table {table}"
+        aliases[name] = name
+        if alias and alias.lower() not in SQL_KEYWORDS:
+            aliases[alias.lower()] = name
+
+    for qualifier, column in QUALIFIED_COLUMN.findall(body):
+        table = aliases.get(qualifier.lower())
+        if table in columns and column.lower() not in columns[table]:
+            return f"unknown column {qualifier}.{column}"
+    return None
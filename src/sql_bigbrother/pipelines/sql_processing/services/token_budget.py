@@ -0,0 +1,201 @@
+"""Per-request token budgets: fitting instructions, schema and history into a model's context."""
+
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from sql_bigbrother.pipelines.sql_processing.services.ollama import OllamaClient, ollama_client
+from sql_bigbrother.pipelines.sql_processing.services.schema_format import SCHEMA_FORMAT, VERBOSITY_LEVELS, render_tables
+from sql_bigbrother.pipelines.sql_processing.services.tokens import TokenCounter, token_counter
+
+logger = logging.getLogger(__name__)
+
+# Trained context lengths by model family, used when Ollama cannot be asked; the longest matching prefix wins
+CONTEXT_WINDOWS = {
+    "qwen2.5": 32768,
+    "qwen3": 40960,
+    "llama3.1": 131072,
+    "llama3.2": 131072,
+    "llama3": 8192,
+    "gemma2": 8192,
+    "gemma3": 131072,
+    "gpt-oss": 131072,
+    "mistral": 32768,
+    "phi3": 4096
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+# Ollama reloads a model whenever num_ctx changes, so it is rounded up to a few sizes
+MIN_NUM_CTX = 2048
+
+
+class TokenBudget:
+    """Splits a model's context window between instructions, schema and conversation history.
+
+    The window is the model's context length, capped at ``max_context``,
+    minus a safety margin for estimation error and ``output_reserve`` tokens
+    for the answer. Instructions and the current question are always kept.
+    History may use up to ``history_share`` of what remains, and the schema
+    gets the rest. When either does not fit, the lowest-value parts go
+    first: the oldest messages are dropped, long messages are cut, the
+    schema falls back to less verbose renderings, and finally the least
+    relevant tables are left out. History can also use whatever the schema
+    leaves unused.
+    """
+
+    def __init__(self, counter: TokenCounter, client: OllamaClient, max_context: int = 8192, output_reserve: int = 512,
+                 history_share: float = 0.25, max_history_messages: int = 10, max_message_tokens: int = 300,
+                 safety_margin: float = 0.1):
+        self.counter = counter
+        self.client = client
+        self.max_context = max_context
+        self.output_reserve = output_reserve
+        self.history_share = history_share
+        self.max_history_messages = max_history_messages
+        self.max_message_tokens = max_message_tokens
+        self.safety_margin = safety_margin
+        self._context_lengths: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.history_trimmed = 0
+        self.schema_downgraded = 0
+        self.tables_dropped = 0
+        self.overflows = 0
+
+    def context_window(self, model: str) -> int:
+        """Return the usable context window of ``model``: its context length capped at ``max_context``."""
+        return min(self._context_length(model), self.max_context)
+
+    def _context_length(self, model: str) -> int:
+        length = self._context_lengths.get(model)
+        if length is not None:
+            return length
+        try:
+            model_info = self.client.show(model).get("model_info", {})
+            length = next((int(value) for key, value in model_info.items() if key.endswith(".context_length")), 0)
+        except Exception as e:
+            logger.warning(f"Could not read the context length of {model} from Ollama: {e}")
+            length = 0
+        if not length:
+            family = max((prefix for prefix in CONTEXT_WINDOWS if model.startswith(prefix)), key=len, default=None)
+            length = CONTEXT_WINDOWS[family] if family else DEFAULT_CONTEXT_WINDOW
+        with self._lock:
+            self._context_lengths[model] = length
+        return length
+
+    def allocate(self, model: str, instructions: str, question: str, history: List[str],
+                 tables: List[Dict[str, Any]], verbosity: str = SCHEMA_FORMAT, raw_schema: str = "") -> Dict[str, Any]:
+        """Fit a SQL prompt into ``model``'s context window.
+
+        Args:
+            model: Model the prompt is for
+            instructions: Fixed prompt text (template, system prompt)
+            question: The current question
+            history: Formatted conversation messages, oldest first
+            tables: Parsed schema tables, most relevant first
+            verbosity: Preferred schema rendering (see ``schema_format.VERBOSITY_LEVELS``)
+            raw_schema: Schema text to use as is when ``tables`` is empty
+
+        Returns:
+            ``schema`` (rendered text), ``history`` (kept messages, oldest first),
+            ``num_ctx`` for Ollama and the token ``allocation``
+        """
+        window = self.context_window(model)
+        fixed_tokens = self.counter.count(instructions, model) + self.counter.count(question, model)
+        available = max(0, int(window * (1 - self.safety_margin)) - self.output_reserve - fixed_tokens)
+
+        # History is guaranteed its share; the schema may take everything else
+        recent = history[-self.max_history_messages:]
+        history_full = sum(min(self.counter.count(line, model), self.max_message_tokens) for line in recent)
+        schema_text, level, table_count = self._fit_schema(tables, verbosity, available - min(history_full, int(available * self.history_share)), model, raw_schema)
+        schema_tokens = self.counter.count(schema_text, model)
+        kept, history_tokens = self._fit_history(recent, max(0, available - schema_tokens), model)
+
+        prompt_tokens = fixed_tokens + schema_tokens + history_tokens
+        num_ctx = self._num_ctx(prompt_tokens + self.output_reserve, window)
+        allocation = {
+            "window": window,
+            "num_ctx": num_ctx,
+            "instructions": fixed_tokens,
+            "schema": schema_tokens,
+            "schema_level": level,
+            "tables": f"{table_count}/{len(tables)}",
+            "history": history_tokens,
+            "messages": f"{len(kept)}/{len(history)}",
+            "output_reserve": self.output_reserve
+        }
+        with self._lock:
+            self.requests += 1
+            self.history_trimmed += len(kept) < len(history) or any(line.endswith("…") for line in kept)
+            self.schema_downgraded += level != verbosity and bool(tables)
+            self.tables_dropped += table_count < len(tables)
+            self.overflows += prompt_tokens + self.output_reserve > window
+        logger.info(f"Token budget for {model}: " + ", ".join(f"{key}={value}" for key, value in allocation.items()))
+        return {"schema": schema_text, "history": kept, "num_ctx": num_ctx, "allocation": allocation}
+
+    def _fit_schema(self, tables: List[Dict[str, Any]], verbosity: str, budget: int, model: str,
+                    raw_schema: str) -> Tuple[str, str, int]:
+        if not tables:
+            return raw_schema, verbosity, 0
+        levels = list(reversed(VERBOSITY_LEVELS[:VERBOSITY_LEVELS.index(verbosity) + 1]))
+        for level in levels:
+            text = render_tables(tables, level)
+            if self.counter.count(text, model) <= budget:
+                return text, level, len(tables)
+
+        # Even the least verbose rendering is too large: keep as many of the most relevant tables as fit
+        level = levels[-1]
+        low, high = 1, len(tables) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.counter.count(render_tables(tables[:middle], level), model) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        return render_tables(tables[:low], level), level, low
+
+    def _fit_history(self, history: List[str], budget: int, model: str) -> Tuple[List[str], int]:
+        kept: List[str] = []
+        used = 0
+        # Newest messages first; older ones are worth less
+        for line in reversed(history):
+            tokens = self.counter.count(line, model)
+            limit = min(self.max_message_tokens, budget - used)
+            if tokens > limit:
+                if limit < 32:
+                    break
+                line = line[:max(1, len(line) * limit // tokens - 1)] + "…"
+                tokens = self.counter.count(line, model)
+            kept.append(line)
+            used += tokens
+        kept.reverse()
+        return kept, used
+
+    def _num_ctx(self, needed: int, window: int) -> int:
+        num_ctx = MIN_NUM_CTX
+        while num_ctx < needed:
+            num_ctx *= 2
+        return min(num_ctx, window)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return trimming counters and the known context lengths."""
+        with self._lock:
+            return {
+                "max_context": self.max_context,
+                "requests": self.requests,
+                "history_trimmed": self.history_trimmed,
+                "schema_downgraded": self.schema_downgraded,
+                "tables_dropped": self.tables_dropped,
+                "overflows": self.overflows,
+                "context_lengths": dict(self._context_lengths)
+            }
+
+
+token_budget = TokenBudget(
+    token_counter,
+    ollama_client,
+    max_context=int(os.getenv('LLM_MAX_CONTEXT', '8192')),
+    output_reserve=int(os.getenv('LLM_OUTPUT_RESERVE', '512')),
+    history_share=float(os.getenv('HISTORY_TOKEN_SHARE', '0.25')),
+    max_history_messages=int(os.getenv('HISTORY_MAX_MESSAGES', '10'))
+)
@@ -0,0 +1,121 @@
+"""Prompt token counts per model."""
+
+import logging
+import math
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Optional, Set
+
+from sql_bigbrother.pipelines.sql_processing.services.ollama import OllamaClient, ollama_client
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # optional dependency (see the "tokens" extra); the encoding may also fail to download
+    _encoding = None
+
+logger = logging.getLogger(__name__)
+
+# Mix of DDL, compact schema and English, like the prompts we send
+CALIBRATION_SAMPLE = """Based on the Schema, you will design MySQL query to solve the Requirement below.
+CREATE TABLE Products (
+    ProductID INT PRIMARY KEY AUTO_INCREMENT,
+    ProductName VARCHAR(100) NOT NULL,
+    CategoryID INT,
+    Price DECIMAL(10, 2) NOT NULL,
+    FOREIGN KEY (CategoryID) REFERENCES Categories (CategoryID)
+);
+Orders(OrderID int pk, CustomerID->Customers.CustomerID, OrderDate datetime, Total decimal(10,2), Status varchar)
+Requirement: total revenue per customer for orders placed in 2024, highest first.
+Always use table aliases, and never select columns that do not exist in the schema."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Count tokens with a generic BPE tokenizer (tiktoken) or, without it, a word/punctuation heuristic."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    # Words split into pieces of about four characters; punctuation and line breaks are a token each
+    words = re.findall(r"[A-Za-z]+|\d+", text)
+    return sum(math.ceil(len(word) / 4) for word in words) + len(re.findall(r"[^\w\s]|\n", text))
+
+
+class TokenCounter:
+    """Token counts calibrated to each model's own tokenizer.
+
+    ``count`` scales ``estimate_tokens`` by the ratio between the model's real
+    token count for ``CALIBRATION_SAMPLE`` (measured once through Ollama, on a
+    background thread) and the estimate for it. Until a model is calibrated,
+    or when it cannot be, the ratio is 1.
+    """
+
+    def __init__(self, client: OllamaClient, calibrate: bool = True, retry_seconds: float = 300):
+        self.client = client
+        self.calibrate_models = calibrate
+        self.retry_seconds = retry_seconds
+        self._ratios: Dict[str, float] = {}
+        self._failed_at: Dict[str, float] = {}
+        self._calibrating: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def count(self, text: str, model: Optional[str] = None) -> int:
+        """Return the (calibrated) token count of ``text`` for ``model`` without blocking on I/O."""
+        return round(estimate_tokens(text) * self.ratio(model))
+
+    def ratio(self, model: Optional[str]) -> float:
+        """Return the model's tokens per estimated token, starting its calibration if needed."""
+        if not model:
+            return 1.0
+        ratio = self._ratios.get(model)
+        if ratio is None:
+            self._calibrate_in_background(model)
+            return 1.0
+        return ratio
+
+    def calibrate(self, model: str) -> float:
+        """Measure ``model``'s ratio now (blocking) and remember it."""
+        measured = self.client.count_tokens(model, CALIBRATION_SAMPLE)
+        ratio = measured / estimate_tokens(CALIBRATION_SAMPLE) if measured else 1.0
+        with self._lock:
+            self._ratios[model] = ratio
+            self._failed_at.pop(model, None)
+        logger.info(f"Token calibration for {model}: {ratio:.2f} tokens per estimated token")
+        return ratio
+
+    def _calibrate_in_background(self, model: str) -> None:
+        with self._lock:
+            if (not self.calibrate_models or model in self._calibrating
+                    or time.time() - self._failed_at.get(model, 0) < self.retry_seconds):
+                return
+            self._calibrating.add(model)
+
+        def run():
+            try:
+                self.calibrate(model)
+            except Exception as e:
+                logger.warning(f"Could not calibrate token counts for {model}: {e}")
+                with self._lock:
+                    self._failed_at[model] = time.time()
+            finally:
+                with self._lock:
+                    self._calibrating.discard(model)
+
+        threading.Thread(target=run, name="token-calibration", daemon=True).start()
+
+    def measure(self, text: str, model: str) -> int:
+        """Return the exact token count of ``text`` from the model's tokenizer (one Ollama call)."""
+        return self.client.count_tokens(model, text)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the estimator in use and the calibrated ratio per model."""
+        with self._lock:
+            return {
+                "estimator": "tiktoken/cl100k_base" if _encoding is not None else "heuristic",
+                "ratios": {model: round(ratio, 3) for model, ratio in self._ratios.items()}
+            }
+
+
+token_counter = TokenCounter(ollama_client, calibrate=os.getenv('TOKEN_CALIBRATION', 'on').lower() not in ('off', 'false', '0'))
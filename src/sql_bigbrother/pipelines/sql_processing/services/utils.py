@@ -1,17 +1,15 @@
 import re
 import json
-from datetime import timedelta, date
+import base64
+import hashlib
+from datetime import timedelta, date, datetime, time
 from decimal import Decimal, ROUND_HALF_UP
 
 def filterSchema(schema):
     lines = schema.split(";")
     queries = dict()
     for line in lines:
-        strip = ""
-        if line.startswith('--'):
-            strip = text.split('\n', 1)[1]
-        else:
-            strip = line.strip()
+        strip = stripComments(line)
         
         if strip.upper().startswith('CREATE'):
             table_name, columns = parseQuery(strip)
@@ -25,17 +23,18 @@ def filterSchema_v2(schema):
     lines = schema.split(");")
     result = ""
     for line in lines:
-        strip = ""
-        if line.startswith('--'):
-            strip = text.split('\n', 1)[1]
-        else:
-            strip = line.strip()
+        strip = stripComments(line)
         
         if strip.upper().startswith('CREATE'):
             result = result + line + ");"
 
     return markdownSQL(result)
 
+def stripComments(statement):
+    # Drop the "-- ..." lines that precede (or sit inside) a statement
+    lines = [line for line in statement.split('\n') if not line.strip().startswith('--')]
+    return '\n'.join(lines).strip()
+
 def parseQuery(sql):
     table_regex = r'CREATE\s+TABLE\s+(\w+)\s*\(([^;]+)\)'
     column_regex = r'(\w+)\s+([^\n,]+),?'
@@ -55,6 +54,21 @@ def parseQuery(sql):
 
     return table_name, columns
 
+def normalize_question(question):
+    # Lowercase, collapse whitespace and drop trailing punctuation so trivially different wordings match
+    normalized = re.sub(r"\s+", " ", (question or "").strip().lower())
+    return normalized.rstrip(" ?.!;")
+
+def canonical_schema(schema):
+    # Strip comments and whitespace differences, and order the statements, so equivalent DDL compares equal
+    without_comments = re.sub(r"/\*.*?\*/", " ", schema or "", flags=re.DOTALL)
+    without_comments = re.sub(r"--[^\n]*", " ", without_comments)
+    statements = [re.sub(r"\s+", " ", statement).strip() for statement in without_comments.split(";")]
+    return ";\n".join(sorted(statement for statement in statements if statement))
+
+def schema_fingerprint(schema):
+    return hashlib.sha256(canonical_schema(schema).encode("utf-8")).hexdigest()
+
 def markdownSQL(query):    
     return f"```sql\n{query}\n```"
 
@@ -81,23 +95,23 @@ def extractMarkdown(markdown_text):
         return sql_matches[0]
 
 def process_data(rows):
-    processed_rows = []
-    for row in rows:
-        processed_row = []
-        for value in row:
-            if isinstance(value, Decimal) or isinstance(value, float):
-                processed_row.append(round(float(value), 2))
-            else:
-                processed_row.append(value)
-        processed_rows.append(processed_row)
-    
-    return processed_rows
+    # Round numeric values to 2 decimals; everything else is left for the JSON encoder
+    return [
+        [round(float(value), 2) if isinstance(value, (Decimal, float)) else value for value in row]
+        for row in rows
+    ]
 
 # Hàm tùy chỉnh để chuyển đổi các đối tượng phức tạp thành dạng có thể tuần tự hóa
 def custom_serializer(obj):
     if isinstance(obj, timedelta):
         return str(obj)  # Chuyển thành chuỗi
-    elif isinstance(obj, date):
+    elif isinstance(obj, (datetime, date, time)):
         return obj.isoformat()  # Chuyển thành định dạng ISO
+    elif isinstance(obj, Decimal):
+        return float(obj)
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        # Always base64, so clients can decode binary columns without guessing
+        return base64.b64encode(bytes(obj)).decode('ascii')
+    elif isinstance(obj, (set, frozenset)):
+        return list(obj)
     raise TypeError(f"Type {type(obj)} not serializable")
-
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from sql_bigbrother.core.api.admission import AdmissionController, AdmissionRejected
+
+
+def test_full_queue_is_rejected_with_429():
+    async def scenario():
+        controller = AdmissionController("sql", max_in_flight=1, max_queue=0, queue_timeout=1.0)
+        admitted_at = await controller.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        controller.release(admitted_at)
+        return controller, rejected.value
+
+    controller, rejected = asyncio.run(scenario())
+    assert rejected.status_code == 429
+    assert int(rejected.headers["Retry-After"]) >= 1
+    assert controller.stats()["rejected_queue_full"] == 1
+    assert controller.in_flight == 0
+
+
+def test_queue_timeout_is_rejected_with_503():
+    async def scenario():
+        controller = AdmissionController("sql", max_in_flight=1, max_queue=1, queue_timeout=0.05)
+        admitted_at = await controller.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        controller.release(admitted_at)
+        return controller, rejected.value
+
+    controller, rejected = asyncio.run(scenario())
+    assert rejected.status_code == 503
+    assert "Retry-After" in rejected.headers
+    stats = controller.stats()
+    assert stats["rejected_timeout"] == 1
+    assert stats["queued"] == 0
+
+
+def test_queued_request_gets_the_released_slot():
+    async def scenario():
+        controller = AdmissionController("sql", max_in_flight=1, max_queue=1, queue_timeout=1.0)
+        admitted_at = await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        assert controller.queued == 1
+        controller.release(admitted_at)
+        controller.release(await waiter)
+        return controller
+
+    controller = asyncio.run(scenario())
+    stats = controller.stats()
+    assert stats["admitted"] == 2
+    assert stats["in_flight"] == 0
+    assert stats["rejected_queue_full"] == stats["rejected_timeout"] == 0
+
+
+def test_admit_releases_on_error():
+    async def scenario():
+        controller = AdmissionController("sql", max_in_flight=1, max_queue=0, queue_timeout=1.0)
+        with pytest.raises(RuntimeError):
+            async with controller.admit():
+                raise RuntimeError("generation failed")
+        async with controller.admit():
+            pass
+        return controller
+
+    controller = asyncio.run(scenario())
+    assert controller.stats()["admitted"] == 2
+    assert controller.in_flight == 0
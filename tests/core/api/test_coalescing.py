@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from sql_bigbrother.core.api.coalescing import SingleFlight, chat_request_key
+
+SCHEMA = "CREATE TABLE orders (id INT, total DECIMAL(10, 2));"
+
+
+def test_identical_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"rows": [1]}
+
+    async def scenario():
+        return await asyncio.gather(*(flight.run("key", work) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+
+    async def scenario():
+        return await asyncio.gather(flight.run("a", _value("a")), flight.run("b", _value("b")))
+
+    assert asyncio.run(scenario()) == ["a", "b"]
+    assert flight.stats()["leaders"] == 2
+
+
+def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+
+    async def scenario():
+        return [await flight.run("key", _value(1)), await flight.run("key", _value(2))]
+
+    assert asyncio.run(scenario()) == [1, 2]
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("generation failed")
+
+    async def scenario():
+        return await asyncio.gather(flight.run("key", fail), flight.run("key", fail), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_a_cancelled_waiter_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.run("key", work))
+        second = asyncio.ensure_future(flight.run("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_request_key_normalizes_the_question():
+    assert chat_request_key("Top 10 orders?", SCHEMA, "m") == chat_request_key("  top 10 ORDERS? ", SCHEMA, "m")
+    assert chat_request_key("Top 10 orders", SCHEMA, "m") != chat_request_key("Top 10 orders", SCHEMA, "other")
+    history = [{"role": "user", "content": "orders in 2024"}]
+    assert chat_request_key("and in 2023?", SCHEMA, "m") != chat_request_key("and in 2023?", SCHEMA, "m", history)
+
+
+def _value(value):
+    async def produce():
+        await asyncio.sleep(0)
+        return value
+    return produce
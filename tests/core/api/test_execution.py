@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+import pytest
+
+from sql_bigbrother.core.api.execution import WorkerPool
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool("test", 2)
+    yield pool
+    pool.shutdown(wait=True)
+
+
+def test_run_returns_the_result_from_a_worker_thread(pool):
+    async def scenario():
+        return await pool.run(lambda a, b=0: (a + b, threading.current_thread().name), 1, b=2)
+
+    value, thread = asyncio.run(scenario())
+    assert value == 3
+    assert thread.startswith("test-worker")
+    stats = pool.stats()
+    assert stats["completed"] == 1 and stats["failed"] == 0
+    assert stats["queued"] == stats["running"] == 0
+
+
+def test_run_reraises_and_counts_failures(pool):
+    def fail():
+        raise ValueError("boom")
+
+    async def scenario():
+        with pytest.raises(ValueError):
+            await pool.run(fail)
+
+    asyncio.run(scenario())
+    assert pool.stats()["failed"] == 1
+
+
+def test_concurrency_is_bounded_by_max_workers(pool):
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+
+    def work():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        threading.Event().wait(0.02)
+        with lock:
+            running[0] -= 1
+
+    async def scenario():
+        await asyncio.gather(*(pool.run(work) for _ in range(6)))
+
+    asyncio.run(scenario())
+    assert peak[0] == 2
+    assert pool.stats()["completed"] == 6
+
+
+def test_stream_yields_items_in_order(pool):
+    async def scenario():
+        return [item async for item in pool.stream(lambda n: iter(range(n)), 5)]
+
+    assert asyncio.run(scenario()) == [0, 1, 2, 3, 4]
+
+
+def test_stream_reraises_generator_errors(pool):
+    def produce():
+        yield 1
+        raise RuntimeError("broken")
+
+    async def scenario():
+        items = []
+        with pytest.raises(RuntimeError):
+            async for item in pool.stream(produce):
+                items.append(item)
+        return items
+
+    assert asyncio.run(scenario()) == [1]
+
+
+def test_stream_reraises_errors_raised_before_iterating(pool):
+    def produce():
+        raise LookupError("no such table")
+
+    async def scenario():
+        with pytest.raises(LookupError):
+            async for _ in pool.stream(produce):
+                pass
+
+    asyncio.run(scenario())
+
+
+def test_stream_closes_the_generator_when_the_consumer_stops(pool):
+    closed = threading.Event()
+
+    def produce():
+        try:
+            for i in range(1000):
+                yield i
+                threading.Event().wait(0.001)
+        finally:
+            closed.set()
+
+    async def scenario():
+        async for item in pool.stream(produce):
+            if item == 2:
+                break
+
+    asyncio.run(scenario())
+    assert closed.wait(1)
+
+
+def test_submit_runs_without_awaiting(pool):
+    done = threading.Event()
+    future = pool.submit(done.set)
+    future.result(timeout=1)
+    assert done.is_set()
+    assert pool.stats()["completed"] == 1
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import sqlite3
+
+import pytest
+
+fastapi = pytest.importorskip("fastapi")
+
+from sql_bigbrother.core.api.jobs import JobContext, JobManager, JobStore
+from sql_bigbrother.core.api.processes import INSTANCE_ID
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    yield store
+    store.close()
+
+
+def _set_owner(store, job_id, owner, instance):
+    with sqlite3.connect(str(store.path)) as conn:
+        conn.execute("UPDATE jobs SET owner = ?, instance = ? WHERE job_id = ?", (owner, instance, job_id))
+
+
+def test_job_records_round_trip(store):
+    job_id = store.create("extract", {"db_type": "sqlite"})
+    job = store.get(job_id)
+    assert (job["kind"], job["params"], job["status"], job["result"]) == ("extract", {"db_type": "sqlite"}, "queued", None)
+
+    store.update(job_id, status="succeeded", progress=1.0, result={"schema": "CREATE TABLE t (id INT);"})
+    job = store.get(job_id)
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"schema": "CREATE TABLE t (id INT);"}
+    assert [listed["job_id"] for listed in store.list()] == [job_id]
+    assert store.list()[0]["result"] is None
+    assert store.get("missing") is None
+
+
+def test_jobs_of_dead_owners_are_failed(store):
+    alive = store.create("extract", {})
+    restarted = store.create("extract", {})
+    gone = store.create("extract", {})
+    _set_owner(store, restarted, os.getpid(), "another-instance")
+    # PID 2**22 + 1 is above the Linux PID limit, so no process has it
+    _set_owner(store, gone, 2 ** 22 + 1, INSTANCE_ID)
+
+    assert store.fail_orphans() == 2
+    assert store.get(alive)["status"] == "queued"
+    assert store.get(restarted)["status"] == "failed"
+    assert store.get(gone)["error"] == "Interrupted by a server restart"
+
+
+def test_manager_runs_jobs_and_records_results(store):
+    async def job(context: JobContext):
+        context.progress(0.5, "halfway")
+        await asyncio.sleep(0)
+        return {"tables": 3}
+
+    async def failing(context: JobContext):
+        raise ValueError("database unreachable")
+
+    async def scenario():
+        manager = JobManager(store, max_workers=1)
+        ids = [manager.submit("analyze", {}, job), manager.submit("analyze", {}, failing)]
+        await asyncio.gather(*manager._tasks.values())
+        return ids
+
+    succeeded, failed = asyncio.run(scenario())
+    assert store.get(succeeded)["status"] == "succeeded"
+    assert store.get(succeeded)["result"] == {"tables": 3}
+    assert store.get(failed)["status"] == "failed"
+    assert store.get(failed)["error"] == "database unreachable"
+
+
+def test_manager_cancels_and_bounds_the_queue(store):
+    async def slow(context: JobContext):
+        await asyncio.sleep(10)
+
+    async def scenario():
+        manager = JobManager(store, max_workers=1, max_queued=2)
+        first = manager.submit("analyze", {}, slow)
+        manager.submit("analyze", {}, slow)
+        with pytest.raises(fastapi.HTTPException) as rejected:
+            manager.submit("analyze", {}, slow)
+        await asyncio.sleep(0)
+        manager.cancel(first)
+        await asyncio.sleep(0)
+        await manager.shutdown()
+        return first, rejected.value
+
+    first, rejected = asyncio.run(scenario())
+    assert rejected.status_code == 429
+    assert store.get(first)["status"] == "cancelled"
+    statuses = {job["status"] for job in store.list()}
+    assert statuses == {"cancelled", "failed"}
@@ -0,0 +1,36 @@
+import json
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from sql_bigbrother.core.api import responses
+from sql_bigbrother.core.api.responses import dumps_json
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(responses, "orjson", None)
+    elif responses.orjson is None:
+        pytest.skip("orjson is not installed")
+
+
+def test_database_values_are_encoded(encoder):
+    row = [Decimal("1.50"), date(2024, 1, 2), b"\x00\xff", "text"]
+    assert json.loads(dumps_json({"rows": [row]})) == {"rows": [[1.5, "2024-01-02", "AP8=", "text"]]}
+
+
+def test_text_bytes_are_base64_too(encoder):
+    assert json.loads(dumps_json([b"abc", bytearray(b"abc")])) == ["YWJj", "YWJj"]
+
+
+def test_non_finite_numbers_become_null(encoder):
+    content = {"values": [float("nan"), float("inf"), -float("inf"), 1.0], "nested": ({"x": Decimal("NaN")},)}
+    assert json.loads(dumps_json(content)) == {"values": [None, None, None, 1.0], "nested": [{"x": None}]}
+
+
+def test_integers_beyond_64_bits_fall_back_to_the_standard_library(encoder):
+    assert json.loads(dumps_json({"id": 2 ** 64 + 1, "ratio": float("nan")})) == {"id": 2 ** 64 + 1, "ratio": None}
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from sql_bigbrother.core.api.result_store import ResultPager, create_result_store, decode_cursor
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    store = create_result_store(request.param, path=str(tmp_path / "results.db"), ttl_seconds=3600, max_rows=1000)
+    yield store
+    if request.param == "sqlite":
+        store.close()
+
+
+def _chunks(count, size, columns=("id",)):
+    yield {"columns": list(columns)}
+    for start in range(0, count, size):
+        yield {"rows": [[i] for i in range(start, min(start + size, count))]}
+
+
+def test_small_result_stays_inline(store):
+    result = ResultPager(store, page_size=10, max_rows=100).collect(_chunks(7, 3))
+    assert result["rows"] == [[i] for i in range(7)]
+    assert result["total_rows"] == 7 and not result["truncated"]
+    assert "result_id" not in result
+
+
+def test_large_result_is_stored_page_by_page(store):
+    result = ResultPager(store, page_size=10, max_rows=100).collect(_chunks(25, 4))
+    assert result["rows"] == [[i] for i in range(10)]
+    assert result["total_rows"] == 25
+    assert decode_cursor(result["next_cursor"]) == 10
+
+    rows, cursor = [], ""
+    while cursor is not None:
+        page = store.paginate(result["result_id"], cursor, 7)
+        rows += page["rows"]
+        cursor = page["next_cursor"]
+    assert rows == [[i] for i in range(25)]
+
+
+def test_rows_beyond_the_limit_are_dropped(store):
+    result = ResultPager(store, page_size=10, max_rows=15).collect(_chunks(40, 4))
+    assert result["total_rows"] == 15 and result["truncated"] and result["row_limit"] == 15
+    assert store.page(result["result_id"], 0, 100)["total_rows"] == 15
+
+
+def test_truncated_chunk_marks_the_result(store):
+    chunks = [{"columns": ["id"]}, {"rows": [[1], [2]]}, {"truncated": True}]
+    assert ResultPager(store, page_size=10, max_rows=2).collect(chunks)["truncated"]
+
+
+def test_least_recently_used_results_are_evicted(store):
+    first = store.put(["id"], [[i] for i in range(600)])
+    second = store.put(["id"], [[i] for i in range(300)])
+    store.page(first, 0, 1)
+    store.put(["id"], [[i] for i in range(300)])
+    assert store.page(second, 0, 1) is None
+    assert store.page(first, 0, 1) is not None
+
+
+def test_results_expire_from_their_last_access(store):
+    store.ttl_seconds = 0.2
+    result_id = store.put(["id"], [[1]])
+    time.sleep(0.12)
+    assert store.page(result_id, 0, 1) is not None
+    time.sleep(0.12)
+    assert store.page(result_id, 0, 1) is not None
+    time.sleep(0.25)
+    assert store.page(result_id, 0, 1) is None
+
+
+def test_unknown_result_and_bad_cursor(store):
+    assert store.paginate("missing", "", 10) is None
+    with pytest.raises(ValueError):
+        store.paginate("missing", "not-hex", 10)
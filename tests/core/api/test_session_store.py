@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+from sql_bigbrother.core.api.session_store import HISTORY_PREVIEW_ROWS, compact_result, create_session_store
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    stores = []
+
+    def make(**limits):
+        store = create_session_store(request.param, path=str(tmp_path / f"sessions{len(stores)}.db"), **limits)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        if hasattr(store, "close"):
+            store.close()
+
+
+def _question(text):
+    return {"type": "question", "content": text}
+
+
+def test_history_is_appended_in_order(make_store):
+    store = make_store()
+    store.create("s1", "CREATE TABLE t (id INT);")
+    assert store.append("s1", _question("first")) == 1
+    assert store.append("s1", _question("second")) == 2
+    session = store.get("s1")
+    assert session["schema"] == "CREATE TABLE t (id INT);"
+    assert [entry["content"] for entry in session["history"]] == ["first", "second"]
+
+
+def test_unknown_session(make_store):
+    store = make_store()
+    assert store.get("missing") is None
+    assert store.history_since("missing") is None
+    assert not store.delete("missing")
+    with pytest.raises(KeyError):
+        store.append("missing", _question("q"))
+
+
+def test_history_since_returns_newer_entries(make_store):
+    store = make_store()
+    store.create("s1", "")
+    store.append("s1", _question("first"))
+    cursor = store.history_since("s1")["last_seq"]
+    store.append("s1", _question("second"))
+    found = store.history_since("s1", cursor)
+    assert [entry["content"] for entry in found["history"]] == ["second"]
+    assert found["message_count"] == 2
+    assert store.history_since("s1", found["last_seq"])["history"] == []
+
+
+def test_large_session_drops_its_oldest_entries(make_store):
+    store = make_store(max_session_bytes=400)
+    store.create("s1", "")
+    for i in range(10):
+        store.append("s1", _question(f"question {i} " + "x" * 50))
+    history = store.get("s1")["history"]
+    assert 2 <= len(history) < 10
+    assert history[-1]["content"].startswith("question 9")
+    assert store.stats()["total_bytes"] <= 400
+
+
+def test_least_recently_used_session_is_evicted(make_store):
+    store = make_store(max_sessions=2)
+    store.create("s1", "")
+    store.create("s2", "")
+    store.get("s1")
+    store.create("s3", "")
+    assert store.get("s2") is None
+    assert store.get("s1") is not None and store.get("s3") is not None
+    assert store.stats()["evictions"] == 1
+
+
+def test_total_bytes_evict_sessions(make_store):
+    store = make_store(max_total_bytes=250)
+    store.create("s1", "a" * 100)
+    store.create("s2", "b" * 100)
+    store.set_schema("s2", "b" * 120)
+    assert store.stats()["total_bytes"] == 220
+    store.create("s3", "c" * 100)
+    assert store.get("s1") is None
+    assert store.stats()["total_bytes"] == 220
+
+
+def test_byte_totals_follow_deletes(make_store):
+    store = make_store()
+    store.create("s1", "a" * 10)
+    store.append("s1", _question("q"))
+    store.create("s2", "b" * 10)
+    store.delete("s1")
+    assert store.stats()["sessions"] == 1
+    assert store.stats()["total_bytes"] == 10
+
+
+def test_idle_sessions_expire(make_store):
+    store = make_store(ttl_seconds=0.2)
+    store.create("s1", "")
+    store.create("s2", "")
+    time.sleep(0.12)
+    store.get("s1")
+    time.sleep(0.12)
+    assert store.get("s2") is None
+    assert store.get("s1") is not None
+    with pytest.raises(KeyError):
+        store.append("s2", _question("q"))
+
+
+def test_responses_are_compacted():
+    rows = [[i] for i in range(HISTORY_PREVIEW_ROWS + 5)]
+    compact = compact_result({"rows": rows, "total_rows": 500, "available_databases": ["db"]})
+    assert compact["rows"] == rows[:HISTORY_PREVIEW_ROWS]
+    assert compact["row_count"] == 500 and compact["rows_truncated"]
+    assert "available_databases" not in compact
@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+from sql_bigbrother.core.api import shared_state as shared_state_module
+from sql_bigbrother.core.api.shared_state import (
+    SharedState,
+    StartupLeader,
+    default_session_backend,
+    supervisor_id,
+)
+
+
+@pytest.fixture
+def state(tmp_path):
+    state = SharedState(str(tmp_path / "shared_state.db"))
+    yield state
+    state.close()
+
+
+def _publish_as(state, monkeypatch, pid, values):
+    with monkeypatch.context() as patch:
+        patch.setattr(shared_state_module.os, "getpid", lambda: pid)
+        state.publish(values)
+
+
+def test_readers_skip_their_own_writes(state, monkeypatch):
+    state.begin_run()
+    state.publish({"mine": 1})
+    _publish_as(state, monkeypatch, os.getpid() + 1, {"theirs": {"a": [1, 2]}})
+    values, newest = state.read_since(0.0)
+    assert values == {"theirs": {"a": [1, 2]}}
+    assert newest > 0
+
+    assert state.read_since(newest) == ({}, newest)
+
+
+def test_new_run_drops_earlier_state(state, monkeypatch):
+    first, resumed = state.begin_run()
+    assert not resumed
+    _publish_as(state, monkeypatch, os.getpid() + 1, {"key": "old"})
+
+    second, resumed = state.begin_run()
+    assert second != first and not resumed
+    assert state.run_id() == second
+    assert state.read_since(0.0) == ({}, 0.0)
+
+
+def test_same_supervisor_resumes_the_run(state, monkeypatch):
+    run_id, _ = state.begin_run("100:5")
+    _publish_as(state, monkeypatch, os.getpid() + 1, {"key": "kept"})
+
+    assert state.begin_run("100:5") == (run_id, True)
+    assert state.read_since(0.0)[0] == {"key": "kept"}
+
+    # A new supervisor reusing the PID is a new server
+    other, resumed = state.begin_run("100:6")
+    assert other != run_id and not resumed
+    assert state.read_since(0.0)[0] == {}
+
+
+def test_writes_before_a_run_are_not_mirrored(state, monkeypatch):
+    _publish_as(state, monkeypatch, os.getpid() + 1, {"key": "early"})
+    assert state.read_since(0.0)[0] == {}
+
+
+def test_leadership_passes_on_release(tmp_path):
+    path = str(tmp_path / "startup.lock")
+    first, second = StartupLeader(path), StartupLeader(path)
+    assert first.try_acquire()
+    assert first.is_leader
+    assert not second.try_acquire()
+
+    first.release()
+    assert second.try_acquire()
+    assert not first.try_acquire()
+    second.release()
+
+
+@pytest.mark.parametrize("workers, backend", [(None, "memory"), ("1", "memory"), ("4", "sqlite")])
+def test_backend_follows_the_configured_worker_count(monkeypatch, workers, backend):
+    if workers is None:
+        monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    else:
+        monkeypatch.setenv("WEB_CONCURRENCY", workers)
+    assert default_session_backend() == backend
+
+
+def test_single_worker_has_no_supervisor_to_resume_under(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "1")
+    assert supervisor_id() is None
+    monkeypatch.setenv("WEB_CONCURRENCY", "2")
+    assert supervisor_id() in (None, f"{os.getppid()}:{shared_state_module.process_started(os.getppid())}")
@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("crewai")
+
+from sql_bigbrother.pipelines.sql_processing.prompts import crews
+from sql_bigbrother.pipelines.sql_processing.prompts.crews import CrewPool, CrewTemplate
+
+
+class FakeCrew:
+    """Stands in for a CrewAI crew: records the inputs and sets each task's output."""
+
+    def __init__(self, tasks=1):
+        self.tasks = [SimpleNamespace(output=None) for _ in range(tasks)]
+        self.agents = [SimpleNamespace(tools_results=[])]
+        self.inputs = []
+
+    def kickoff(self, inputs):
+        self.inputs.append(inputs)
+        for index, task in enumerate(self.tasks):
+            task.output = SimpleNamespace(raw=f"{inputs['requirement']}:{index}")
+        self.agents[0].tools_results.append({"tool": "lookup"})
+        return "output"
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(crews, "model_lifecycle", None)
+    monkeypatch.setattr(crews, "SQLAgents", lambda: None)
+    monkeypatch.setattr(crews, "SQLTasks", lambda: None)
+    monkeypatch.setitem(crews.CREW_BUILDERS, "fake", lambda agents, tasks, model: FakeCrew(tasks=2))
+    return CrewPool(max_idle=2, max_uses=3)
+
+
+def test_template_runs_with_new_inputs_every_time():
+    template = CrewTemplate(FakeCrew(tasks=2))
+    assert template.run(requirement="first", schema="s") == ["first:0", "first:1"]
+    assert template.run(requirement="second", schema="s") == ["second:0", "second:1"]
+    assert template.crew.inputs == [{"requirement": "first", "schema": "s"}, {"requirement": "second", "schema": "s"}]
+    assert template.uses == 2
+
+
+def test_reset_clears_the_last_run():
+    template = CrewTemplate(FakeCrew())
+    template.run(requirement="q", schema="s")
+    template.reset()
+    assert all(task.output is None for task in template.crew.tasks)
+    assert template.crew.agents[0].tools_results == []
+
+
+def test_lease_reuses_a_reset_template(pool):
+    with pool.lease("fake", "m") as first:
+        first.run(requirement="q", schema="s")
+    with pool.lease("fake", "m") as second:
+        assert second is first
+        assert all(task.output is None for task in second.crew.tasks)
+    assert (pool.stats()["built"], pool.stats()["reused"]) == (1, 1)
+
+
+def test_models_and_concurrent_leases_get_their_own_templates(pool):
+    with pool.lease("fake", "m") as first, pool.lease("fake", "m") as second, pool.lease("fake", "other") as third:
+        assert len({id(first), id(second), id(third)}) == 3
+    assert pool.stats()["idle"] == {"fake/m": 2, "fake/other": 1}
+
+
+def test_failed_and_worn_templates_are_not_reused(pool):
+    with pytest.raises(RuntimeError):
+        with pool.lease("fake", "m") as failed:
+            raise RuntimeError("crew failed")
+    assert pool.stats()["idle"].get("fake/m", 0) == 0
+
+    for _ in range(3):
+        with pool.lease("fake", "m") as template:
+            template.run(requirement="q", schema="s")
+    with pool.lease("fake", "m") as fresh:
+        assert fresh is not template and fresh is not failed
+        assert fresh.uses == 0
+
+
+def test_prewarm_fills_the_idle_list_up_to_max_idle(pool):
+    pool.prewarm("fake", "m", 5)
+    assert pool.stats()["idle"] == {"fake/m": 2}
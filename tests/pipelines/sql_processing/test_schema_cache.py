@@ -0,0 +1,82 @@
+import types
+
+import pytest
+
+from sql_bigbrother.pipelines.sql_processing.services import schema_cache as schema_cache_module
+from sql_bigbrother.pipelines.sql_processing.services.schema_cache import SchemaCache
+from sql_bigbrother.pipelines.sql_processing.services.utils import schema_fingerprint
+
+SCHEMA = """
+CREATE TABLE customers (id INT PRIMARY KEY, name VARCHAR(255));
+CREATE TABLE orders (id INT PRIMARY KEY, customer_id INT, total DECIMAL(10, 2));
+"""
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    caches = []
+
+    def make(**limits):
+        cache = SchemaCache(str(tmp_path / f"schema_cache{len(caches)}.db"), **limits)
+        caches.append(cache)
+        return cache
+
+    yield make
+    for cache in caches:
+        cache.close()
+
+
+def test_equivalent_schemas_share_a_fingerprint():
+    reformatted = """
+    -- shop schema
+    CREATE TABLE orders (id INT PRIMARY KEY,   customer_id INT, total DECIMAL(10, 2));
+    /* people */
+    CREATE TABLE customers (id INT PRIMARY KEY, name VARCHAR(255));
+    """
+    assert schema_fingerprint(reformatted) == schema_fingerprint(SCHEMA)
+    assert schema_fingerprint(SCHEMA + "CREATE TABLE items (id INT);") != schema_fingerprint(SCHEMA)
+
+
+def test_values_round_trip_and_count_hits(make_cache):
+    cache = make_cache()
+    fingerprint = schema_fingerprint(SCHEMA)
+    assert cache.get(fingerprint) is None
+    value = {"title": "Shop", "recommends": ["Top customers by revenue"]}
+    cache.put(fingerprint, value)
+    assert cache.get(fingerprint) == value
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_entries_are_shared_through_the_file(tmp_path):
+    path = str(tmp_path / "schema_cache.db")
+    writer, reader = SchemaCache(path), SchemaCache(path)
+    try:
+        writer.put("abc", {"title": "Shop", "recommends": []})
+        assert reader.get("abc") == {"title": "Shop", "recommends": []}
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_least_recently_used_entries_are_evicted(make_cache, monkeypatch):
+    cache = make_cache(max_bytes=130)
+    clock = iter(range(100))
+    monkeypatch.setattr(schema_cache_module, "time", types.SimpleNamespace(time=lambda: next(clock)))
+    value = {"title": "x" * 30, "recommends": []}
+    cache.put("first", value)
+    cache.put("second", value)
+    cache.get("first")
+    cache.put("third", value)
+    assert cache.get("second") is None
+    assert cache.get("first") == value
+    assert cache.get("third") == value
+    assert cache.stats()["bytes"] <= 130
+
+
+def test_an_entry_larger_than_the_budget_is_kept_alone(make_cache):
+    cache = make_cache(max_bytes=10)
+    cache.put("small", {"title": "a"})
+    cache.put("large", {"title": "x" * 100})
+    assert cache.get("small") is None
+    assert cache.get("large") == {"title": "x" * 100}
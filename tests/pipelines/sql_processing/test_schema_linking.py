@@ -0,0 +1,68 @@
+import pytest
+
+from sql_bigbrother.pipelines.sql_processing.services.schema_format import parse_schema
+from sql_bigbrother.pipelines.sql_processing.services.schema_linking import SchemaIndex, SchemaLinker
+
+SCHEMA = """
+CREATE TABLE customers (customer_id INT PRIMARY KEY, name VARCHAR(100), country VARCHAR(50));
+CREATE TABLE orders (order_id INT PRIMARY KEY, customer_id INT, order_date DATE,
+    FOREIGN KEY (customer_id) REFERENCES customers(customer_id));
+CREATE TABLE categories (category_id INT PRIMARY KEY, title VARCHAR(100));
+CREATE TABLE products (product_id INT PRIMARY KEY, category_id INT REFERENCES categories(category_id), price DECIMAL(10, 2));
+CREATE TABLE order_lines (order_id INT, product_id INT, quantity INT,
+    FOREIGN KEY (order_id) REFERENCES orders(order_id), FOREIGN KEY (product_id) REFERENCES products(product_id));
+CREATE TABLE wishlists (buyer INT REFERENCES customers(customer_id), item INT REFERENCES products(product_id));
+CREATE TABLE employees (employee_id INT PRIMARY KEY, salary DECIMAL(10, 2));
+CREATE TABLE warehouses (warehouse_id INT PRIMARY KEY, city VARCHAR(50));
+"""
+
+
+@pytest.fixture
+def index():
+    return SchemaIndex(parse_schema(SCHEMA))
+
+
+def test_rank_scores_matching_tables_only(index):
+    ranked = [key for key, _ in index.rank("salary of every employee")]
+    assert ranked == ["employees"]
+    assert index.rank("top 10") == []
+
+
+def test_select_adds_referenced_tables(index):
+    selected = index.select("when was each order placed", top_k=1)
+    assert selected[0] == "orders"
+    assert "customers" in selected
+    assert "warehouses" not in selected
+
+
+def test_select_adds_junction_tables_between_matches(index):
+    selected = index.select("customers and the price of products", top_k=2)
+    assert set(selected[:2]) == {"customers", "products"}
+    # Junctions come before the tables the matches reference
+    assert selected[2:] == ["wishlists", "categories"]
+
+
+def test_select_respects_max_tables(index):
+    selected = index.select("customers and the price of products", top_k=2, max_tables=3)
+    assert selected[2:] == ["wishlists"]
+
+
+def test_unmatched_questions_get_the_most_referenced_tables(index):
+    assert index.select("hello there", top_k=2) == ["customers", "products", "wishlists", "categories"]
+
+
+def test_linker_passes_small_schemas_through_with_matches_first():
+    linker = SchemaLinker(min_tables=10)
+    tables = linker.tables("salary of every employee", SCHEMA)
+    assert tables[0]["name"] == "employees"
+    assert len(tables) == 8
+    assert linker.stats()["passed_through"] == 1
+
+
+def test_linker_prunes_large_schemas_and_reuses_the_index():
+    linker = SchemaLinker(top_k=1, max_tables=4, min_tables=3)
+    names = [table["name"] for table in linker.tables("when was each order placed", SCHEMA)]
+    assert names[:2] == ["orders", "customers"]
+    linker.tables("salary of every employee", SCHEMA)
+    stats = linker.stats()
+    assert (stats["built"], stats["linked"]) == (1, 2)
@@ -0,0 +1,53 @@
+import pytest
+
+from sql_bigbrother.pipelines.sql_processing.services.sql_cache import SQLAnswerCache, question_terms
+
+
+def _answer(cached: str, asked: str):
+    cache = SQLAnswerCache()
+    cache.put(cached, "fingerprint", "model", "SELECT 1")
+    return cache.get(asked, "fingerprint", "model")
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("customers who placed orders in the last month with their total amount",
+     "customers who have not placed orders in the last month with their total amount"),
+    ("customers who placed orders in the last month",
+     "customers who haven't placed orders in the last month"),
+    ("products that have been reviewed by customers from france",
+     "products that have never been reviewed by customers from france"),
+    ("number of orders per customer", "number of customers per order"),
+    ("top 5 products by revenue", "bottom 5 products by revenue"),
+    ("orders placed before 2024", "orders placed after 2024"),
+    ("top 5 products by revenue", "top 10 products by revenue"),
+    ("customers who ordered product A", "customers who ordered product B"),
+    ("orders shipped to France last year", "orders shipped to Spain last year"),
+    ("orders with status 'shipped'", "orders with status 'pending'"),
+    ("number of orders per customer", "number of orders"),
+])
+def test_questions_with_another_meaning_miss(cached, asked):
+    assert _answer(cached, asked) is None
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("list all orders placed in 2024 with their status", "show all orders placed in 2024 with status"),
+    ("Total revenue per customer?", "total revenue per customer"),
+    ("top 10 products by sales", "10 best selling products"),
+    ("top 10 products by sales", "top 10 products by sale"),
+    ("customers who ordered product A", "Customers who ordered product A?"),
+])
+def test_rewordings_hit(cached, asked):
+    assert _answer(cached, asked) is not None
+
+
+@pytest.mark.parametrize("words", [
+    ["sale", "sales", "sold", "selling"],
+    ["order", "orders", "ordered", "ordering"],
+    ["ship", "shipped", "shipping"],
+    ["category", "categories"],
+    ["price", "prices", "priced"],
+    ["employee", "employees"],
+    ["status", "statuses"],
+])
+def test_inflections_share_a_stem(words):
+    assert len({term for word in words for term in question_terms(word)}) == 1
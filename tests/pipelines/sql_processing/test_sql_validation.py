@@ -0,0 +1,39 @@
+import pytest
+
+from sql_bigbrother.pipelines.sql_processing.services import sql_validation
+from sql_bigbrother.pipelines.sql_processing.services.sql_validation import validate_sql
+
+TABLES = {
+    "orders": {"columns": [{"name": "OrderID"}, {"name": "CustomerID"}, {"name": "Total"}]},
+    "customers": {"columns": [{"name": "CustomerID"}, {"name": "Name"}]},
+}
+
+
+@pytest.fixture(params=["parsed", "lexical"])
+def checker(request, monkeypatch):
+    if request.param == "lexical":
+        monkeypatch.setattr(sql_validation, "sqlglot", None)
+    elif sql_validation.sqlglot is None:
+        pytest.skip("sqlglot is not installed")
+
+
+def test_valid_query_passes(checker):
+    sql = ("SELECT c.Name, SUM(o.Total) AS revenue FROM orders o JOIN customers c ON c.CustomerID = o.CustomerID "
+           "GROUP BY c.Name ORDER BY revenue DESC")
+    assert validate_sql(sql, TABLES) is None
+
+
+@pytest.mark.parametrize("sql, reason", [
+    ("", "no SQL"),
+    ("DELETE FROM orders", "does not start with SELECT"),
+    ("SELECT 1; SELECT 2", "more than one statement"),
+    ("SELECT * FROM items", "unknown table"),
+    ("SELECT o.Price FROM orders o", "unknown column"),
+])
+def test_invalid_query_is_rejected(checker, sql, reason):
+    assert reason in validate_sql(sql, TABLES)
+
+
+def test_without_parsed_schema_only_the_statement_is_checked(checker):
+    assert validate_sql("SELECT o.id FROM orders o LIMIT 5", {}) is None
+    assert validate_sql("DELETE FROM orders", {}) is not None
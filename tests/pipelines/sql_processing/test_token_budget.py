@@ -0,0 +1,83 @@
+import pytest
+
+pytest.importorskip("requests")
+
+from sql_bigbrother.pipelines.sql_processing.services.schema_format import parse_schema, render_tables
+from sql_bigbrother.pipelines.sql_processing.services.token_budget import TokenBudget
+
+SCHEMA = "\n".join(
+    f"CREATE TABLE table_{index} (id INT PRIMARY KEY, name VARCHAR(100), amount DECIMAL(10, 2), created_at DATE);"
+    for index in range(20)
+)
+
+
+class WordCounter:
+    """One token per word, so budgets are easy to reason about."""
+
+    def count(self, text, model=None):
+        return len((text or "").split())
+
+
+class FakeClient:
+    def __init__(self, context_length=None):
+        self.context_length = context_length
+
+    def show(self, model):
+        if self.context_length is None:
+            raise ConnectionError("Ollama is not running")
+        return {"model_info": {"llama.context_length": self.context_length}}
+
+
+def _budget(context_length=4096, **options):
+    options = {"max_context": 8192, "output_reserve": 100, "safety_margin": 0.0, **options}
+    return TokenBudget(WordCounter(), FakeClient(context_length), **options)
+
+
+@pytest.fixture
+def tables():
+    return list(parse_schema(SCHEMA).values())
+
+
+def test_everything_fits_at_the_preferred_verbosity(tables):
+    plan = _budget().allocate("m", "instructions", "question", ["USER: hi"], tables, "compact")
+    assert plan["schema"] == render_tables(tables, "compact")
+    assert plan["history"] == ["USER: hi"]
+    assert plan["allocation"]["tables"] == "20/20"
+    assert plan["num_ctx"] == 2048
+
+
+def test_schema_falls_back_to_a_less_verbose_rendering(tables):
+    compact = WordCounter().count(render_tables(tables, "compact"))
+    minimal = WordCounter().count(render_tables(tables, "minimal"))
+    assert minimal < compact
+    budget = _budget(context_length=minimal + 110)
+    plan = budget.allocate("m", "", "question", [], tables, "compact")
+    assert plan["allocation"]["schema_level"] == "minimal"
+    assert plan["allocation"]["tables"] == "20/20"
+    assert budget.stats()["schema_downgraded"] == 1
+
+
+def test_least_relevant_tables_are_dropped_when_nothing_fits(tables):
+    per_table = WordCounter().count(render_tables(tables[:1], "minimal"))
+    budget = _budget(context_length=100 + 1 + per_table * 5)
+    plan = budget.allocate("m", "", "question", [], tables, "compact")
+    kept = int(plan["allocation"]["tables"].split("/")[0])
+    assert 1 <= kept < 20
+    assert plan["schema"] == render_tables(tables[:kept], "minimal")
+    assert budget.stats()["tables_dropped"] == 1
+
+
+def test_history_keeps_the_newest_messages(tables):
+    history = [f"USER: message {index} " + "word " * 50 for index in range(10)]
+    budget = _budget(context_length=400, history_share=0.5)
+    plan = budget.allocate("m", "", "question", history, tables[:1], "compact")
+    assert plan["history"]
+    assert plan["history"][-1].startswith("USER: message 9")
+    assert len(plan["history"]) < len(history)
+    assert budget.stats()["history_trimmed"] == 1
+
+
+def test_context_length_falls_back_to_the_model_family():
+    budget = TokenBudget(WordCounter(), FakeClient(None), max_context=1_000_000)
+    assert budget.context_window("phi3:mini") == 4096
+    assert budget.context_window("unknown-model") == 8192